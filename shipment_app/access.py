@@ -0,0 +1,138 @@
+# shipment_app/access.py
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache, caches
+from django.http import Http404
+from django.utils.crypto import constant_time_compare
+
+from . import caching
+from .models import CustomerAccount
+
+ACCOUNT_FIELDS = ('pk', 'name', 'access_id_hash', 'finance_sheet_url')
+TOKEN_SALT = 'shipment_app.account_access'
+TOKEN_COOKIE = 'account_access_{pk}'
+# টোকেনে পুরো হ্যাশ নয়, শুধু শুরুর অংশ — আইডি বদলালে পুরনো টোকেন আর মেলে না
+TOKEN_HASH_PREFIX = 16
+
+
+# --- ১. ক্যাশ করা অ্যাকাউন্ট (প্রতি চেষ্টায় CustomerAccount কুয়েরি হয় না) ---
+def get_account(pk):
+    """ক্যাশ থেকে (না থাকলে ডাটাবেস থেকে) অ্যাকাউন্ট; সেভ করা যায় না, শুধু যাচাই ও দেখানোর জন্য।"""
+    key = f"accounts:{caching.accounts_version()}:{pk}"
+    values = cache.get(key)
+    if values is None:
+        values = CustomerAccount.objects.filter(pk=pk).values(*ACCOUNT_FIELDS).first() or {}
+        cache.set(key, values, caching.fragment_timeout())
+    if not values:
+        raise Http404("No such customer account.")
+    values = dict(values)
+    return CustomerAccount(id=values.pop('pk'), **values)
+
+
+# --- ২. sliding window রেট লিমিট ---
+def client_ip(request):
+    """NUM_PROXIES>0 হলে X-Forwarded-For-এর ডান দিক থেকে ততগুলো প্রক্সি বাদ দিয়ে আসল ক্লায়েন্ট।"""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if settings.NUM_PROXIES and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(settings.NUM_PROXIES, len(hops))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class SlidingWindowLimiter:
+    """
+    গত `window` সেকেন্ডের ব্যর্থ চেষ্টার টাইমস্ট্যাম্প ক্যাশে রাখে (সর্বোচ্চ `limit`টি)। লক শুধু একই
+    প্রসেসের থ্রেডগুলোর জন্য; Redis-এ দুই ওয়ার্কার একসাথে লিখলে এক-আধটা চেষ্টা কম গোনা হতে পারে।
+    """
+    _lock = threading.Lock()
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    @property
+    def cache(self):
+        return caches['ratelimit']
+
+    def _key(self, ident):
+        return f"access-limit:{self.scope}:{ident}"
+
+    def _recent(self, ident, now):
+        return [stamp for stamp in self.cache.get(self._key(ident), []) if stamp > now - self.window]
+
+    def retry_after(self, ident):
+        """সীমা পার হয়ে থাকলে আর কত সেকেন্ড অপেক্ষা করতে হবে, না হলে 0।"""
+        now = time.time()
+        recent = self._recent(ident, now)
+        if len(recent) < self.limit:
+            return 0
+        return max(1, math.ceil(recent[-self.limit] + self.window - now))
+
+    def hit(self, ident):
+        now = time.time()
+        with self._lock:
+            recent = self._recent(ident, now) + [now]
+            self.cache.set(self._key(ident), recent[-self.limit:], self.window)
+
+    def reset(self, ident):
+        self.cache.delete(self._key(ident))
+
+
+def limiters():
+    return {scope: SlidingWindowLimiter(scope, limit, window)
+            for scope, (limit, window) in settings.ACCESS_ID_RATE_LIMITS.items()}
+
+
+# --- ৩. যাচাই ---
+@dataclass
+class Verification:
+    ok: bool
+    retry_after: int = 0
+
+
+def verify(request, account, raw_access_id):
+    """
+    রেট লিমিট পার না হলে আইডি constant-time যাচাই করে। ব্যর্থ হলে IP ও অ্যাকাউন্ট দুটোর কাউন্টারেই
+    যোগ হয় — এক IP থেকে অনেক অ্যাকাউন্ট, বা অনেক IP থেকে এক অ্যাকাউন্ট, দুই ধরনের অনুমানই আটকায়।
+    """
+    idents = {'ip': client_ip(request), 'account': account.pk}
+    active = limiters()
+    retry_after = max(limiter.retry_after(idents[scope]) for scope, limiter in active.items())
+    if retry_after:
+        return Verification(ok=False, retry_after=retry_after)
+    if raw_access_id.strip() and account.check_access_id(raw_access_id):
+        return Verification(ok=True)
+    for scope, limiter in active.items():
+        limiter.hit(idents[scope])
+    return Verification(ok=False)
+
+
+# --- ৪. সফল যাচাইয়ের পর স্বল্পমেয়াদি সাইন করা টোকেন (কুকি) ---
+def issue_token(response, request, account):
+    token = signing.dumps({'pk': account.pk, 'h': account.access_id_hash[:TOKEN_HASH_PREFIX]}, salt=TOKEN_SALT)
+    response.set_cookie(
+        TOKEN_COOKIE.format(pk=account.pk), token,
+        max_age=settings.ACCOUNT_ACCESS_TOKEN_MAX_AGE, path=request.path,
+        secure=request.is_secure(), httponly=True, samesite='Lax',
+    )
+
+
+def has_valid_token(request, account):
+    token = request.COOKIES.get(TOKEN_COOKIE.format(pk=account.pk))
+    if not token:
+        return False
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.ACCOUNT_ACCESS_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return payload.get('pk') == account.pk and constant_time_compare(
+        payload.get('h', ''), account.access_id_hash[:TOKEN_HASH_PREFIX],
+    )
@@ -1,8 +1,12 @@
 # shipment_app/admin.py
 
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Shipment, ShipmentFile, CustomerAccount # CustomerAccount ইমপোর্ট করা হলো
+from .models import (
+    CustomUser, Shipment, ShipmentFile, CustomerAccount, ShipmentDailyRollup, BackgroundJob,
+    ShipmentStatusEvent, ShipmentTransitStat, ShipmentPeriodReport, ArchivedShipment, ArchivedShipmentFile,
+) # CustomerAccount ইমপোর্ট করা হলো
 
 # CustomUser কে admin প্যানেলে দেখানোর জন্য
 class CustomUserAdmin(UserAdmin):
@@ -16,4 +20,105 @@ class CustomUserAdmin(UserAdmin):
 admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(Shipment) 
 admin.site.register(ShipmentFile)
-admin.site.register(CustomerAccount) # ⬅️ নতুন মডেল রেজিস্টার করা হলো
+
+
+class CustomerAccountAdminForm(forms.ModelForm):
+    # শুধু লেখা যায়: সংরক্ষিত থাকে হ্যাশ, আসল আইডি আর কখনো দেখানো হয় না
+    access_id = forms.CharField(
+        label="Secret Access ID", required=False, strip=True,
+        help_text="Stored hashed. Leave blank to keep the current ID.",
+    )
+
+    class Meta:
+        model = CustomerAccount
+        fields = ('name', 'access_id', 'finance_sheet_url')
+
+    def clean_access_id(self):
+        raw = self.cleaned_data['access_id']
+        if not raw:
+            if not self.instance.pk:
+                raise forms.ValidationError("A Secret Access ID is required for a new account.")
+            return raw
+        taken = CustomerAccount.objects.filter(access_id_hash=CustomerAccount.hash_access_id(raw))
+        if taken.exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("This Secret Access ID is already used by another account.")
+        return raw
+
+
+@admin.register(CustomerAccount)
+class CustomerAccountAdmin(admin.ModelAdmin):
+    form = CustomerAccountAdminForm
+    list_display = ('name', 'finance_sheet_url')
+    search_fields = ('name',)
+
+    def save_model(self, request, obj, form, change):
+        if form.cleaned_data.get('access_id'):
+            obj.set_access_id(form.cleaned_data['access_id'])
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(ShipmentDailyRollup)
+class ShipmentDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'status', 'created_by', 'total_kg', 'total_ctn', 'shipment_count', 'updated_at')
+    list_filter = ('status',)
+    date_hierarchy = 'day'
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_after', 'started_at', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('last_error',)
+
+
+@admin.register(ShipmentStatusEvent)
+class ShipmentStatusEventAdmin(admin.ModelAdmin):
+    list_display = ('shipment', 'from_status', 'to_status', 'changed_by', 'changed_at', 'time_in_previous')
+    list_filter = ('to_status',)
+    list_select_related = ('shipment', 'changed_by')
+    raw_id_fields = ('shipment',)
+    date_hierarchy = 'changed_at'
+
+    # append-only লগ — অ্যাডমিন থেকেও বদলানো যাবে না
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ShipmentTransitStat)
+class ShipmentTransitStatAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'leg', 'week', 'created_by', 'shipment_count', 'median_seconds', 'p90_seconds', 'computed_at')
+    list_filter = ('scope', 'leg')
+
+
+@admin.register(ShipmentPeriodReport)
+class ShipmentPeriodReportAdmin(admin.ModelAdmin):
+    list_display = ('period', 'period_start', 'status', 'created_by', 'total_kg', 'total_ctn', 'shipment_count', 'computed_at')
+    list_filter = ('period', 'status')
+    date_hierarchy = 'period_start'
+
+
+class ArchivedShipmentFileInline(admin.TabularInline):
+    model = ArchivedShipmentFile
+    fields = ('file_type', 'original_name', 'uploaded_file', 'size')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+# আর্কাইভ কেবল দেখার জন্য (archive_shipments কমান্ড লেখে); মুছলে রোলআপ ও blob-ও আপডেট হয় (signals.py)
+@admin.register(ArchivedShipment)
+class ArchivedShipmentAdmin(admin.ModelAdmin):
+    list_display = ('so_number', 'lc_number', 'total_kg', 'status', 'created_by', 'created_at', 'archived_at')
+    list_select_related = ('created_by',)
+    search_fields = ('so_number', 'lc_number')
+    date_hierarchy = 'created_at'
+    inlines = [ArchivedShipmentFileInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
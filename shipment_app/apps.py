@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ShipmentAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shipment_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (সিগন্যাল রেজিস্টার করার জন্য)
@@ -0,0 +1,113 @@
+# shipment_app/archive.py
+
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import caching, search
+from .models import (
+    ArchivedShipment, ArchivedShipmentFile, ArchivedStatusEvent, Shipment, ShipmentFile, ShipmentStatusEvent,
+)
+
+SHIPMENT_FIELDS = (
+    'id', 'so_number', 'lc_number', 'total_ctn', 'total_kg', 'status', 'created_by_id', 'created_at', 'updated_at',
+)
+FILE_FIELDS = (
+    'id', 'shipment_id', 'file_type', 'uploaded_file', 'original_name', 'original_file', 'original_size',
+    'sha256', 'size', 'page_count',
+)
+EVENT_FIELDS = ('id', 'shipment_id', 'from_status', 'to_status', 'changed_by_id', 'changed_at', 'time_in_previous')
+
+
+@dataclass
+class ArchiveResult:
+    shipments: int = 0
+    files: int = 0
+    events: int = 0
+    batches: int = 0
+
+
+# --- ১. কোনগুলো আর্কাইভ হবে ---
+def candidates(older_than):
+    """arrived, আর older_than-এর আগে তৈরি ও শেষবার বদলানো ((status, created_at) ইনডেক্স দিয়ে খোঁজা হয়)।"""
+    cutoff = timezone.now() - older_than
+    return Shipment.objects.filter(status='arrived', created_at__lt=cutoff, updated_at__lt=cutoff)
+
+
+# --- ২. একটি ব্যাচ সরানো (এক ট্রানজ্যাকশনে) ---
+def _delete(cursor, model, column, ids):
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"DELETE FROM {model._meta.db_table} WHERE {column} IN ({placeholders})", ids)
+
+
+def archive_batch(queryset, ids, result):
+    """
+    শিপমেন্ট, ফাইল রো ও স্ট্যাটাস ইভেন্ট আর্কাইভ টেবিলে কপি করে মূল টেবিল থেকে মুছে দেয়। মোছা হয় সরাসরি
+    SQL-এ: Model.delete()-এর সিগন্যাল রোলআপ কমিয়ে দিত আর blob ফাইল মুছে ফেলত — শিপমেন্ট তো হারায়নি,
+    শুধু টেবিল বদলেছে। রিটার্ন: কয়টি শিপমেন্ট সরানো হলো।
+    """
+    with transaction.atomic():
+        # লক নিয়ে আবার একই শর্ত: বাছাই আর এই মুহূর্তের মাঝে কেউ বদলে থাকলে সেটি বাদ
+        rows = list(queryset.select_for_update().filter(pk__in=ids).order_by().values(*SHIPMENT_FIELDS))
+        ids = [row['id'] for row in rows]
+        if not ids:
+            return 0
+        files = list(ShipmentFile.objects.filter(shipment_id__in=ids).order_by().values(*FILE_FIELDS))
+        events = list(ShipmentStatusEvent.objects.filter(shipment_id__in=ids).order_by().values(*EVENT_FIELDS))
+
+        now = timezone.now()
+        archived = ArchivedShipment.objects.bulk_create([ArchivedShipment(archived_at=now, **row) for row in rows])
+        ArchivedShipmentFile.objects.bulk_create([ArchivedShipmentFile(**row) for row in files])
+        ArchivedStatusEvent.objects.bulk_create([ArchivedStatusEvent(**row) for row in events])
+        with connection.cursor() as cursor:
+            _delete(cursor, ShipmentStatusEvent, 'shipment_id', ids)
+            _delete(cursor, ShipmentFile, 'shipment_id', ids)
+            _delete(cursor, Shipment, 'id', ids)
+        search.remove_shipments(ids)
+        search.index_shipments(archived, table=search.ARCHIVE_SEARCH_TABLE)
+        transaction.on_commit(lambda: caching.invalidate_shipments(ids))
+
+    result.shipments += len(ids)
+    result.files += len(files)
+    result.events += len(events)
+    result.batches += 1
+    return len(ids)
+
+
+def archive_shipments(older_than, batch_size=None):
+    """
+    যোগ্য সব শিপমেন্ট ব্যাচে ব্যাচে আর্কাইভ করে (সবচেয়ে পুরনোগুলো আগে)। প্রতি ব্যাচ আলাদা ছোট
+    ট্রানজ্যাকশন, তাই SQLite-এ অন্য রাইটার বেশিক্ষণ আটকে থাকে না।
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    # IN (...) তালিকা ডাটাবেসের প্যারামিটার সীমার মধ্যে
+    batch_size = min(batch_size, connection.features.max_query_params or batch_size)
+    queryset = candidates(older_than)
+    result = ArchiveResult()
+    while True:
+        ids = list(queryset.order_by('created_at', 'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return result
+        archive_batch(queryset, ids, result)
+
+
+# --- ৩. আর্কাইভ থেকে পড়া (হট টেবিলে না পেলে) ---
+def find_shipment(pk):
+    """Shipment, না পেলে ArchivedShipment; কোনোটিতে না থাকলে None।"""
+    for model in (Shipment, ArchivedShipment):
+        shipment = model.objects.select_related('created_by').filter(pk=pk).first()
+        if shipment is not None:
+            return shipment
+    return None
+
+
+def find_file(pk, fields=()):
+    """ShipmentFile, না পেলে ArchivedShipmentFile (id আর্কাইভেও একই থাকে); কোনোটিতে না থাকলে None।"""
+    for model in (ShipmentFile, ArchivedShipmentFile):
+        queryset = model.objects.only(*fields) if fields else model.objects.all()
+        shipment_file = queryset.filter(pk=pk).first()
+        if shipment_file is not None:
+            return shipment_file
+    return None
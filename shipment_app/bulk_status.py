@@ -0,0 +1,101 @@
+# shipment_app/bulk_status.py
+
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import caching, history, imports, rollups, search
+from .models import Shipment
+
+SEPARATOR_RE = re.compile(r'[\n\r,;\t]+')
+SELECT_FIELDS = ('id', 'so_number', 'lc_number', 'status', 'created_at', 'created_by_id', 'total_kg', 'total_ctn')
+
+
+STATUS_LABELS = dict(Shipment.STATUS_CHOICES)
+
+
+@dataclass
+class BulkStatusResult:
+    status: str
+    rows: list = field(default_factory=list)  # (so_number, outcome, আগের স্ট্যাটাসের লেবেল)
+    updated: int = 0
+    unchanged: int = 0
+    not_found: int = 0
+
+    @property
+    def status_label(self):
+        return STATUS_LABELS[self.status]
+
+    def add(self, so_number, outcome, previous=None):
+        self.rows.append((so_number, outcome, STATUS_LABELS.get(previous)))
+        setattr(self, outcome, getattr(self, outcome) + 1)
+
+
+def parse_so_numbers(text):
+    """পেস্ট করা টেক্সট থেকে S/O নম্বর (লাইন, কমা, সেমিকোলন বা ট্যাব দিয়ে আলাদা), ক্রম ঠিক রেখে ডুপ্লিকেট বাদ।"""
+    return list(dict.fromkeys(token.strip() for token in SEPARATOR_RE.split(text) if token.strip()))
+
+
+def so_numbers_from_file(upload):
+    """S/O Number কলামসহ CSV/XLSX, অথবা প্রতি লাইনে একটি S/O এমন সাধারণ টেক্সট ফাইল।"""
+    name = upload.name.lower()
+    if name.endswith(('.csv', '.xlsx')):
+        try:
+            return list(dict.fromkeys(row['so_number'] for _, row in imports.read_rows(upload, name) if row['so_number']))
+        except imports.ImportFileError:
+            if name.endswith('.xlsx'):
+                raise
+            upload.seek(0)
+    return parse_so_numbers(upload.read().decode('utf-8-sig', errors='replace'))
+
+
+def _chunks(values):
+    # SQLite-এ একটি কুয়েরিতে প্যারামিটারের সীমা আছে; PostgreSQL-এ (None) সব একবারে
+    size = connection.features.max_query_params or len(values) or 1
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def update_status(so_numbers, status, user=None):
+    """
+    S/O নম্বরগুলোর স্ট্যাটাস এক ট্রানজ্যাকশনে QuerySet.update দিয়ে বদলায়। update() সিগন্যাল পাঠায় না,
+    তাই রোলআপ, স্ট্যাটাস হিস্টোরি, সার্চ ইনডেক্স, updated_at ও ক্যাশ এখানেই বাল্কে আপডেট হয়।
+    """
+    so_numbers = list(dict.fromkeys(so_numbers))
+    result = BulkStatusResult(status=status)
+    now = timezone.now()
+    with transaction.atomic():
+        found = {}
+        for chunk in _chunks(so_numbers):
+            rows = Shipment.objects.select_for_update().filter(so_number__in=chunk).order_by().values(*SELECT_FIELDS)
+            found.update((row['so_number'], row) for row in rows)
+
+        changed = [row for row in found.values() if row['status'] != status]
+        ids = [row['id'] for row in changed]
+        for chunk in _chunks(ids):
+            Shipment.objects.filter(pk__in=chunk).update(status=status, updated_at=now)
+
+        shipments = [Shipment(**dict(row, status=status, updated_at=now)) for row in changed]
+        rollup_changes = []
+        for row in changed:
+            previous = {name: row[name] for name in rollups.ROLLUP_FIELDS}
+            rollup_changes.append((previous, dict(previous, status=status)))
+        rollups.record_bulk(rollup_changes)
+        history.record_changes(
+            [(shipment, row['status']) for shipment, row in zip(shipments, changed)], user=user, changed_at=now,
+        )
+        search.index_shipments(shipments)
+        if ids:
+            transaction.on_commit(lambda: caching.invalidate_shipments(ids))
+
+    for so_number in so_numbers:
+        row = found.get(so_number)
+        if row is None:
+            result.add(so_number, 'not_found')
+        elif row['status'] == status:
+            result.add(so_number, 'unchanged', row['status'])
+        else:
+            result.add(so_number, 'updated', row['status'])
+    return result
@@ -0,0 +1,106 @@
+# shipment_app/caching.py
+
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+# সব শিপমেন্টের জন্য একটি "ডেটা ভার্সন" (ড্যাশবোর্ড), আর প্রতিটি শিপমেন্টের নিজস্ব ভার্সন (ডিটেইল পেজ)।
+# ভার্সন বাড়লে পুরনো ফ্র্যাগমেন্টের কী আর মেলে না — আলাদা করে delete করতে হয় না।
+GLOBAL_VERSION_KEY = 'shipments:version'
+SHIPMENT_VERSION_KEY = 'shipments:version:{pk}'
+# কাস্টমার অ্যাকাউন্টের তালিকা ও যাচাইয়ের জন্য ক্যাশ করা অ্যাকাউন্ট — যেকোনো CustomerAccount বদলালে বাতিল
+ACCOUNTS_VERSION_KEY = 'accounts:version'
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # মিলিসেকেন্ড টাইমস্ট্যাম্প দিয়ে শুরু, তাই কী মুছে গেলেও আগের কোনো ভার্সন আবার ফিরে আসে না
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def data_version():
+    return _version(GLOBAL_VERSION_KEY)
+
+
+def shipment_version(pk):
+    return _version(SHIPMENT_VERSION_KEY.format(pk=pk))
+
+
+def invalidate_shipment(pk=None):
+    """শিপমেন্ট (বা তার ফাইল) বদলালে ড্যাশবোর্ড ও সেই শিপমেন্টের ডিটেইল ফ্র্যাগমেন্ট বাতিল।"""
+    _bump(GLOBAL_VERSION_KEY)
+    if pk is not None:
+        _bump(SHIPMENT_VERSION_KEY.format(pk=pk))
+
+
+def invalidate_shipments(pks):
+    """বাল্ক পরিবর্তনের জন্য: ভার্সন কী মুছে দিলে পরের বার নতুন টাইমস্ট্যাম্প ভার্সন তৈরি হয়।"""
+    _bump(GLOBAL_VERSION_KEY)
+    cache.delete_many([SHIPMENT_VERSION_KEY.format(pk=pk) for pk in pks])
+
+
+def accounts_version():
+    return _version(ACCOUNTS_VERSION_KEY)
+
+
+def invalidate_accounts():
+    _bump(ACCOUNTS_VERSION_KEY)
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 600)
+
+
+def get_fragment(name, vary_on):
+    value = cache.get(make_template_fragment_key(name, vary_on))
+    record(name, value is not None)
+    return value
+
+
+def set_fragment(name, vary_on, value):
+    cache.set(make_template_fragment_key(name, vary_on), value, fragment_timeout())
+
+
+# --- হিট/মিস কাউন্টার (প্রসেস-লোকাল, রিকোয়েস্ট স্ট্যাটস পেজে দেখানো হয়) ---
+_hits = Counter()
+_misses = Counter()
+_lock = threading.Lock()
+
+
+def record(name, hit):
+    with _lock:
+        (_hits if hit else _misses)[name] += 1
+
+
+def counters():
+    with _lock:
+        rows = []
+        for name in sorted(set(_hits) | set(_misses)):
+            total = _hits[name] + _misses[name]
+            rows.append({
+                'fragment': name,
+                'hits': _hits[name],
+                'misses': _misses[name],
+                'hit_rate': 100 * _hits[name] / total,
+            })
+        return rows
+
+
+def reset():
+    with _lock:
+        _hits.clear()
+        _misses.clear()
@@ -0,0 +1,246 @@
+# shipment_app/documents.py
+
+import hashlib
+import io
+import os
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db.models import Count, Sum
+from django.utils import timezone
+from PIL import Image, ImageDraw, ImageOps, ImageSequence, UnidentifiedImageError
+
+from .models import ShipmentFile
+from .storage import BLOB_DIR
+
+THUMBNAIL_SIZE = (320, 320)
+READ_CHUNK_SIZE = 1024 * 1024
+PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+PDF_COUNT_RE = re.compile(rb'/Count\s+(\d+)')
+PDF_MEDIABOX_RE = re.compile(rb'/MediaBox\s*\[\s*([\d.+-]+)\s+([\d.+-]+)\s+([\d.+-]+)\s+([\d.+-]+)\s*\]')
+
+
+def is_pdf(name):
+    return name.lower().endswith('.pdf')
+
+
+def file_digest(field_file):
+    """blob স্টোরেজে নামই হ্যাশ; পুরনো ফাইলের জন্য চাঙ্ক করে হ্যাশ করা হয়।"""
+    name = os.path.basename(field_file.name)
+    if field_file.name.startswith(f"{BLOB_DIR}/"):
+        return os.path.splitext(name)[0]
+    digest = hashlib.sha256()
+    with field_file.open('rb') as fh:
+        for chunk in fh.chunks(READ_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- PDF ---
+def inspect_pdf(field_file):
+    """
+    Pillow PDF পড়তে পারে না, তাই পেজ সংখ্যা ও প্রথম MediaBox কাঁচা বাইট স্ক্যান করে বের করা হয়।
+    রিটার্ন: (page_count, width_pt, height_pt)
+    """
+    pages = 0
+    max_count = 0
+    mediabox = None
+    tail = b''
+    with field_file.open('rb') as fh:
+        for chunk in fh.chunks(READ_CHUNK_SIZE):
+            window = tail + chunk
+            pages += len(PDF_PAGE_RE.findall(window)) - len(PDF_PAGE_RE.findall(tail))
+            for match in PDF_COUNT_RE.finditer(window):
+                max_count = max(max_count, int(match.group(1)))
+            if mediabox is None:
+                match = PDF_MEDIABOX_RE.search(window)
+                if match:
+                    x0, y0, x1, y1 = (float(v) for v in match.groups())
+                    mediabox = (round(abs(x1 - x0)), round(abs(y1 - y0)))
+            tail = window[-64:]
+    # কম্প্রেসড অবজেক্ট স্ট্রিমে পেজ অবজেক্ট দেখা যায় না, তখন /Pages-এর /Count ব্যবহার হয়
+    page_count = pages or max_count or None
+    width, height = mediabox or (None, None)
+    return page_count, width, height
+
+
+def placeholder(label, subtitle='', size=THUMBNAIL_SIZE, color='#dc3545'):
+    """রেন্ডার করা যায় না এমন ডকুমেন্টের (PDF ইত্যাদি) জন্য পেজ-আকৃতির প্রিভিউ।"""
+    scale = size[1] / THUMBNAIL_SIZE[1]
+    image = Image.new('RGB', (size[0] * 3 // 4, size[1]), '#f1f3f5')
+    draw = ImageDraw.Draw(image)
+    w, h = image.size
+    margin = max(4, round(10 * scale))
+    draw.rectangle([margin, margin, w - margin, h - margin], outline='#adb5bd', width=max(1, round(3 * scale)), fill='white')
+    draw.rectangle([margin, margin, w - margin, round(70 * scale)], fill=color)
+    draw.text((w // 2, round(40 * scale)), label, fill='white', anchor='mm', font_size=max(10, round(36 * scale)))
+    if subtitle:
+        draw.text((w // 2, h // 2 + round(20 * scale)), subtitle, fill='#495057', anchor='mm',
+                  font_size=max(8, round(24 * scale)))
+    return image
+
+
+def pdf_placeholder(page_count, size=THUMBNAIL_SIZE):
+    subtitle = f"{page_count} page{'s' if page_count != 1 else ''}" if page_count else ''
+    return placeholder('PDF', subtitle, size)
+
+
+# --- ইমেজ ---
+def render_thumbnail(image, size=THUMBNAIL_SIZE):
+    # JPEG হলে ডিকোডের সময়ই ছোট করে পড়া হয় (অনেক দ্রুত)
+    image.draft('RGB', (size[0] * 2, size[1] * 2))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').split()[-1])
+        image = background
+    image.thumbnail(size)
+    return image
+
+
+# --- আপলোডের সময় ছবি নরমালাইজ (ফোনের ছবি/বড় PNG → ছোট JPEG/WebP) ---
+ENCODERS = {
+    'JPEG': ('.jpg', {'optimize': True, 'progressive': True}),
+    'WEBP': ('.webp', {'method': 4}),
+}
+# এগুলো থাকলে ছবিতে মেটাডেটা আছে ধরা হয় (ICC প্রোফাইল রাখা হয়, তাতে শুধু রঙের তথ্য)
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'iptc', 'comment')
+# মাল্টি-ফ্রেম ছবিতে প্রতিটি ফ্রেমের যা রাখা হয়
+FRAME_INFO_KEYS = ('duration', 'transparency', 'background', 'disposal')
+MULTI_FRAME_OPTIONS = {'TIFF': {'compression': 'tiff_adobe_deflate'}}
+
+
+@dataclass
+class IngestedUpload:
+    file: object  # যা সংরক্ষিত হবে (আপলোড নিজেই, বা নতুন এনকোড করা ContentFile)
+    name: str
+    original: object = None  # UPLOAD_KEEP_ORIGINALS হলে আসল আপলোড
+    original_size: int = None  # নরমালাইজ হলে আপলোডের আসল সাইজ
+
+
+def _flatten(image, keep_alpha):
+    """JPEG-এ অ্যালফা নেই, তাই স্বচ্ছ অংশ সাদা করা হয়; গ্রেস্কেল স্ক্যান L মোডেই থাকে (ছোট ফাইল)।"""
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    if has_alpha and keep_alpha:
+        return image.convert('RGBA')
+    if has_alpha:
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return image if image.mode in ('RGB', 'L') else image.convert('RGB')
+
+
+def _has_metadata(source):
+    """EXIF (GPS, ক্যামেরা, Orientation), XMP, IPTC/Photoshop, কমেন্ট বা PNG টেক্সট চাঙ্ক আছে কি না।"""
+    return (
+        bool(source.getexif())
+        or any(key in source.info for key in METADATA_KEYS)
+        or bool(getattr(source, 'text', None))
+    )
+
+
+def _reencode(source, fmt):
+    """একটি ছবি: EXIF অনুযায়ী ঘুরিয়ে, ছোট করে, মেটাডেটা ছাড়া UPLOAD_IMAGE_FORMAT-এ এনকোড।"""
+    max_edge = settings.UPLOAD_IMAGE_MAX_EDGE
+    icc_profile = source.info.get('icc_profile')
+    # JPEG হলে ডিকোডের সময়ই প্রায় টার্গেট সাইজে পড়া হয় — ১২ MP ছবিতে অনেক কম মেমরি ও সময়
+    source.draft(source.mode if source.mode in ('RGB', 'L') else 'RGB', (max_edge, max_edge))
+    image = ImageOps.exif_transpose(source)
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    image = _flatten(image, keep_alpha=fmt == 'WEBP')
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=settings.UPLOAD_IMAGE_QUALITY, icc_profile=icc_profile, **ENCODERS[fmt][1])
+    return buffer
+
+
+def _strip_frames(source):
+    """
+    মাল্টি-পেজ বা অ্যানিমেটেড ছবি (স্ক্যান করা TIFF, GIF): একই ফরম্যাটে সব ফ্রেম রাখা হয়, প্রতিটি ফ্রেম
+    ঘুরিয়ে শুধু টাইমিং/স্বচ্ছতার তথ্য রেখে বাকি মেটাডেটা বাদ।
+    """
+    frames = []
+    for frame in ImageSequence.Iterator(source):
+        clean = ImageOps.exif_transpose(frame.copy())
+        clean.info = {key: frame.info[key] for key in FRAME_INFO_KEYS if key in frame.info}
+        frames.append(clean)
+    options = dict(MULTI_FRAME_OPTIONS.get(source.format, {}))
+    options.update({key: source.info[key] for key in ('loop', 'dpi') if key in source.info})
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format=source.format, save_all=True, append_images=frames[1:], **options)
+    return buffer
+
+
+def normalize_upload(upload):
+    """
+    ছবি হলে EXIF অনুযায়ী ঘুরিয়ে, মেটাডেটা (EXIF/GPS/XMP) বাদ দিয়ে, UPLOAD_IMAGE_MAX_EDGE-এর মধ্যে ছোট
+    করে UPLOAD_IMAGE_FORMAT-এ আবার এনকোড করে; মাল্টি-পেজ/অ্যানিমেটেড ছবি একই ফরম্যাটে মেটাডেটা ছাড়া।
+    নতুন এনকোড বড় হলে মেটাডেটা না থাকলেই কেবল আসল ফাইল থাকে। PDF ও ছবি নয় এমন ফাইল যেমন আছে তেমন;
+    ছবি বলে চেনা গেলেও পড়া না গেলে ValidationError (মেটাডেটা বাদ দেওয়া যায় না বলে রাখা হয় না)।
+    """
+    unchanged = IngestedUpload(upload, upload.name)
+    if not settings.UPLOAD_NORMALIZE_IMAGES or is_pdf(upload.name):
+        return unchanged
+    fmt = settings.UPLOAD_IMAGE_FORMAT.upper()
+    try:
+        upload.seek(0)
+        with Image.open(upload) as source:
+            has_metadata = _has_metadata(source)
+            # MPO (অনেক ফোনের JPEG): পরের ফ্রেমগুলো প্রিভিউ/ডেপথ ছবি, প্রথমটিই আসল ছবি
+            if source.format != 'MPO' and getattr(source, 'n_frames', 1) > 1:
+                buffer, name = _strip_frames(source), upload.name
+            else:
+                buffer, name = _reencode(source, fmt), os.path.splitext(upload.name)[0] + ENCODERS[fmt][0]
+    except UnidentifiedImageError:
+        # ছবিই নয় (docx, xlsx ইত্যাদি)
+        return unchanged
+    except (OSError, Image.DecompressionBombError, ValueError, SyntaxError):
+        raise ValidationError(f"{upload.name} looks like an image but could not be read; it may be damaged.")
+    finally:
+        upload.seek(0)
+
+    # GPS/ক্যামেরার তথ্য থাকলে নতুন এনকোড বড় হলেও সেটাই রাখা হয়
+    if buffer.tell() >= upload.size and not has_metadata:
+        return unchanged
+    return IngestedUpload(
+        ContentFile(buffer.getvalue(), name=name), name,
+        original=upload if settings.UPLOAD_KEEP_ORIGINALS else None, original_size=upload.size,
+    )
+
+
+def normalization_stats():
+    """নরমালাইজ হওয়া ফাইলের সংখ্যা এবং আপলোড বনাম সংরক্ষিত বাইট।"""
+    totals = ShipmentFile.objects.filter(original_size__isnull=False, size__isnull=False).aggregate(
+        files=Count('id'), uploaded=Sum('original_size'), stored=Sum('size'),
+    )
+    uploaded, stored = totals['uploaded'] or 0, totals['stored'] or 0
+    totals['saved'] = uploaded - stored
+    totals['ratio'] = uploaded / stored if stored else None
+    return totals
+
+
+def process_shipment_file(shipment_file):
+    """
+    হ্যাশ, সাইজ ও পেজ/ডাইমেনশন হিসাব করে ShipmentFile আপডেট করে। প্রিভিউ ছবি এখানে নয় —
+    previews.py সাইজ বাকেট অনুযায়ী চাহিদামতো বানিয়ে ক্যাশে রাখে।
+    """
+    field_file = shipment_file.uploaded_file
+    shipment_file.sha256 = file_digest(field_file)
+    shipment_file.size = field_file.size
+
+    if is_pdf(field_file.name):
+        shipment_file.page_count, shipment_file.width, shipment_file.height = inspect_pdf(field_file)
+    else:
+        try:
+            with field_file.open('rb') as fh, Image.open(fh) as image:
+                shipment_file.width, shipment_file.height = image.size
+                shipment_file.page_count = getattr(image, 'n_frames', 1)
+        except (UnidentifiedImageError, OSError):
+            # ছবি বা PDF নয় (যেমন .docx) — শুধু হ্যাশ/সাইজ রাখা হয়
+            pass
+
+    shipment_file.processed_at = timezone.now()
+    shipment_file.save(update_fields=['sha256', 'size', 'page_count', 'width', 'height', 'processed_at'])
@@ -0,0 +1,238 @@
+# shipment_app/exports.py
+
+import csv
+import os
+import re
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+from .models import Shipment
+
+REPORT_HEADER = ['S/O Number', 'LC Number', 'Total CTN', 'Total KG', 'Status', 'Created By', 'Created At']
+EXPORT_FIELDS = ('so_number', 'lc_number', 'total_ctn', 'total_kg', 'status', 'created_by__username', 'created_at')
+CHUNK_SIZE = 2000
+
+
+def report_rows(queryset=None):
+    """
+    রিপোর্টের প্রতিটি রো (টাপল) ইয়েল্ড করে। values_list + iterator ব্যবহার করায়
+    মডেল অবজেক্ট তৈরি হয় না, created_by-এর জন্য আলাদা কুয়েরিও হয় না (JOIN)।
+    """
+    if queryset is None:
+        queryset = Shipment.objects.all()
+    status_labels = dict(Shipment.STATUS_CHOICES)
+    rows = queryset.order_by('-created_at').values_list(*EXPORT_FIELDS)
+    for so_number, lc_number, ctn, kg, status, username, created_at in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield (
+            so_number,
+            lc_number or '',
+            ctn,
+            kg,
+            status_labels.get(status, status),
+            username or '',
+            created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+
+# --- CSV ---
+class Echo:
+    """csv.writer-এর জন্য ফাইলের মতো অবজেক্ট, যা লেখা লাইনটিই রিটার্ন করে।"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, batch_rows=500, header=REPORT_HEADER):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    # প্রতি লাইনে আলাদা chunk না পাঠিয়ে কয়েকশো লাইন একসাথে পাঠানো হয়
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= batch_rows:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 => gzip হেডার
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# --- স্ট্রিমিং ZIP (XLSX-ও আসলে একটি ZIP) ---
+class StreamBuffer:
+    """ZipFile এতে লেখে; প্রতিবার লেখার পর জমা বাইটগুলো বের করে নেওয়া হয়।"""
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Shipments" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(v) for v in values) + '</row>'
+
+
+def stream_xlsx(rows, batch_rows=500):
+    """openpyxl ছাড়াই, inline string সহ একটি শিটের XLSX স্ট্রিম করে।"""
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(REPORT_HEADER).encode('utf-8'))
+            batch = []
+            for row in rows:
+                batch.append(_xlsx_row(row))
+                if len(batch) >= batch_rows:
+                    sheet.write(''.join(batch).encode('utf-8'))
+                    batch = []
+                    yield buffer.drain()
+            if batch:
+                sheet.write(''.join(batch).encode('utf-8'))
+            sheet.write(b'</sheetData></worksheet>')
+        yield buffer.drain()
+    yield buffer.drain()
+
+
+# --- শিপমেন্ট ডকুমেন্টের ZIP বান্ডল (স্ট্রিমিং, টেম্প ফাইল ছাড়া) ---
+BUNDLE_READ_SIZE = 1024 * 1024
+BUNDLE_FILE_FIELDS = ('id', 'file_type', 'uploaded_file', 'original_name', 'shipment__so_number')
+MANIFEST_HEADER = ['S/O Number', 'File Type', 'Path in ZIP', 'Bytes', 'Status']
+# আগে থেকেই সংকুচিত ফরম্যাট আবার deflate করলে শুধু CPU খরচ, সাইজ প্রায় একই
+STORED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.zip', '.gz', '.xlsx', '.docx'}
+UNSAFE_NAME_RE = re.compile(r'[\x00-\x1f/\\:*?"<>|]+')
+
+
+def _safe_name(name, fallback='file'):
+    name = UNSAFE_NAME_RE.sub('_', name).strip(' .')
+    return name[:150] or fallback
+
+
+def bundle_files(shipments):
+    """
+    শিপমেন্টগুলোর সব ফাইল S/O ও টাইপ অনুযায়ী সাজানো; values + iterator, তাই মডেল অবজেক্ট তৈরি হয় না।
+    ArchivedShipment-এর কুয়েরিসেট দিলে আর্কাইভের ফাইল রো।
+    """
+    return (
+        shipments.file_model.objects.filter(shipment__in=shipments)
+        .order_by('shipment__so_number', 'file_type', 'id')
+        .values(*BUNDLE_FILE_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def stream_zip_bundle(files, storage):
+    """
+    ফাইলগুলো <S/O>/<file_type>/<নাম> হিসেবে ZIP-এ স্ট্রিম করে, শেষে manifest.csv। প্রতিবার একটি ব্লক
+    (BUNDLE_READ_SIZE) পড়ে লিখেই বের করে দেওয়া হয় — মেমরি স্থির, কোনো টেম্প ফাইল নেই, ডাউনলোড সাথে সাথে
+    শুরু হয়। সাইজ আগে জানা নেই বলে data descriptor আর দরকার হলে ZIP64 ব্যবহার হয়।
+    """
+    buffer = StreamBuffer()
+    manifest = []
+    used = set()
+    date_time = timezone.localtime().timetuple()[:6]
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        for row in files:
+            display = row['original_name'] or os.path.basename(row['uploaded_file'])
+            folder = f"{_safe_name(row['shipment__so_number'], 'unknown')}/{row['file_type']}"
+            stem, ext = os.path.splitext(_safe_name(display))
+            path, copy = f"{folder}/{stem}{ext}", 1
+            while path in used:
+                copy += 1
+                path = f"{folder}/{stem} ({copy}){ext}"
+
+            try:
+                source = storage.open(row['uploaded_file'], 'rb')
+            except OSError:
+                manifest.append((row['shipment__so_number'], row['file_type'], path, '', 'missing'))
+                continue
+            used.add(path)
+            info = zipfile.ZipInfo(path, date_time=date_time)
+            info.compress_type = zipfile.ZIP_STORED if ext.lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            written = 0
+            with source, archive.open(info, mode='w', force_zip64=True) as entry:
+                for block in iter(lambda: source.read(BUNDLE_READ_SIZE), b''):
+                    entry.write(block)
+                    written += len(block)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            manifest.append((row['shipment__so_number'], row['file_type'], path, written, 'ok'))
+
+        archive.writestr('manifest.csv', ''.join(stream_csv(manifest, header=MANIFEST_HEADER)))
+    yield buffer.drain()
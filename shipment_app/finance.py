@@ -0,0 +1,205 @@
+# shipment_app/finance.py
+
+import csv
+import hashlib
+import io
+import logging
+import os
+import re
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import CustomerAccount
+
+logger = logging.getLogger(__name__)
+
+SHEET_ID_RE = re.compile(r'/spreadsheets/d/([\w-]+)')
+GID_RE = re.compile(r'[#&?]gid=(\d+)')
+CACHE_KEY = 'finance:{pk}'
+REFRESH_FLAG_KEY = 'finance:{pk}:requested'
+
+
+class SheetFetchError(Exception):
+    pass
+
+
+@dataclass
+class SheetResponse:
+    content: bytes
+    etag: str = ''
+    last_modified: str = ''
+
+
+# --- ১. শিটের উৎস (প্রোডাকশনে HTTP, টেস্ট/অফলাইনে লোকাল ফাইল) ---
+def sheet_key(url):
+    """Google Sheet-এর আইডি; অন্য URL হলে তার হ্যাশ।"""
+    match = SHEET_ID_RE.search(url)
+    return match.group(1) if match else hashlib.sha1(url.encode()).hexdigest()[:16]
+
+
+def csv_export_url(url):
+    """শেয়ার করা Google Sheet লিংক (…/edit#gid=N) থেকে CSV এক্সপোর্ট লিংক; অন্য লিংক যেমন আছে তেমন।"""
+    match = SHEET_ID_RE.search(url)
+    if not match or 'docs.google.com' not in url:
+        return url
+    gid = GID_RE.search(url)
+    export = f"https://docs.google.com/spreadsheets/d/{match.group(1)}/export?format=csv"
+    return export + (f"&gid={gid.group(1)}" if gid else '')
+
+
+class HttpSheetSource:
+    """ETag/Last-Modified দিয়ে conditional GET; শিট না বদলালে None (304)।"""
+
+    def __init__(self, timeout=None, max_bytes=None):
+        self.timeout = timeout or settings.FINANCE_SHEET_TIMEOUT
+        self.max_bytes = max_bytes or settings.FINANCE_SHEET_MAX_BYTES
+
+    def fetch(self, url, etag='', last_modified=''):
+        url = csv_export_url(url)
+        if urlsplit(url).scheme not in ('http', 'https'):
+            raise SheetFetchError(f"Unsupported sheet URL: {url}")
+        headers = {'Accept': 'text/csv', 'User-Agent': 'ShipmentProject finance fetcher'}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout) as response:
+                if response.headers.get_content_type() == 'text/html':
+                    # শিট পাবলিক না থাকলে Google লগইন পেজ পাঠায়
+                    raise SheetFetchError("The sheet returned an HTML page; is it shared as 'anyone with the link'?")
+                content = response.read(self.max_bytes + 1)
+                if len(content) > self.max_bytes:
+                    raise SheetFetchError(f"The sheet is larger than {self.max_bytes} bytes.")
+                return SheetResponse(
+                    content, response.headers.get('ETag', ''), response.headers.get('Last-Modified', ''),
+                )
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304:
+                return None
+            raise SheetFetchError(f"HTTP {exc.code} from sheet") from exc
+        except (urllib.error.URLError, OSError) as exc:
+            raise SheetFetchError(str(exc)) from exc
+
+
+class LocalFileSheetSource:
+    """FINANCE_SHEET_DIR/<sheet id>.csv পড়ে; mtime ও সাইজ থেকে ETag, তাই না বদলালে None।"""
+
+    def __init__(self, directory=None):
+        self.directory = str(directory or settings.FINANCE_SHEET_DIR)
+
+    def fetch(self, url, etag='', last_modified=''):
+        path = os.path.join(self.directory, f"{sheet_key(url)}.csv")
+        try:
+            stat = os.stat(path)
+            current = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if etag == current:
+                return None
+            with open(path, 'rb') as fh:
+                return SheetResponse(fh.read(), current)
+        except OSError as exc:
+            raise SheetFetchError(str(exc)) from exc
+
+
+def get_source():
+    return import_string(settings.FINANCE_SHEET_SOURCE)()
+
+
+# --- ২. CSV পার্স ও ক্যাশ ---
+def parse_csv(content, max_rows=None):
+    """প্রথম অ-খালি সারি হেডার; খালি সারি ও ডানদিকের খালি কলাম বাদ। রিটার্ন: (header, rows, truncated)।"""
+    max_rows = max_rows or settings.FINANCE_SHEET_MAX_ROWS
+    text = content.decode('utf-8-sig', errors='replace')
+    rows = [[cell.strip() for cell in row] for row in csv.reader(io.StringIO(text))]
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return [], [], False
+    width = max(max((i + 1 for i, cell in enumerate(row) if cell), default=0) for row in rows)
+    rows = [(row + [''] * width)[:width] for row in rows]
+    return rows[0], rows[1:max_rows + 1], len(rows) - 1 > max_rows
+
+
+def cached_statement(account):
+    """ক্যাশ করা স্টেটমেন্ট (dict), অথবা None — শিটের লিংক বদলালে পুরনোটা আর ব্যবহার হয় না।"""
+    entry = cache.get(CACHE_KEY.format(pk=account.pk))
+    if entry is None or entry['url'] != account.finance_sheet_url:
+        return None
+    return entry
+
+
+def is_stale(entry):
+    return entry['checked_at'] < timezone.now() - timedelta(seconds=settings.FINANCE_SHEET_TTL)
+
+
+def _store(account, entry):
+    # ক্যাশ ডাটাবেসে (DatabaseCache) হলেও লেখাটুকুই ছোট ট্রানজ্যাকশনে — শিট আনার সময় নয়
+    with transaction.atomic():
+        cache.set(CACHE_KEY.format(pk=account.pk), entry, settings.FINANCE_SHEET_CACHE_TIMEOUT)
+
+
+def refresh(account, source=None):
+    """
+    একটি অ্যাকাউন্টের শিট আবার আনে (আগের ETag/Last-Modified সহ)। ব্যর্থ হলে আগের সারিগুলো রেখে শুধু
+    ত্রুটি লেখা হয়। রিটার্ন: 'updated', 'not_modified' অথবা 'error'।
+    """
+    source = source or get_source()
+    now = timezone.now()
+    entry = cached_statement(account) or {
+        'url': account.finance_sheet_url, 'header': [], 'rows': None, 'truncated': False,
+        'etag': '', 'last_modified': '', 'fetched_at': None,
+    }
+    try:
+        response = source.fetch(account.finance_sheet_url, entry['etag'], entry['last_modified'])
+    except SheetFetchError as exc:
+        logger.warning("Finance sheet for account %s failed: %s", account.pk, exc)
+        _store(account, dict(entry, checked_at=now, error=str(exc)))
+        return 'error'
+
+    if response is None:
+        _store(account, dict(entry, checked_at=now, error=''))
+        return 'not_modified'
+    header, rows, truncated = parse_csv(response.content)
+    _store(account, dict(
+        entry, header=header, rows=rows, truncated=truncated, etag=response.etag,
+        last_modified=response.last_modified, fetched_at=now, checked_at=now, error='',
+    ))
+    return 'updated'
+
+
+def refresh_accounts(account_ids=None):
+    """
+    সব (অথবা নির্দিষ্ট) অ্যাকাউন্টের শিট রিফ্রেশ; রিটার্ন: ফলাফল অনুযায়ী গণনা। ট্রানজ্যাকশনের বাইরে ডাকতে
+    হয় — শিট আনা ধীর, তাই প্রতিটি অ্যাকাউন্টের লেখাই (_store) শুধু নিজের ট্রানজ্যাকশনে।
+    """
+    accounts = CustomerAccount.objects.exclude(finance_sheet_url='').only('pk', 'finance_sheet_url')
+    if account_ids is not None:
+        accounts = accounts.filter(pk__in=account_ids)
+    source = get_source()
+    counts = {'updated': 0, 'not_modified': 0, 'error': 0}
+    # আগেই লিস্টে পড়া হয়, যাতে শিট আনার সময় রিড কার্সর খোলা না থাকে
+    for account in list(accounts.order_by('pk')):
+        counts[refresh(account, source)] += 1
+    return counts
+
+
+# --- ৩. পেজ থেকে: শুধু ক্যাশ পড়া, পুরনো হলে ব্যাকগ্রাউন্ডে রিফ্রেশ চাওয়া ---
+def statement(account):
+    """
+    ক্যাশ থেকে স্টেটমেন্ট; নেই বা TTL পেরোলে (পুরনোটাই দেখিয়ে) রিফ্রেশ জব কিউতে দেয়। পেজ লোডের সময়
+    কখনো শিট আনা হয় না।
+    """
+    from .jobs import schedule
+
+    entry = cached_statement(account)
+    if (entry is None or is_stale(entry)) and cache.add(REFRESH_FLAG_KEY.format(pk=account.pk), 1, 60):
+        schedule('refresh_finance_sheets', timedelta(0), account_ids=[account.pk])
+    return entry
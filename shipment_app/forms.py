@@ -1,8 +1,11 @@
 # shipment_app/forms.py
 
 from django import forms
-from .models import Shipment, ShipmentFile
+from .models import ArchivedShipment, Shipment, ShipmentFile, CustomUser, ShipmentPeriodReport
 from django.forms.widgets import ClearableFileInput
+from .documents import normalize_upload
+
+ARCHIVED_SO_MESSAGE = "A shipment with this S/O Number has been archived; archived shipments are read-only."
 
 # ১. কাস্টম মাল্টিপল ফাইল ইনপুট উইজেট
 # এটি HTML ইনপুটকে 'multiple' অ্যাট্রিবিউট যোগ করে
@@ -11,9 +14,12 @@ class MultipleFileInput(ClearableFileInput):
 
 # ২. কাস্টম মাল্টিপল ফাইল ফিল্ড
 # এটি একাধিক ফাইল যাচাই করতে পারে
+# normalize_images=True হলে যাচাইয়ের পরে প্রতিটি ছবি documents.normalize_upload দিয়ে ছোট করা হয়,
+# তখন cleaned_data-তে IngestedUpload-এর তালিকা থাকে
 class MultipleFileField(forms.FileField):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, normalize_images=False, **kwargs):
         kwargs.setdefault("widget", MultipleFileInput())
+        self.normalize_images = normalize_images
         super().__init__(*args, **kwargs)
     
     def clean(self, data, initial=None):
@@ -22,14 +28,16 @@ class MultipleFileField(forms.FileField):
             result = [single_file_clean(d, initial) for d in data]
         else:
             result = [single_file_clean(data, initial)]
+        if self.normalize_images:
+            result = [normalize_upload(f) for f in result if f]
         return result
 
 # ৩. শিপমেন্ট আপলোডের জন্য ফর্ম
 class ShipmentForm(forms.ModelForm):
     # কাস্টম ফাইল ফিল্ড যোগ করা হলো
-    receipt_files = MultipleFileField(label='Receipt Copies (Select Multiple)', required=False)
-    packing_list_files = MultipleFileField(label='Packing Lists (Select Multiple)', required=False)
-    awb_files = MultipleFileField(label='AWB Copies (Select Multiple)', required=False)
+    receipt_files = MultipleFileField(label='Receipt Copies (Select Multiple)', required=False, normalize_images=True)
+    packing_list_files = MultipleFileField(label='Packing Lists (Select Multiple)', required=False, normalize_images=True)
+    awb_files = MultipleFileField(label='AWB Copies (Select Multiple)', required=False, normalize_images=True)
 
     class Meta:
         model = Shipment
@@ -44,8 +52,109 @@ class ShipmentForm(forms.ModelForm):
             'total_kg': forms.NumberInput(attrs={'step': '0.01'}), 
         }
 
+    # মূল টেবিলের ইউনিক যাচাই ModelForm নিজেই করে; আর্কাইভে সরানো S/O এখানে
+    def clean_so_number(self):
+        so_number = self.cleaned_data['so_number']
+        if ArchivedShipment.objects.filter(so_number=so_number).exists():
+            raise forms.ValidationError(ARCHIVED_SO_MESSAGE)
+        return so_number
+
 # ৪. স্ট্যাটাস আপডেটের জন্য ফর্ম
 class StatusUpdateForm(forms.ModelForm):
     class Meta:
         model = Shipment
-        fields = ['status']
\ No newline at end of file
+        fields = ['status']
+
+# ৫. রিপোর্ট ডাউনলোডের ফিল্টার (GET প্যারামিটার থেকে)
+class ReportFilterForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+    status = forms.ChoiceField(choices=[('', 'All')] + Shipment.STATUS_CHOICES, required=False)
+    created_by = forms.ModelChoiceField(queryset=CustomUser.objects.all(), required=False)
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    gzip = forms.BooleanField(required=False)
+    # আর্কাইভ করা (পুরনো arrived) শিপমেন্টও রিপোর্টে আসবে কি না — archive.py দেখুন
+    include_archived = forms.BooleanField(required=False, label='Include archived shipments')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        if start and end and start > end:
+            raise forms.ValidationError("Start date must be before end date.")
+        return cleaned_data
+
+# ৬. বাল্ক ইমপোর্টের প্রতিটি রো — ShipmentForm-এর একই ফিল্ড রুল (ফাইল ছাড়া), সাথে ঐচ্ছিক স্ট্যাটাস
+class ShipmentImportRowForm(ShipmentForm):
+    receipt_files = None
+    packing_list_files = None
+    awb_files = None
+
+    class Meta(ShipmentForm.Meta):
+        fields = ShipmentForm.Meta.fields + ['status']
+
+
+# ৭. বাল্ক ইমপোর্ট আপলোড ফর্ম
+class ShipmentImportForm(forms.Form):
+    file = forms.FileField(label='CSV or Excel (XLSX) file',
+                           help_text='Columns: S/O Number, LC Number, Total CTN, Total KG, Status (optional).')
+    dry_run = forms.BooleanField(required=False, label='Validate only (do not save)')
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError("Only .csv and .xlsx files are supported.")
+        return upload
+
+
+# ৮. একসাথে অনেক শিপমেন্টের স্ট্যাটাস আপডেট (পেস্ট করা তালিকা বা ফাইল)
+class BulkStatusUpdateForm(forms.Form):
+    so_numbers = forms.CharField(
+        label='S/O Numbers', required=False, widget=forms.Textarea(attrs={'rows': 8}),
+        help_text='One per line, or separated by commas.',
+    )
+    file = forms.FileField(
+        label='Or upload a file', required=False,
+        help_text='CSV/XLSX with an S/O Number column, or a plain text list.',
+    )
+    status = forms.ChoiceField(choices=Shipment.STATUS_CHOICES, label='New Status')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('so_numbers', '').strip() and not cleaned_data.get('file'):
+            raise forms.ValidationError("Paste some S/O numbers or upload a file.")
+        return cleaned_data
+
+
+# ৯. সাপ্তাহিক/মাসিক রিপোর্ট পেজের ফিল্টার
+class PeriodReportForm(forms.Form):
+    GROUP_CHOICES = [
+        ('total', 'All shipments'),
+        ('status', 'By status'),
+        ('creator', 'By creator'),
+    ]
+    period = forms.ChoiceField(choices=ShipmentPeriodReport.PERIOD_CHOICES, required=False)
+    group_by = forms.ChoiceField(choices=GROUP_CHOICES, required=False, label='Group by')
+    periods = forms.IntegerField(min_value=1, max_value=104, required=False, label='Periods')
+    format = forms.ChoiceField(choices=[('', 'Page'), ('csv', 'CSV')], required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        cleaned_data['period'] = cleaned_data.get('period') or 'week'
+        cleaned_data['group_by'] = cleaned_data.get('group_by') or 'total'
+        cleaned_data['periods'] = cleaned_data.get('periods') or 12
+        return cleaned_data
+
+# ১০. ডকুমেন্ট ZIP বান্ডলের ফিল্টার — রিপোর্টের একই তারিখ/স্ট্যাটাস/ক্রিয়েটর ফিল্টার, ফরম্যাট ছাড়া
+class DocumentBundleForm(ReportFilterForm):
+    format = None
+    gzip = None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not (cleaned_data.get('start_date') or cleaned_data.get('end_date')):
+            raise forms.ValidationError("Choose a start or end date for the document bundle.")
+        return cleaned_data
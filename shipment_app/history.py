@@ -0,0 +1,131 @@
+# shipment_app/history.py
+
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DateField, Max, Q
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .models import ArchivedStatusEvent, ShipmentStatusEvent, ShipmentTransitStat
+from .search import day_start
+
+# লেগ -> (from_status, to_status)
+LEGS = {
+    'pending_fly': ('pending', 'fly'),
+    'fly_arrived': ('fly', 'arrived'),
+}
+LEG_FILTER = Q()
+for _from_status, _to_status in LEGS.values():
+    LEG_FILTER |= Q(from_status=_from_status, to_status=_to_status)
+LOOKUP_CHUNK = 500
+# আর্কাইভে সরানো ইভেন্টও ট্রানজিট সারাংশে গোনা হয় (archive.py)
+EVENT_MODELS = (ShipmentStatusEvent, ArchivedStatusEvent)
+
+
+# --- ১. ইভেন্ট লেখা ---
+def _entered_at(shipment_ids):
+    """প্রতিটি শিপমেন্ট সর্বশেষ কখন বর্তমান স্ট্যাটাসে ঢুকেছিল (শেষ ইভেন্টের সময়)।"""
+    entered = {}
+    shipment_ids = list(shipment_ids)
+    for start in range(0, len(shipment_ids), LOOKUP_CHUNK):
+        rows = (
+            ShipmentStatusEvent.objects.filter(shipment_id__in=shipment_ids[start:start + LOOKUP_CHUNK])
+            .order_by().values('shipment_id').annotate(last=Max('changed_at')).values_list('shipment_id', 'last')
+        )
+        entered.update(rows)
+    return entered
+
+
+def record_changes(changes, user=None, changed_at=None):
+    """
+    changes: (shipment, previous status বা নতুন হলে None) জোড়ার তালিকা। স্ট্যাটাস বদলেছে বা নতুন
+    শিপমেন্ট এমনগুলোর জন্য এক bulk_create-এ ইভেন্ট লেখে। কলারের ট্রানজ্যাকশনের ভেতরে ডাকতে হবে।
+    """
+    changed_at = changed_at or timezone.now()
+    changes = [(s, previous) for s, previous in changes if previous != s.status]
+    if not changes:
+        return []
+    entered = _entered_at(s.pk for s, previous in changes if previous is not None)
+
+    events = []
+    for shipment, previous in changes:
+        since = entered.get(shipment.pk)
+        # লগ চালুর আগের শিপমেন্ট: pending থেকে বদলালে ধরে নেওয়া হয় তৈরি হওয়ার পর থেকেই pending ছিল
+        if since is None and previous == 'pending':
+            since = shipment.created_at
+        events.append(ShipmentStatusEvent(
+            shipment_id=shipment.pk,
+            from_status=previous or '',
+            to_status=shipment.status,
+            changed_by_id=user.pk if user else (shipment.created_by_id if previous is None else None),
+            changed_at=changed_at,
+            time_in_previous=changed_at - since if previous is not None and since else None,
+        ))
+    return ShipmentStatusEvent.objects.bulk_create(events)
+
+
+# --- ২. ট্রানজিট সময়ের সারাংশ ---
+def percentile(ordered, pct):
+    """সাজানো তালিকার nearest-rank পার্সেন্টাইল।"""
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _leg_durations(*querysets):
+    durations = defaultdict(list)
+    for events in querysets:
+        for from_status, to_status, duration in events.values_list('from_status', 'to_status', 'time_in_previous'):
+            for leg, pair in LEGS.items():
+                if pair == (from_status, to_status):
+                    durations[leg].append(duration.total_seconds())
+    return durations
+
+
+def _store(scope, week, created_by_id, durations, last_event_id):
+    for leg in LEGS:
+        values = sorted(durations.get(leg, []))
+        lookup = {'scope': scope, 'leg': leg, 'week': week, 'created_by_id': created_by_id}
+        if not values:
+            ShipmentTransitStat.objects.filter(**lookup).delete()
+            continue
+        ShipmentTransitStat.objects.update_or_create(**lookup, defaults={
+            'shipment_count': len(values),
+            'median_seconds': percentile(values, 50),
+            'p90_seconds': percentile(values, 90),
+            'last_event_id': last_event_id,
+        })
+
+
+def build_transit_stats(full=False):
+    """
+    নতুন ইভেন্ট (আগের বিল্ডের পরে) যেসব সপ্তাহ ও ক্রিয়েটরকে ছোঁয় শুধু সেগুলো আবার হিসাব করে;
+    full=True হলে সব মুছে নতুন করে। কতগুলো সপ্তাহ/ক্রিয়েটর হিসাব হলো তা রিটার্ন করে।
+    """
+    watermark = 0 if full else ShipmentTransitStat.objects.aggregate(m=Max('last_event_id'))['m'] or 0
+    latest = max(model.objects.aggregate(m=Max('id'))['m'] or 0 for model in EVENT_MODELS)
+    if latest <= watermark and not full:
+        return 0
+
+    # আর্কাইভ করা ইভেন্ট আসল id রাখে, তাই একই watermark দুই টেবিলেই চলে
+    legs = [model.objects.filter(LEG_FILTER, time_in_previous__isnull=False, id__lte=latest) for model in EVENT_MODELS]
+    weeks, creators = set(), set()
+    for events in legs:
+        new = events.filter(id__gt=watermark).order_by()
+        weeks.update(
+            new.annotate(week=TruncWeek('changed_at', output_field=DateField())).values_list('week', flat=True).distinct()
+        )
+        creators.update(new.values_list('shipment__created_by', flat=True).distinct())
+
+    with transaction.atomic():
+        if full:
+            ShipmentTransitStat.objects.all().delete()
+        for week in weeks:
+            start, end = day_start(week), day_start(week + timedelta(days=7))
+            in_week = [events.filter(changed_at__gte=start, changed_at__lt=end) for events in legs]
+            _store('week', week, None, _leg_durations(*in_week), latest)
+        for created_by_id in creators:
+            by_creator = [events.filter(shipment__created_by=created_by_id) for events in legs]
+            _store('creator', None, created_by_id, _leg_durations(*by_creator), latest)
+    return len(weeks) + len(creators)
@@ -0,0 +1,301 @@
+# shipment_app/imports.py
+
+import codecs
+import csv
+import re
+import zipfile
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from xml.etree.ElementTree import iterparse
+
+from django import forms
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import caching, history, rollups, search
+from .forms import ARCHIVED_SO_MESSAGE, ShipmentImportRowForm
+from .models import ArchivedShipment, Shipment
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+IMPORT_FIELDS = ('so_number', 'lc_number', 'total_ctn', 'total_kg', 'status')
+# ফাইলে কলাম না থাকলে শুধু নতুন শিপমেন্ট এই মান পায়; পুরনো শিপমেন্টের সেই ফিল্ড বদলায় না
+NEW_ROW_DEFAULTS = {'lc_number': None, 'status': 'pending'}
+
+# হেডার ছোট হাতের a-z0-9 করে মেলানো হয় ("S/O Number" -> "sonumber"), তাই রিপোর্ট এক্সপোর্টও সরাসরি ইমপোর্ট হয়
+HEADER_ALIASES = {
+    'sonumber': 'so_number', 'so': 'so_number', 'sono': 'so_number',
+    'lcnumber': 'lc_number', 'lc': 'lc_number', 'lcno': 'lc_number',
+    'totalctn': 'total_ctn', 'ctn': 'total_ctn',
+    'totalkg': 'total_kg', 'kg': 'total_kg',
+    'status': 'status',
+}
+# স্ট্যাটাস কী ('fly'), পুরো লেবেল ('Fly ✅') বা লেবেলের প্রথম শব্দ ('Fly') — সবই চলে
+STATUS_LOOKUP = {}
+for _key, _label in Shipment.STATUS_CHOICES:
+    STATUS_LOOKUP.update({_key: _key, _label.lower(): _key, _label.split()[0].lower(): _key})
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+CELL_REF_RE = re.compile(r'^([A-Z]+)')
+
+
+class ImportFileError(ValueError):
+    """পুরো ফাইলটাই পড়া যাচ্ছে না (ভুল ফরম্যাট, হেডার নেই ইত্যাদি)।"""
+
+
+@dataclass
+class RowError:
+    line: int
+    so_number: str
+    message: str
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, so_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, so_number, message))
+
+
+# --- ১. স্ট্রিমিং পার্সার: (লাইন/রো নম্বর, সেলের তালিকা) ইয়েল্ড করে, পুরো ফাইল মেমরিতে রাখে না ---
+def read_csv(fileobj):
+    reader = csv.reader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+    for values in reader:
+        yield reader.line_num, values
+
+
+def _column_index(ref):
+    index = 0
+    for letter in CELL_REF_RE.match(ref).group(1):
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _cell_value(cell, shared_strings):
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(XLSX_NS + 't'))
+    value = cell.find(XLSX_NS + 'v')
+    text = (value.text or '') if value is not None else ''
+    if cell_type == 's' and text:
+        return shared_strings[int(text)]
+    if cell_type == 'b':
+        return 'TRUE' if text == '1' else 'FALSE'
+    return text
+
+
+def _shared_strings(archive):
+    try:
+        source = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    strings = []
+    with source:
+        for _, element in iterparse(source):
+            if element.tag == XLSX_NS + 'si':
+                strings.append(''.join(t.text or '' for t in element.iter(XLSX_NS + 't')))
+                element.clear()
+    return strings
+
+
+def _first_sheet(archive):
+    names = sorted(
+        name for name in archive.namelist()
+        if name.startswith('xl/worksheets/') and name.endswith('.xml')
+    )
+    if not names:
+        raise ImportFileError("The workbook has no worksheets.")
+    return 'xl/worksheets/sheet1.xml' if 'xl/worksheets/sheet1.xml' in names else names[0]
+
+
+def read_xlsx(fileobj):
+    """openpyxl ছাড়াই প্রথম শিটের রো iterparse দিয়ে পড়ে; পড়া রো সাথে সাথে মুছে ফেলা হয়।"""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ImportFileError("Not a valid .xlsx file.")
+    with archive:
+        shared_strings = _shared_strings(archive)
+        with archive.open(_first_sheet(archive)) as sheet:
+            sheet_data = None
+            row_number = 0
+            values = []
+            for event, element in iterparse(sheet, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == XLSX_NS + 'sheetData':
+                        sheet_data = element
+                    elif element.tag == XLSX_NS + 'row':
+                        values = []
+                    continue
+                if element.tag == XLSX_NS + 'c':
+                    ref = element.get('r')
+                    index = _column_index(ref) if ref else len(values)
+                    values.extend([''] * (index - len(values)))
+                    values.append(_cell_value(element, shared_strings))
+                elif element.tag == XLSX_NS + 'row':
+                    row_number = int(element.get('r') or row_number + 1)
+                    yield row_number, values
+                    if sheet_data is not None:
+                        sheet_data.clear()
+
+
+def read_rows(fileobj, filename):
+    """হেডার মিলিয়ে (লাইন নম্বর, {ফিল্ড: মান}) ইয়েল্ড করে; অপরিচিত কলাম বাদ দেওয়া হয়।"""
+    raw_rows = read_xlsx(fileobj) if filename.lower().endswith('.xlsx') else read_csv(fileobj)
+    columns = None
+    try:
+        for line, values in raw_rows:
+            if not any(str(value).strip() for value in values):
+                continue
+            if columns is None:
+                columns = {}
+                for index, name in enumerate(values):
+                    field_name = HEADER_ALIASES.get(re.sub(r'[^a-z0-9]', '', str(name).lower()))
+                    if field_name and field_name not in columns.values():
+                        columns[index] = field_name
+                if 'so_number' not in columns.values():
+                    raise ImportFileError("The header row must include an S/O Number column.")
+                continue
+            yield line, {
+                field_name: str(values[index]).strip() if index < len(values) else ''
+                for index, field_name in columns.items()
+            }
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError(f"Could not read the file: {exc}")
+    if columns is None:
+        raise ImportFileError("The file is empty.")
+
+
+# --- ২. রো যাচাই (ShipmentForm-এর একই ফিল্ড রুল) ---
+class RowValidator:
+    def __init__(self):
+        # প্রতি রো-তে নতুন ফর্ম না বানিয়ে একটি ফর্মের ফিল্ডগুলো দিয়েই clean করা হয়
+        self.fields = ShipmentImportRowForm().fields
+
+    def clean(self, raw):
+        """শুধু ফাইলে থাকা কলামগুলো clean করে; ফাঁকা স্ট্যাটাস সেল মানে কলামটি নেই (স্ট্যাটাস বদলাবে না)।"""
+        raw = dict(raw)
+        status = raw.pop('status', '')
+        if status:
+            raw['status'] = STATUS_LOOKUP.get(status.lower(), status)
+        cleaned, errors = {}, []
+        for name in IMPORT_FIELDS:
+            if name not in raw:
+                continue
+            form_field = self.fields[name]
+            try:
+                cleaned[name] = form_field.clean(raw.get(name, ''))
+            except forms.ValidationError as exc:
+                errors.append(f"{form_field.label}: {' '.join(exc.messages)}")
+        return cleaned, errors
+
+    def missing_for_create(self, values):
+        """নতুন শিপমেন্ট বানাতে যে বাধ্যতামূলক কলামগুলো ফাইলে নেই, সেগুলোর ত্রুটি।"""
+        return [
+            f"{self.fields[name].label}: {self.fields[name].error_messages['required']}"
+            for name in IMPORT_FIELDS
+            if name not in values and name not in NEW_ROW_DEFAULTS and self.fields[name].required
+        ]
+
+
+# --- ৩. ব্যাচে upsert ---
+def _rollup_values(shipment):
+    return {name: getattr(shipment, name) for name in rollups.ROLLUP_FIELDS}
+
+
+def _flush(batch, user, result, validator):
+    """
+    batch: {so_number: (line, cleaned values)} — একটি ট্রানজ্যাকশনে bulk_create + bulk_update। পুরনো
+    শিপমেন্টে শুধু ফাইলে থাকা কলামগুলো লেখা হয়, তাই আংশিক ফাইল বাকি ফিল্ড মুছে দেয় না।
+    """
+    now = timezone.now()
+    # আর্কাইভ করা S/O নতুন করে তৈরি বা আপডেট হয় না — রো-টি ত্রুটি হিসেবে রিপোর্ট হয়
+    for so_number in ArchivedShipment.objects.filter(so_number__in=list(batch)).values_list('so_number', flat=True):
+        line, _ = batch.pop(so_number)
+        result.add_error(line, so_number, ARCHIVED_SO_MESSAGE)
+    existing = {s.so_number: s for s in Shipment.objects.filter(so_number__in=list(batch))}
+    to_create, to_update, rollup_changes, status_changes = [], [], [], []
+    update_fields = set()
+    unchanged = 0
+    for so_number, (line, values) in list(batch.items()):
+        shipment = existing.get(so_number)
+        if shipment is None:
+            errors = validator.missing_for_create(values)
+            if errors:
+                del batch[so_number]
+                result.add_error(line, so_number, '; '.join(errors))
+            else:
+                to_create.append(Shipment(created_by=user, **{**NEW_ROW_DEFAULTS, **values}))
+            continue
+        if all(getattr(shipment, name) == value for name, value in values.items()):
+            unchanged += 1
+            continue
+        previous = _rollup_values(shipment)
+        for name, value in values.items():
+            setattr(shipment, name, value)
+        update_fields.update(values)
+        # bulk_update auto_now চালায় না
+        shipment.updated_at = now
+        to_update.append(shipment)
+        rollup_changes.append((previous, _rollup_values(shipment)))
+        status_changes.append((shipment, previous['status']))
+
+    # bulk অপারেশন সিগন্যাল পাঠায় না — রোলআপ, স্ট্যাটাস হিস্টোরি, সার্চ ইনডেক্স ও ক্যাশ এখানেই আপডেট
+    try:
+        with transaction.atomic():
+            if to_create:
+                Shipment.objects.bulk_create(to_create)
+                rollup_changes.extend((None, _rollup_values(s)) for s in to_create)
+                status_changes.extend((s, None) for s in to_create)
+            if to_update:
+                Shipment.objects.bulk_update(to_update, sorted(update_fields - {'so_number'}) + ['updated_at'])
+            rollups.record_bulk(rollup_changes)
+            history.record_changes(status_changes, user=user, changed_at=now)
+            search.index_shipments(to_create + to_update)
+            changed = [s.pk for s in to_create + to_update]
+            if changed:
+                transaction.on_commit(lambda: caching.invalidate_shipments(changed))
+    except IntegrityError as exc:
+        # সাধারণত একই সময়ে অন্য কেউ একই S/O যোগ করলে; পুরো ব্যাচ বাদ, আবার চালালে ঠিক হবে
+        for so_number, (line, _) in batch.items():
+            result.add_error(line, so_number, f"Batch not saved: {exc}")
+        return
+    result.created += len(to_create)
+    result.updated += len(to_update)
+    result.unchanged += unchanged
+
+
+def import_shipments(fileobj, filename, user=None, batch_size=BATCH_SIZE, dry_run=False, progress=None):
+    """
+    CSV/XLSX থেকে শিপমেন্ট upsert করে (so_number দিয়ে মিলিয়ে)। ভুল রো বাদ দিয়ে বাকিগুলো সেভ হয়;
+    একই ফাইলে একই S/O একাধিকবার থাকলে শেষেরটি থাকে। dry_run হলে সব রোলব্যাক হয়।
+    """
+    result = ImportResult()
+    validator = RowValidator()
+    batch = {}
+    with transaction.atomic() if dry_run else nullcontext():
+        for line, raw in read_rows(fileobj, filename):
+            result.rows += 1
+            values, errors = validator.clean(raw)
+            if errors:
+                result.add_error(line, raw.get('so_number', ''), '; '.join(errors))
+                continue
+            batch[values['so_number']] = (line, values)
+            if len(batch) >= batch_size:
+                _flush(batch, user, result, validator)
+                batch = {}
+                if progress:
+                    progress(result)
+        if batch:
+            _flush(batch, user, result, validator)
+        if dry_run:
+            transaction.set_rollback(True)
+    return result
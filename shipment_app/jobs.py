@@ -0,0 +1,177 @@
+# shipment_app/jobs.py
+
+import logging
+import os
+import socket
+import time
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+RETRY_DELAY = timedelta(seconds=30)
+
+
+def job_handler(name, atomic=True):
+    """
+    একটি ফাংশনকে নির্দিষ্ট নামের জবের হ্যান্ডলার হিসেবে রেজিস্টার করে। atomic=True হলে পুরো হ্যান্ডলার
+    একটি ট্রানজ্যাকশনে চলে; ধীর নেটওয়ার্ক কাজের হ্যান্ডলার atomic=False দিয়ে নিজের ছোট ট্রানজ্যাকশন
+    খোলে — নইলে SQLite-এর write lock (IMMEDIATE মোডে BEGIN-এই নেওয়া হয়) পুরো সময় ধরা থাকত।
+    """
+    def register(func):
+        func.job_atomic = atomic
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, **payload):
+    """
+    জব কিউতে যোগ করে। SHIPMENT_JOBS_INLINE=True হলে (যেমন ওয়ার্কার ছাড়া লোকাল ডেভেলপমেন্টে)
+    ট্রানজ্যাকশন কমিট হওয়ার পর সাথে সাথেই চালানো হয়।
+    """
+    if name not in HANDLERS:
+        raise ValueError(f"Unknown job '{name}'")
+    job = BackgroundJob.objects.create(name=name, payload=payload)
+    if getattr(settings, 'SHIPMENT_JOBS_INLINE', False):
+        transaction.on_commit(lambda: run_claimed(claim(worker_id='inline', job_id=job.pk)))
+    return job
+
+
+def schedule(name, delay, **payload):
+    """
+    delay পরে চলবে এমন জব যোগ করে (পুনরাবৃত্ত রিফ্রেশের জন্য)। একই নাম ও payload-এর জব আগে থেকেই
+    কিউতে থাকলে নতুন করে যোগ হয় না। SHIPMENT_JOBS_INLINE মোডে এখনই চলার কথা এমন জব (delay 0)
+    enqueue-এর মতোই কমিটের পর চালানো হয় — নইলে ওয়ার্কার ছাড়া সেটি কখনো চলত না।
+    """
+    if name not in HANDLERS:
+        raise ValueError(f"Unknown job '{name}'")
+    if BackgroundJob.objects.filter(name=name, status='queued', payload=payload).exists():
+        return None
+    job = BackgroundJob.objects.create(name=name, payload=payload, run_after=timezone.now() + delay)
+    if getattr(settings, 'SHIPMENT_JOBS_INLINE', False) and delay <= timedelta(0):
+        transaction.on_commit(lambda: run_claimed(claim(worker_id='inline', job_id=job.pk)))
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker_id=None, job_id=None):
+    """
+    একটি queued জব এক UPDATE-এ নিজের নামে লক করে। একই জব দুই ওয়ার্কার পাবে না,
+    কারণ status='queued' শর্তটি UPDATE-এর ভেতরেই যাচাই হয়। লক করা জবটি তার id দিয়েই আবার পড়া হয় —
+    inline মোডে সব প্রসেসের worker_id একই ('inline'), তাই locked_by দিয়ে খুঁজলে অন্যের জব পাওয়া যেত।
+    """
+    worker_id = worker_id or worker_name()
+    while True:
+        now = timezone.now()
+        candidates = BackgroundJob.objects.filter(status='queued', run_after__lte=now)
+        if job_id is not None:
+            candidates = candidates.filter(pk=job_id)
+        candidate_id = candidates.order_by('run_after', 'id').values_list('id', flat=True).first()
+        if candidate_id is None:
+            return None
+        claimed = BackgroundJob.objects.filter(pk=candidate_id, status='queued').update(
+            status='running', locked_by=worker_id, started_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(pk=candidate_id)
+        # অন্য ওয়ার্কার আগে নিয়ে নিয়েছে — পরের জব দেখা হয়
+
+
+def run_claimed(job):
+    if job is None:
+        return None
+    handler = HANDLERS[job.name]
+    try:
+        with transaction.atomic() if getattr(handler, 'job_atomic', True) else nullcontext():
+            handler(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()[-4000:]
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        else:
+            job.status = 'queued'
+            job.run_after = timezone.now() + RETRY_DELAY * job.attempts
+        logger.exception("Job %s failed (attempt %s)", job, job.attempts)
+    else:
+        job.status = 'done'
+        job.finished_at = timezone.now()
+        job.last_error = ''
+    job.locked_by = ''
+    job.save(update_fields=['status', 'run_after', 'finished_at', 'last_error', 'locked_by'])
+    return job
+
+
+def requeue_stale(older_than=timedelta(minutes=10)):
+    """ক্র্যাশ করা ওয়ার্কারের আটকে থাকা জব আবার কিউতে পাঠায়।"""
+    return BackgroundJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - older_than,
+    ).update(status='queued', locked_by='')
+
+
+def work(poll_interval=1.0, stop_when_empty=False, worker_id=None):
+    """কিউ থেকে একটার পর একটা জব চালায়; কিউ খালি থাকলে poll_interval অপেক্ষা করে।"""
+    worker_id = worker_id or worker_name()
+    processed = 0
+    while True:
+        job = claim(worker_id)
+        if job is None:
+            if stop_when_empty:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        run_claimed(job)
+        processed += 1
+
+
+# --- জব হ্যান্ডলার ---
+@job_handler('process_shipment_files')
+def process_shipment_files(file_ids):
+    from .documents import process_shipment_file
+    from .models import ShipmentFile
+
+    for shipment_file in ShipmentFile.objects.filter(pk__in=file_ids, processed_at__isnull=True):
+        process_shipment_file(shipment_file)
+
+
+@job_handler('build_transit_stats')
+def build_transit_stats(full=False):
+    from .history import build_transit_stats as build
+
+    build(full=full)
+
+
+@job_handler('build_reports', atomic=False)
+def build_reports(full=False, every_minutes=None):
+    from .reports import build_reports as build
+
+    # পরের রানটি আগেই নিজের ট্রানজ্যাকশনে কমিট হয়, তাই এই রান ফেল করে রোলব্যাক হলেও নির্ধারিত রিফ্রেশ
+    # থেমে যায় না
+    if every_minutes:
+        schedule('build_reports', timedelta(minutes=every_minutes), every_minutes=every_minutes)
+    with transaction.atomic():
+        build(full=full)
+
+
+@job_handler('refresh_finance_sheets', atomic=False)
+def refresh_finance_sheets(account_ids=None, every_minutes=None):
+    from .finance import refresh_accounts
+
+    # ট্রানজ্যাকশনের বাইরে চলে: পরের রানটি সাথে সাথে কমিট হয় (এই রান ফেল করলেও থাকে), আর শিট আনার
+    # পুরো সময় কোনো write lock ধরা থাকে না
+    if every_minutes:
+        schedule('refresh_finance_sheets', timedelta(minutes=every_minutes), every_minutes=every_minutes)
+    refresh_accounts(account_ids)
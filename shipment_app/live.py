@@ -0,0 +1,208 @@
+# shipment_app/live.py
+
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+
+from .models import Shipment, ShipmentStatusEvent
+
+logger = logging.getLogger(__name__)
+
+STATUS_LABELS = dict(Shipment.STATUS_CHOICES)
+EVENT_FIELDS = (
+    'id', 'shipment_id', 'from_status', 'to_status', 'changed_at', 'changed_by__username',
+    'shipment__so_number', 'shipment__lc_number', 'shipment__total_ctn', 'shipment__total_kg',
+    'shipment__created_by__username',
+)
+RELOAD_FRAME = "event: reload\ndata: {}\n\n"
+
+
+# --- ১. চেঞ্জ ফিড: ShipmentStatusEvent (append-only) এর id-ই কার্সর ---
+def events_after(cursor, limit=None):
+    """cursor-এর পরের ইভেন্টগুলো (PK রেঞ্জ, তাই প্রতিবার শুধু নতুন রো পড়া হয়)।"""
+    rows = (
+        ShipmentStatusEvent.objects.filter(id__gt=cursor).order_by('id')
+        .values(*EVENT_FIELDS)[:limit or settings.LIVE_FEED_BATCH]
+    )
+    return [serialize(row) for row in rows]
+
+
+def latest_event_id():
+    # MAX(id) — SQLite min/max অপটিমাইজেশনে একটিই রো পড়ে
+    return ShipmentStatusEvent.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+
+def serialize(row):
+    return {
+        'id': row['id'],
+        'shipment_id': row['shipment_id'],
+        'kind': 'created' if not row['from_status'] else 'status',
+        'from_status': row['from_status'],
+        'status': row['to_status'],
+        'status_label': STATUS_LABELS.get(row['to_status'], row['to_status']),
+        'changed_at': row['changed_at'].isoformat(),
+        'changed_by': row['changed_by__username'] or '',
+        'so_number': row['shipment__so_number'],
+        'lc_number': row['shipment__lc_number'] or '',
+        'total_ctn': row['shipment__total_ctn'],
+        'total_kg': float(row['shipment__total_kg']),
+        'created_by': row['shipment__created_by__username'] or '',
+    }
+
+
+def format_event(event):
+    """SSE ফ্রেম; id দেওয়া থাকে বলে ব্রাউজার রিকানেক্টে Last-Event-ID পাঠিয়ে ঠিক সেখান থেকে শুরু করে।"""
+    return f"id: {event['id']}\nevent: shipment\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.LIVE_FEED_QUEUE_SIZE)
+        self.overflowed = False
+        # ব্যাকলগ পাঠানোর পর ক্লায়েন্ট কোথায় আছে; নতুন চালু হওয়া ফিড এখান থেকে শুরু করে
+        self.since = None
+
+    def offer(self, events):
+        # ইভেন্ট লুপের ভেতরে চলে (call_soon_threadsafe); ধীর ক্লায়েন্টের জন্য পোলার আটকে থাকে না
+        try:
+            self.queue.put_nowait(events)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeFeed:
+    """
+    প্রতি প্রসেসে একটি পোলিং থ্রেড: প্রতি টিকে একটিই কুয়েরি (id > cursor), ফল সব সাবস্ক্রাইবারের
+    কিউতে পাঠানো হয়। হাজার জন ড্যাশবোর্ড খোলা রাখলেও খরচ টিকপ্রতি এক কুয়েরি; কেউ না থাকলে থ্রেড থেমে যায়।
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self.cursor = None
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='shipment-change-feed', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def poll(self):
+        """একটি টিক: নতুন ইভেন্ট পড়ে সব সাবস্ক্রাইবারকে দেয়। রিটার্ন: কয়টি ইভেন্ট।"""
+        if self.cursor is None:
+            # থ্রেড সবে চালু হয়েছে: "সর্বশেষ id" নিলে সাবস্ক্রাইবারের ব্যাকলগ আর এর মাঝের ইভেন্ট হারাত
+            with self._lock:
+                starts = [sub.since for sub in self._subscribers if sub.since is not None]
+            if not starts:
+                return 0
+            self.cursor = min(starts)
+        events = events_after(self.cursor)
+        if events:
+            self.cursor = events[-1]['id']
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscription in subscribers:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.offer, events)
+                except RuntimeError:  # লুপ বন্ধ হয়ে গেছে
+                    self.unsubscribe(subscription)
+        return len(events)
+
+    def _run(self):
+        stop = threading.Event()
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        self.cursor = None
+                        return
+                try:
+                    self.poll()
+                except Exception:
+                    logger.exception("Shipment change feed poll failed")
+                finally:
+                    close_old_connections()
+                stop.wait(settings.LIVE_FEED_INTERVAL)
+        finally:
+            close_old_connections()
+
+
+feed = ChangeFeed()
+
+
+# --- ২. একটি SSE কানেকশনের স্ট্রিম ---
+async def stream(cursor):
+    """
+    আগে কার্সরের পরের ব্যাকলগ (একবার কুয়েরি), তারপর শেয়ার করা ফিড থেকে লাইভ ইভেন্ট। LIVE_FEED_MAX_SECONDS
+    পরে স্ট্রিম শেষ হয়; ব্রাউজার Last-Event-ID দিয়ে আবার যুক্ত হয়, তাই কিছু হারায় না।
+    """
+    from asgiref.sync import sync_to_async
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_FEED_MAX_SECONDS
+    # আগে সাবস্ক্রাইব, তারপর ব্যাকলগ — মাঝখানে আসা ইভেন্ট দুই জায়গাতেই থাকলে id দেখে একবারই পাঠানো হয়
+    subscription = feed.subscribe()
+    try:
+        yield f"retry: {settings.LIVE_FEED_RETRY_MS}\n\n"
+        if cursor is None:
+            cursor = await sync_to_async(latest_event_id)()
+        backlog = await sync_to_async(events_after)(cursor)
+        if len(backlog) >= settings.LIVE_FEED_BATCH:
+            yield RELOAD_FRAME  # এত পিছিয়ে থাকলে পুরো পেজ নতুন করে আনাই সস্তা
+            return
+        for event in backlog:
+            cursor = event['id']
+            yield format_event(event)
+        subscription.since = cursor
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                events = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=min(remaining, settings.LIVE_FEED_HEARTBEAT),
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"  # প্রক্সি যাতে অলস কানেকশন বন্ধ না করে
+                continue
+            for event in events:
+                if event['id'] > cursor:
+                    cursor = event['id']
+                    yield format_event(event)
+            if subscription.overflowed:
+                # অনেক পিছিয়ে পড়েছে; এখন বন্ধ করলে রিকানেক্টে ব্যাকলগ থেকে বাকিগুলো আসবে
+                return
+    finally:
+        feed.unsubscribe(subscription)
+
+
+def backlog_response_body(cursor):
+    """ASGI ছাড়া (WSGI) স্ট্রিম ধরে রাখা যায় না: শুধু ব্যাকলগ পাঠিয়ে শেষ, ব্রাউজার retry পরে আবার আসে।"""
+    if cursor is None:
+        cursor = latest_event_id()
+    events = events_after(cursor)
+    if len(events) >= settings.LIVE_FEED_BATCH:
+        return f"retry: {settings.LIVE_FEED_RETRY_MS}\n\n{RELOAD_FRAME}"
+    frames = [f"retry: {settings.LIVE_FEED_RETRY_MS}\n\n"] + [format_event(event) for event in events]
+    if not events:
+        # Last-Event-ID যেন হারিয়ে না যায়: খালি উত্তরেও বর্তমান কার্সর
+        frames.append(f"id: {cursor}\n\n")
+    return ''.join(frames)
+
+
+def parse_cursor(request):
+    """Last-Event-ID হেডার (রিকানেক্ট), না থাকলে ?after= (পেজ রেন্ডারের সময়ের শেষ ইভেন্ট)।"""
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('after') or ''
+    return int(raw) if raw.isdigit() else None
@@ -0,0 +1,39 @@
+# shipment_app/management/commands/archive_shipments.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shipment_app import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move arrived shipments older than --older-than days (with their file rows and status history) "
+        "into the archive tables in batches; search and detail pages still find them (run from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, metavar='DAYS',
+                            help="Archive arrived shipments created and last changed more than DAYS ago "
+                                 "(default: ARCHIVE_AFTER_DAYS).")
+        parser.add_argument('--batch-size', type=int, help="Shipments per transaction (default: ARCHIVE_BATCH_SIZE).")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived.")
+
+    def handle(self, *args, older_than=None, batch_size=None, dry_run=False, **options):
+        days = settings.ARCHIVE_AFTER_DAYS if older_than is None else older_than
+        if days < 1:
+            raise CommandError("--older-than must be at least 1 day.")
+        if batch_size is not None and batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        if dry_run:
+            count = archive.candidates(timedelta(days=days)).count()
+            self.stdout.write(f"[dry run] {count} arrived shipments older than {days} days would be archived.")
+            return
+        result = archive.archive_shipments(timedelta(days=days), batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result.shipments} shipments ({result.files} files, {result.events} status events) "
+            f"in {result.batches} batches."
+        ))
@@ -0,0 +1,27 @@
+# shipment_app/management/commands/backfill_rollups.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shipment_app import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild ShipmentDailyRollup from the Shipment table, or verify it with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Only compare rollups with raw data.")
+
+    def handle(self, *args, verify=False, **options):
+        if verify:
+            mismatches = rollups.find_mismatches()
+            for (day, status, user_id), expected, actual in mismatches:
+                self.stdout.write(
+                    f"{day} {status} user={user_id}: expected kg/ctn/count={expected}, stored={actual}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} rollup rows differ; run backfill_rollups to fix.")
+            self.stdout.write(self.style.SUCCESS("Rollups match raw shipment data."))
+            return
+
+        count = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup rows."))
@@ -0,0 +1,140 @@
+# shipment_app/management/commands/bench_page_weight.py
+
+import gzip
+import json
+import random
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from shipment_app import seeding
+from shipment_app.models import CustomerAccount, Shipment
+
+STYLE_ATTR_RE = re.compile(rb'\sstyle="')
+HANDLER_ATTR_RE = re.compile(rb'\son[a-z]+="')
+STYLE_BLOCK_RE = re.compile(rb'<style\b.*?</style>', re.S)
+STATIC_REF_RE = re.compile(rb'(?:href|src)="([^"]+\.(?:css|js))"')
+
+
+class Rollback(Exception):
+    pass
+
+
+def page_targets():
+    """লেবেল -> URL; HTML পেজগুলোই (CSV/API/প্রিভিউ নয়)।"""
+    shipment = Shipment.objects.order_by('-created_at').first()
+    account = CustomerAccount.objects.order_by('name').first()
+    return {
+        'dashboard': reverse('dashboard'),
+        'shipment_detail': reverse('shipment_detail', args=[shipment.pk]),
+        'account_list': reverse('account_list'),
+        'account_detail': reverse('account_detail', args=[account.pk]),
+        'search': reverse('search_shipment') + '?q=SEED',
+        'add_shipment': reverse('add_shipment'),
+        'transit_analytics': reverse('transit_analytics'),
+    }
+
+
+def gzip_size(data):
+    return len(gzip.compress(data, compresslevel=6))
+
+
+def static_asset(url):
+    """STATIC_URL-এর নিচের বান্ডল: ফাইন্ডার থেকে আসল ফাইল (হ্যাশ করা নাম থাকলে হ্যাশ বাদ দিয়ে)।"""
+    prefix = '/' + settings.STATIC_URL.lstrip('/')
+    if not url.startswith(prefix):
+        return None
+    name = re.sub(r'\.[0-9a-f]{12}(\.\w+)$', r'\1', url[len(prefix):])
+    path = finders.find(name)
+    if not path:
+        return None
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    return {'bytes': len(data), 'gzip_bytes': gzip_size(data)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every HTML page (inside a rolled-back transaction with seeded data) and report the HTML "
+        "size raw and gzipped, inline style/handler counts and the local static bundles each page loads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help="Shipments seeded before measuring.")
+        parser.add_argument('--output', required=True, help="Write results as JSON here.")
+        parser.add_argument('--compare', help="Earlier JSON output to show the per-page byte reduction against.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        pages, assets = {}, {}
+        try:
+            # seed করা ফাইল ও ক্যাশ এন্ট্রি টেম্প জায়গায় — রোলব্যাকের পর কিছু থেকে যায় না
+            with seeding.scratch_storage(), transaction.atomic():
+                self.run(pages, assets, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        report = {'generated_at': timezone.now().isoformat(), 'rows': options['rows'], 'pages': pages, 'assets': assets}
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def run(self, pages, assets, options):
+        users = seeding.seed_users(4)
+        seeding.seed_accounts(20)
+        seeding.seed_shipments(options['rows'], users, files_per_shipment=1, rng=random.Random(options['seed']))
+        client = Client()
+        client.force_login(next(u for u in users if u.role == 'admin'))
+
+        self.stdout.write(f"{'page':<20}{'html B':>10}{'gzip B':>9}{'style=':>8}{'on*=':>6}{'<style> B':>11}")
+        for label, url in page_targets().items():
+            client.get(url)  # প্রথমবার ফ্র্যাগমেন্ট ক্যাশ ভরে; মাপা হয় সাধারণ (ক্যাশড) রেসপন্স
+            body = client.get(url).content
+            refs = sorted({ref.decode() for ref in STATIC_REF_RE.findall(body)})
+            for ref in refs:
+                if ref not in assets:
+                    assets[ref] = static_asset(ref)
+            pages[label] = {
+                'bytes': len(body),
+                'gzip_bytes': gzip_size(body),
+                'style_attrs': len(STYLE_ATTR_RE.findall(body)),
+                'handler_attrs': len(HANDLER_ATTR_RE.findall(body)),
+                'style_block_bytes': sum(len(block) for block in STYLE_BLOCK_RE.findall(body)),
+                'static_refs': refs,
+            }
+            r = pages[label]
+            self.stdout.write(
+                f"{label:<20}{r['bytes']:>10}{r['gzip_bytes']:>9}{r['style_attrs']:>8}"
+                f"{r['handler_attrs']:>6}{r['style_block_bytes']:>11}"
+            )
+
+        local = {ref: size for ref, size in assets.items() if size}
+        if local:
+            self.stdout.write(f"\n{'static bundle':<50}{'bytes':>9}{'gzip B':>9}")
+            for ref, size in sorted(local.items()):
+                self.stdout.write(f"{ref:<50}{size['bytes']:>9}{size['gzip_bytes']:>9}")
+
+    def compare(self, report, baseline_path):
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)
+        self.stdout.write(f"\n{'page':<20}{'html B before':>15}{'after':>9}{'saved':>8}{'gzip before':>13}{'after':>8}")
+        for label, current in report['pages'].items():
+            previous = baseline.get('pages', {}).get(label)
+            if not previous:
+                continue
+            saved = 100 * (previous['bytes'] - current['bytes']) / previous['bytes']
+            self.stdout.write(
+                f"{label:<20}{previous['bytes']:>15}{current['bytes']:>9}{saved:>7.0f}%"
+                f"{previous['gzip_bytes']:>13}{current['gzip_bytes']:>8}"
+            )
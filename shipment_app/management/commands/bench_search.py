@@ -0,0 +1,100 @@
+# shipment_app/management/commands/bench_search.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from shipment_app import search
+from shipment_app.models import Shipment
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_search(query):
+    # পুরনো search_shipment-এর কুয়েরি (তুলনার জন্য)
+    return Shipment.objects.filter(
+        Q(so_number__icontains=query) |
+        Q(lc_number__icontains=query) |
+        Q(status__icontains=query) |
+        Q(total_ctn__icontains=query) |
+        Q(total_kg__icontains=query)
+    ).distinct().order_by('-created_at')
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N synthetic shipments inside a transaction, time legacy vs indexed search, "
+        "then roll everything back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=25)
+        parser.add_argument('--skip-legacy', action='store_true', help="Don't time the old icontains query.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Rolled back benchmark data.")
+
+    def seed(self, rows):
+        statuses = [key for key, _ in Shipment.STATUS_CHOICES]
+        batch = []
+        for i in range(rows):
+            batch.append(Shipment(
+                so_number=f"BENCH-SO-{i:07d}",
+                lc_number=f"LC{random.randint(100000, 999999)}" if i % 3 else None,
+                total_ctn=random.randint(1, 400),
+                total_kg=round(random.uniform(5, 5000), 2),
+                status=random.choice(statuses),
+            ))
+            if len(batch) == 10_000:
+                Shipment.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Shipment.objects.bulk_create(batch)
+
+    def time_query(self, build, repeat, page_size):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(build()[:page_size])
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+    def run(self, rows, repeat, page_size, skip_legacy, **options):
+        started = time.perf_counter()
+        self.seed(rows)
+        self.stdout.write(f"Seeded {rows} shipments in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        search.rebuild_index()
+        self.stdout.write(f"Rebuilt search index in {time.perf_counter() - started:.1f}s")
+
+        queries = [
+            f"BENCH-SO-{rows // 2:07d}",
+            "SO-00042",
+            f"LC{random.randint(100000, 999999)}",
+            "status:fly kg:>2500",
+            "so:BENCH-SO-0001",
+        ]
+        self.stdout.write(f"{'query':<32}{'legacy p50/p95 ms':>22}{'indexed p50/p95 ms':>22}")
+        for query in queries:
+            indexed = self.time_query(lambda: search.search_shipments(query), repeat, page_size)
+            if skip_legacy or ':' in query:
+                legacy_text = '-'
+            else:
+                legacy = self.time_query(lambda: legacy_search(query), repeat, page_size)
+                legacy_text = f"{legacy[0]:.2f}/{legacy[1]:.2f}"
+            self.stdout.write(f"{query:<32}{legacy_text:>22}{indexed[0]:>12.2f}/{indexed[1]:.2f}")
@@ -0,0 +1,188 @@
+# shipment_app/management/commands/bench_views.py
+
+import json
+import math
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from shipment_app import seeding
+from shipment_app.models import CustomerAccount, Shipment, ShipmentFile
+from shipment_app.urls import urlpatterns
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def bench_targets():
+    """
+    url name -> (method, URL, params, iterations) এর তালিকা। urls.py-তে নতুন URL যোগ হলে
+    এখানে না থাকলে রিপোর্টে "not benchmarked" হিসেবে দেখাবে।
+    """
+    shipment = Shipment.objects.order_by('-created_at').first()
+    shipment_file = ShipmentFile.objects.order_by('-id').first()
+    account = CustomerAccount.objects.order_by('name').first()
+    month_ago = timezone.localdate() - timedelta(days=30)
+    targets = {
+        'login': [('login', reverse('login'), None, None)],
+        'dashboard': [('dashboard', reverse('dashboard'), None, None)],
+        'add_shipment': [('add_shipment', reverse('add_shipment'), None, None)],
+        'search_shipment': [
+            ('search:so', reverse('search_shipment'), {'q': shipment.so_number if shipment else 'SEED'}, None),
+            ('search:typed', reverse('search_shipment'), {'q': 'status:fly kg:>100'}, None),
+            ('search:page5', reverse('search_shipment'), {'q': 'SEED', 'page': 5}, None),
+        ],
+        'download_report_csv': [
+            ('report:30d', reverse('download_report_csv'), {'start_date': month_ago}, 3),
+            ('report:all', reverse('download_report_csv'), None, 1),
+        ],
+        'shipment_list_api': [
+            ('api:first', reverse('shipment_list_api'), None, None),
+            ('api:status', reverse('shipment_list_api'), {'status': 'pending', 'limit': 100}, None),
+        ],
+        'account_list': [('account_list', reverse('account_list'), None, None)],
+    }
+    if shipment:
+        targets['shipment_detail'] = [('shipment_detail', reverse('shipment_detail', args=[shipment.pk]), None, None)]
+    if shipment_file:
+        targets['file_preview'] = [
+            ('file_preview', reverse('file_preview', args=[shipment_file.pk, 'sm']), None, None),
+        ]
+    if account:
+        targets['account_detail'] = [('account_detail', reverse('account_detail', args=[account.pk]), None, None)]
+    return targets
+
+
+def run_request(client, url, params):
+    response = client.get(url, params)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed data at several scales (inside a rolled-back transaction, with files and caches in a temp dir) "
+        "and report p50/p95/p99 latency, query counts and peak memory for every URL via the Django test client."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[1000],
+                            help="Shipment counts to test, e.g. --scales 1000 100000 1000000")
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--output', default='bench_baseline.json', help="Write results as JSON here.")
+        parser.add_argument('--compare', help="Baseline JSON to compare against; exits non-zero on regressions.")
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help="Allowed p95 slowdown factor before a regression is reported.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        results = {}
+        try:
+            # seed করা ফাইল, প্রিভিউ ও ক্যাশ এন্ট্রি টেম্প জায়গায় — রোলব্যাকের পর কিছু থেকে যায় না
+            with seeding.scratch_storage(), transaction.atomic():
+                self.run(results, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'iterations': options['iterations'],
+            'scales': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        if options['compare']:
+            self.compare(report, options['compare'], options['tolerance'])
+
+    def run(self, results, options):
+        rng = random.Random(options['seed'])
+        users = seeding.seed_users(4)
+        seeding.seed_accounts(50)
+        admin = next(u for u in users if u.role == 'admin')
+        client = Client()
+        client.force_login(admin)
+
+        seeded = 0
+        for scale in sorted(options['scales']):
+            started = time.perf_counter()
+            seeding.seed_shipments(scale - seeded, users, rng=rng)
+            seeded = scale
+            self.stdout.write(f"\n== {scale} shipments (seeded in {time.perf_counter() - started:.1f}s) ==")
+            self.stdout.write(f"{'target':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KB':>10}")
+
+            targets = bench_targets()
+            scale_results = results[str(scale)] = {}
+            for name in sorted(p.name for p in urlpatterns if p.name and p.name not in targets):
+                self.stdout.write(f"{name:<20}  not benchmarked")
+            for _, cases in sorted(targets.items()):
+                for label, url, params, iterations in cases:
+                    scale_results[label] = self.measure(client, url, params, iterations or options['iterations'])
+                    r = scale_results[label]
+                    self.stdout.write(
+                        f"{label:<20}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                        f"{r['queries']:>9}{r['peak_kb']:>10.0f}"
+                    )
+
+    def measure(self, client, url, params, iterations):
+        run_request(client, url, params)  # ওয়ার্ম-আপ
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = run_request(client, url, params)
+            samples.append((time.perf_counter() - started) * 1000)
+
+        # কুয়েরি ও মেমরি আলাদা একবার মাপা হয় (tracemalloc লেটেন্সি বাড়িয়ে দেয়)
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as ctx:
+            run_request(client, url, params)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'status': response.status_code,
+            'p50_ms': round(percentile(samples, 50), 3),
+            'p95_ms': round(percentile(samples, 95), 3),
+            'p99_ms': round(percentile(samples, 99), 3),
+            'queries': len(ctx.captured_queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def compare(self, report, baseline_path, tolerance):
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)
+        regressions = []
+        for scale, targets in report['scales'].items():
+            for label, current in targets.items():
+                previous = baseline.get('scales', {}).get(scale, {}).get(label)
+                if not previous:
+                    continue
+                if current['p95_ms'] > previous['p95_ms'] * tolerance:
+                    regressions.append(f"{scale}/{label}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+                if current['queries'] > previous['queries']:
+                    regressions.append(f"{scale}/{label}: queries {previous['queries']} -> {current['queries']}")
+        for line in regressions:
+            self.stderr.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}"))
@@ -0,0 +1,31 @@
+# shipment_app/management/commands/build_reports.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shipment_app import jobs, reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the weekly/monthly report tables from daily rollups that changed since the last build "
+        "(run from cron, or pass --every to keep a repeating job in the run_workers queue)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Rebuild every period instead of only changed ones.")
+        parser.add_argument('--every', type=int, metavar='MINUTES',
+                            help="Also queue a build_reports job that re-queues itself every MINUTES.")
+
+    def handle(self, *args, full=False, every=None, **options):
+        if every is not None and every < 1:
+            raise CommandError("--every must be at least 1 minute.")
+        days = reports.build_reports(full=full)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt weekly/monthly reports for {days} changed days."))
+        if every:
+            job = jobs.schedule('build_reports', timedelta(minutes=every), every_minutes=every)
+            if job:
+                self.stdout.write(f"Queued a refresh every {every} minutes (first at {job.run_after:%H:%M}).")
+            else:
+                self.stdout.write(f"A refresh every {every} minutes is already queued.")
@@ -0,0 +1,16 @@
+# shipment_app/management/commands/build_transit_stats.py
+
+from django.core.management.base import BaseCommand
+
+from shipment_app import history
+
+
+class Command(BaseCommand):
+    help = "Update the transit-time summary table from new shipment status events (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute everything instead of only new events.")
+
+    def handle(self, *args, full=False, **options):
+        count = history.build_transit_stats(full=full)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {count} weeks/creators."))
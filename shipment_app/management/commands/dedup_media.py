@@ -0,0 +1,121 @@
+# shipment_app/management/commands/dedup_media.py
+
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from shipment_app.models import ShipmentFile
+from shipment_app.storage import BLOB_DIR, blob_name, document_storage, hash_file
+
+
+def file_fields():
+    """সব মডেলের সব FileField/ImageField — (model, [field, ...])।"""
+    for model in apps.get_models():
+        fields = [field for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+        if fields:
+            yield model, fields
+
+
+def referenced_names():
+    """ডাটাবেসে কোনো না কোনো ফাইল ফিল্ডে থাকা প্রতিটি নাম (মূল ফাইল, আর্কাইভ সহ)।"""
+    referenced = set()
+    for model, fields in file_fields():
+        for names in model._base_manager.values_list(*[field.attname for field in fields]).iterator(chunk_size=2000):
+            referenced.update(name for name in names if name)
+    return referenced
+
+
+def owned_directories():
+    """
+    ডকুমেন্ট স্টোরেজের নিজস্ব ডিরেক্টরি: blobs/ আর ডকুমেন্ট ফিল্ডগুলোর upload_to (dedup-এর আগের পুরনো
+    ফাইল)। MEDIA_ROOT-এর বাকি অংশ অন্য কারো, সেখানে orphan খোঁজা হয় না।
+    """
+    directories = {BLOB_DIR}
+    for _, fields in file_fields():
+        for field in fields:
+            if field.storage is document_storage and isinstance(field.upload_to, str) and field.upload_to:
+                directories.add(field.upload_to.strip('/').split('/')[0])
+    return sorted(directories)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every ShipmentFile into content-addressed blob storage, collapsing "
+        "byte-identical copies, and report (or delete) unreferenced files in the document storage directories."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change.")
+        parser.add_argument('--delete-orphans', action='store_true',
+                            help="Delete unreferenced files in the document storage directories.")
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help="Leave files younger than this alone: an upload saves its blob before "
+                                 "the row that references it is written (default 60).")
+
+    def handle(self, *args, dry_run=False, delete_orphans=False, grace_minutes=60, **options):
+        if grace_minutes < 0:
+            raise CommandError("--grace-minutes cannot be negative.")
+        media_root = str(settings.MEDIA_ROOT)
+        moved = missing = 0
+        saved_bytes = 0
+        seen_blobs = set()
+        renamed = {}
+
+        for shipment_file in ShipmentFile.objects.only('pk', 'uploaded_file').iterator(chunk_size=500):
+            name = shipment_file.uploaded_file.name
+            if not name or name.startswith(f"{BLOB_DIR}/") or name in renamed:
+                seen_blobs.add(renamed.get(name, name))
+                continue
+            path = os.path.join(media_root, name)
+            if not os.path.exists(path):
+                missing += 1
+                self.stderr.write(f"Missing file for ShipmentFile #{shipment_file.pk}: {name}")
+                continue
+
+            if dry_run:
+                new_name = blob_name(hash_file(path), path)
+                if new_name in seen_blobs or os.path.exists(os.path.join(media_root, new_name)):
+                    saved_bytes += os.path.getsize(path)
+            else:
+                # একই নামের সব রো একসাথে আপডেট হয়, renamed দিয়ে পরে সেগুলো বাদ দেওয়া হয়
+                new_name, freed = document_storage.adopt(path)
+                saved_bytes += freed
+                with transaction.atomic():
+                    ShipmentFile.objects.filter(uploaded_file=name).update(uploaded_file=new_name)
+            renamed[name] = new_name
+            seen_blobs.add(new_name)
+            moved += 1
+
+        # রেফারেন্স পড়ার আগের সময় থেকে গ্রেস পিরিয়ড — এর পরে লেখা ফাইলের রো হয়তো এখনো তৈরি হয়নি
+        cutoff = time.time() - grace_minutes * 60
+        referenced = set(seen_blobs) | referenced_names()
+        orphan_count = orphan_bytes = 0
+        for top in owned_directories():
+            for directory, _, filenames in os.walk(os.path.join(media_root, top)):
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    name = os.path.relpath(path, media_root).replace(os.sep, '/')
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if name in referenced or stat.st_mtime > cutoff:
+                        continue
+                    orphan_count += 1
+                    orphan_bytes += stat.st_size
+                    if delete_orphans and not dry_run:
+                        os.remove(path)
+                    else:
+                        self.stdout.write(f"Unreferenced: {name}")
+
+        prefix = "[dry run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{moved} files moved to blob storage, {saved_bytes} duplicate bytes freed, "
+            f"{missing} missing."
+        ))
+        action = "deleted" if delete_orphans and not dry_run else "found"
+        self.stdout.write(f"{prefix}{orphan_count} unreferenced files ({orphan_bytes} bytes) {action}.")
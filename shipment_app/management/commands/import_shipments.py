@@ -0,0 +1,54 @@
+# shipment_app/management/commands/import_shipments.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shipment_app import imports
+from shipment_app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Add or update shipments (matched by S/O Number) from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .csv or .xlsx file.")
+        parser.add_argument('--user', help="Username recorded as creator of new shipments.")
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate and count only; nothing is saved.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = CustomUser.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}.")
+
+        def progress(result):
+            self.stdout.write(f"  {result.rows} rows", ending='\r')
+            self.stdout.flush()
+
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as fh:
+                result = imports.import_shipments(
+                    fh, options['path'], user=user, batch_size=options['batch_size'],
+                    dry_run=options['dry_run'], progress=progress,
+                )
+        except (OSError, imports.ImportFileError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write('')
+        for error in result.errors:
+            self.stderr.write(f"line {error.line} [{error.so_number or '-'}]: {error.message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... and {result.error_count - len(result.errors)} more errors")
+        summary = (
+            f"{result.rows} rows in {elapsed:.1f}s ({result.rows / max(elapsed, 1e-9):.0f}/s): "
+            f"{result.created} added, {result.updated} updated, {result.unchanged} unchanged, "
+            f"{result.error_count} errors"
+        )
+        if options['dry_run']:
+            summary += " (dry run, nothing saved)"
+        self.stdout.write(self.style.WARNING(summary) if result.error_count else self.style.SUCCESS(summary))
@@ -0,0 +1,16 @@
+# shipment_app/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+
+from shipment_app import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the shipment full-text search index from the Shipment and ArchivedShipment tables."
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write(self.style.WARNING("Search index is only used on SQLite; nothing to do."))
+            return
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} shipments."))
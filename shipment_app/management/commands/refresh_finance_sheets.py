@@ -0,0 +1,35 @@
+# shipment_app/management/commands/refresh_finance_sheets.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shipment_app import finance, jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch every customer's finance sheet as CSV (conditional requests, so unchanged sheets are cheap) "
+        "into the cache; pass --every to keep a repeating job in the run_workers queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account', type=int, action='append', dest='accounts', metavar='PK',
+                            help="Only this CustomerAccount (repeatable).")
+        parser.add_argument('--every', type=int, metavar='MINUTES',
+                            help="Also queue a refresh_finance_sheets job that re-queues itself every MINUTES.")
+
+    def handle(self, *args, accounts=None, every=None, **options):
+        if every is not None and every < 1:
+            raise CommandError("--every must be at least 1 minute.")
+        counts = finance.refresh_accounts(accounts)
+        self.stdout.write(self.style.SUCCESS(
+            f"Finance sheets: {counts['updated']} updated, {counts['not_modified']} not modified, "
+            f"{counts['error']} failed."
+        ))
+        if every:
+            job = jobs.schedule('refresh_finance_sheets', timedelta(minutes=every), every_minutes=every)
+            if job:
+                self.stdout.write(f"Queued a refresh every {every} minutes (first at {job.run_after:%H:%M}).")
+            else:
+                self.stdout.write(f"A refresh every {every} minutes is already queued.")
@@ -0,0 +1,55 @@
+# shipment_app/management/commands/run_workers.py
+
+import multiprocessing
+import signal
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from shipment_app import jobs
+
+
+def worker_main(index, poll_interval, stop_when_empty):
+    # প্যারেন্ট প্রসেসের ডাটাবেস কানেকশন শেয়ার করা যাবে না
+    connections.close_all()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.work(poll_interval=poll_interval, stop_when_empty=stop_when_empty,
+              worker_id=f"{jobs.worker_name()}#{index}")
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (file metadata, reports, finance sheets) from the BackgroundJob queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit.")
+        parser.add_argument('--stale-minutes', type=int, default=10,
+                            help="Requeue jobs left 'running' longer than this (crashed workers).")
+
+    def handle(self, *args, processes, poll_interval, once, stale_minutes, **options):
+        requeued = jobs.requeue_stale(timedelta(minutes=stale_minutes))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        if processes <= 1:
+            processed = jobs.work(poll_interval=poll_interval, stop_when_empty=once)
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs."))
+            return
+
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=worker_main, args=(index, poll_interval, once), daemon=True)
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {processes} workers.")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
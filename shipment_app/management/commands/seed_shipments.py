@@ -0,0 +1,50 @@
+# shipment_app/management/commands/seed_shipments.py
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from shipment_app import seeding
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate realistic shipments, files, users and customer accounts for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help="Number of shipments to add.")
+        parser.add_argument('--users', type=int, default=8)
+        parser.add_argument('--accounts', type=int, default=50)
+        parser.add_argument('--days', type=int, default=365, help="Spread created_at over this many days.")
+        parser.add_argument('--files-per-shipment', type=int, default=3, help="Maximum files per shipment.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for repeatable data.")
+        parser.add_argument('--delete', action='store_true', help="Remove previously seeded data instead.")
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            seeding.delete_seed_data()
+            self.stdout.write(self.style.SUCCESS("Seed data removed."))
+            return
+
+        started = time.perf_counter()
+        users = seeding.seed_users(options['users'])
+        seeding.seed_accounts(options['accounts'])
+
+        def progress(done):
+            self.stdout.write(f"  {done}/{options['count']} shipments", ending='\r')
+            self.stdout.flush()
+
+        count = seeding.seed_shipments(
+            options['count'], users,
+            days=options['days'],
+            files_per_shipment=options['files_per_shipment'],
+            batch_size=options['batch_size'],
+            rng=random.Random(options['seed']),
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {count} shipments in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f}/s)."
+        ))
@@ -0,0 +1,167 @@
+# shipment_app/media.py
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe
+
+from .storage import BLOB_DIR
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOB_MAX_AGE = 7 * 24 * 60 * 60
+FILE_MAX_AGE = 60 * 60
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+# --- ১. ETag ও কন্ডিশনাল হেডার ---
+def file_etag(name, stat):
+    """blob-এর নামই SHA-256, তাই সেটাই strong ETag; অন্য ফাইলে mtime ও সাইজ থেকে।"""
+    if name.startswith(f"{BLOB_DIR}/"):
+        return f'"{os.path.splitext(os.path.basename(name))[0]}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def not_modified(request, etag, mtime):
+    """If-None-Match থাকলে শুধু সেটাই দেখা হয় (RFC 9110), না থাকলে If-Modified-Since।"""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def range_applies(request, etag, mtime):
+    """If-Range মিললে (বা না থাকলে) Range মানা হয়; ফাইল বদলে গেলে পুরো ফাইল পাঠাতে হয়।"""
+    if_range = request.headers.get('If-Range', '').strip()
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def parse_range(header, size):
+    """
+    একটি byte range (start, end) — দুই পাশই inclusive। হেডার না থাকলে, ভুল সিনট্যাক্স বা একাধিক রেঞ্জ
+    হলে None (পুরো ফাইল পাঠানো হয়, RFC অনুমতি দেয়)। ফাইলের বাইরে হলে RangeNotSatisfiable।
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # bytes=-N: শেষের N বাইট
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+# --- ২. ফাইলের একটি অংশ (sendfile-যোগ্য) ---
+class RangedFile:
+    """
+    খোলা ফাইলের [start, start+length) অংশ। fileno() রাখা হয়েছে বলে gunicorn-এর wsgi.file_wrapper
+    বর্তমান offset থেকে Content-Length পরিমাণ os.sendfile দিয়ে পাঠায় (zero-copy); অন্য সার্ভারে read()
+    দিয়ে ঠিক ততটুকুই পড়া হয়।
+    """
+
+    def __init__(self, fh, start, length):
+        fh.seek(start)
+        self.fh = fh
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.fh.fileno()
+
+    def close(self):
+        self.fh.close()
+
+
+# --- ৩. রেসপন্স ---
+def _base_headers(response, name, etag, mtime, filename, as_attachment):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if filename:
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    # blob-এর কন্টেন্ট কখনো বদলায় না; লগইন লাগে বলে সবসময় private
+    if name.startswith(f"{BLOB_DIR}/"):
+        patch_cache_control(response, private=True, max_age=BLOB_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, max_age=FILE_MAX_AGE)
+    return response
+
+
+def _offload(path, name, content_type):
+    """
+    MEDIA_SENDFILE অনুযায়ী ফ্রন্ট প্রক্সিকে ফাইল পাঠাতে বলা হয়; বডি খালি, তাই Python ওয়ার্কার কোনো
+    বাইট বহন করে না। Range ও বাকি ট্রান্সফার প্রক্সি নিজেই সামলায়।
+    """
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def serve(request, storage, name, filename='', as_attachment=False):
+    """
+    স্টোরেজের একটি ফাইল: ETag/Last-Modified দিয়ে 304, Range দিয়ে 206/416, নাহলে পুরো ফাইল। পারমিশন
+    যাচাই কলারের কাজ (views.shipment_file)।
+    """
+    path = storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("The file is missing from storage.")
+    etag, mtime = file_etag(name, stat), stat.st_mtime
+    # নামের এক্সটেনশন স্টোর করা বাইটের (নরমালাইজ হওয়া ছবি .jpg), আসল ফাইলের নামেরটা নয়
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    if not_modified(request, etag, mtime):
+        return _base_headers(HttpResponseNotModified(), name, etag, mtime, '', False)
+    if settings.MEDIA_SENDFILE:
+        return _base_headers(_offload(path, name, content_type), name, etag, mtime, filename, as_attachment)
+
+    size = stat.st_size
+    try:
+        byte_range = parse_range(request.headers.get('Range', ''), size) if range_applies(request, etag, mtime) else None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+        return _base_headers(response, name, etag, mtime, '', False)
+
+    fh = open(path, 'rb')
+    if byte_range is None:
+        # FileResponse + wsgi.file_wrapper: gunicorn পুরো ফাইল os.sendfile দিয়ে পাঠায়
+        response = FileResponse(fh, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangedFile(fh, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    return _base_headers(response, name, etag, mtime, filename, as_attachment)
@@ -0,0 +1,191 @@
+# shipment_app/middleware.py
+
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template as DjangoTemplate
+
+slow_logger = logging.getLogger('shipment_app.slow_requests')
+
+
+class LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """প্রথম লেখার সময়েই লগ ডিরেক্টরি তৈরি হয় — settings ইমপোর্ট করলেই (প্রতিটি manage.py কমান্ডে) নয়।"""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+# মিলিসেকেন্ডে হিস্টোগ্রামের বাকেট (শেষেরটি "এর বেশি")
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+RECENT_SAMPLES = 1000
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper হিসেবে প্রতিটি কুয়েরির সময় মাপে
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - started
+            self.query_count += 1
+            self.statements[NUMBER_RE.sub('?', sql)] += 1
+
+    def duplicates(self, threshold):
+        """একই SQL টেমপ্লেট threshold বা তার বেশিবার চললে সম্ভাব্য N+1।"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+# --- টেমপ্লেট রেন্ডারের সময় (settings.TEMPLATES-এর BACKEND হিসেবে চালু করতে হয়) ---
+class TimedTemplate(DjangoTemplate):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django টেমপ্লেট ব্যাকএন্ড, শুধু রেন্ডারের সময় RequestMetricsMiddleware-এর রিকোয়েস্টে যোগ করে।
+    মিডলওয়্যারের বাইরে (কমান্ড, জব) কেবল একটি ContextVar দেখা হয়; কোনো ক্লাস প্যাচ করা হয় না।
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+# --- প্রসেস-লোকাল অ্যাগ্রিগেট (প্রতিটি gunicorn ওয়ার্কারের নিজস্ব) ---
+class ViewStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.total_queries = 0
+        self.slow = 0
+        self.n_plus_one = 0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, total_ms, queries, slow, n_plus_one):
+        self.count += 1
+        self.total_ms += total_ms
+        self.total_queries += queries
+        self.slow += slow
+        self.n_plus_one += n_plus_one
+        self.recent.append(total_ms)
+        for index, bound in enumerate(HISTOGRAM_BUCKETS):
+            if total_ms <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def percentile(self, pct):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def record(view_name, total_ms, queries, slow, n_plus_one):
+    with _stats_lock:
+        _stats.setdefault(view_name, ViewStats()).add(total_ms, queries, slow, n_plus_one)
+
+
+def snapshot():
+    """স্ট্যাটস পেজের জন্য প্রতিটি ভিউয়ের সারাংশ।"""
+    with _stats_lock:
+        rows = []
+        for name, stats in sorted(_stats.items(), key=lambda item: -item[1].total_ms):
+            rows.append({
+                'view': name,
+                'count': stats.count,
+                'avg_ms': stats.total_ms / stats.count,
+                'p50_ms': stats.percentile(50),
+                'p95_ms': stats.percentile(95),
+                'p99_ms': stats.percentile(99),
+                'avg_queries': stats.total_queries / stats.count,
+                'slow': stats.slow,
+                'n_plus_one': stats.n_plus_one,
+                'histogram': list(stats.histogram),
+            })
+        return rows
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+
+
+class RequestMetricsMiddleware:
+    """
+    প্রতি রিকোয়েস্টে মোট সময়, কুয়েরি সংখ্যা/সময়, টেমপ্লেট রেন্ডার সময় (TimedDjangoTemplates ব্যাকএন্ড
+    থাকলে) মাপে, N+1 ধরে, Server-Timing হেডার দেয় এবং ধীর রিকোয়েস্ট লগ করে।
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.duplicate_threshold = getattr(settings, 'DUPLICATE_QUERY_THRESHOLD', 5)
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total_ms = (time.perf_counter() - metrics.started) * 1000
+        db_ms = metrics.query_time * 1000
+        template_ms = metrics.template_time * 1000
+        duplicates = metrics.duplicates(self.duplicate_threshold)
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or 'unresolved'
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{metrics.query_count} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        slow = total_ms >= self.slow_ms
+        if slow or duplicates:
+            slow_logger.warning(
+                "%s %s view=%s status=%s total=%.1fms db=%.1fms/%d queries tpl=%.1fms%s",
+                request.method, request.get_full_path(), view_name, response.status_code,
+                total_ms, db_ms, metrics.query_count, template_ms,
+                ''.join(f"\n  N+1 x{count}: {sql[:300]}" for sql, count in duplicates),
+            )
+        record(view_name, total_ms, metrics.query_count, slow, bool(duplicates))
+        return response
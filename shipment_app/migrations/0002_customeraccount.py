@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Customer Name')),
+                ('access_id', models.CharField(max_length=50, unique=True, verbose_name='Secret Access ID')),
+                ('finance_sheet_url', models.URLField(max_length=500, verbose_name='Google Sheet URL')),
+            ],
+            options={
+                'verbose_name': 'Customer Account',
+                'verbose_name_plural': 'Customer Accounts',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Shipment = apps.get_model('shipment_app', 'Shipment')
+    ShipmentDailyRollup = apps.get_model('shipment_app', 'ShipmentDailyRollup')
+    rows = (
+        Shipment.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'status', 'created_by_id')
+        .annotate(kg=Sum('total_kg'), ctn=Sum('total_ctn'), count=Count('id'))
+    )
+    ShipmentDailyRollup.objects.bulk_create([
+        ShipmentDailyRollup(
+            day=row['day'], status=row['status'], created_by_id=row['created_by_id'],
+            total_kg=row['kg'] or 0, total_ctn=row['ctn'] or 0, shipment_count=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0003_shipment_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipmentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending 🕒'), ('fly', 'Fly ✅'), ('arrived', 'Arrived 📦')], max_length=20)),
+                ('total_kg', models.FloatField(default=0)),
+                ('total_ctn', models.IntegerField(default=0)),
+                ('shipment_count', models.IntegerField(default=0)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Shipment Daily Rollup',
+                'verbose_name_plural': 'Shipment Daily Rollups',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'status'], name='rollup_day_status_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
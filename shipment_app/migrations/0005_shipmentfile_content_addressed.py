@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:10
+
+import os
+
+import shipment_app.storage
+from django.db import migrations, models
+
+
+def fill_original_names(apps, schema_editor):
+    ShipmentFile = apps.get_model('shipment_app', 'ShipmentFile')
+    for shipment_file in ShipmentFile.objects.filter(original_name='').only('pk', 'uploaded_file'):
+        ShipmentFile.objects.filter(pk=shipment_file.pk).update(
+            original_name=os.path.basename(shipment_file.uploaded_file.name)[:255]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0004_shipmentdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipmentfile',
+            name='original_name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Original File Name'),
+        ),
+        migrations.AlterField(
+            model_name='shipmentfile',
+            name='uploaded_file',
+            field=models.FileField(db_index=True, storage=shipment_app.storage.get_document_storage, upload_to='shipment_files/'),
+        ),
+        migrations.RunPython(fill_original_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def copy_created_at(apps, schema_editor):
+    Shipment = apps.get_model('shipment_app', 'Shipment')
+    Shipment.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0006_backgroundjob_shipmentfile_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['created_at', 'id'], name='shipment_created_id_idx'),
+        ),
+    ]
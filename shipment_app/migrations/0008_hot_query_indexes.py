@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:15
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0007_shipment_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(condition=models.Q(('status', 'queued')), fields=['run_after', 'id'], name='job_queued_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customeraccount',
+            index=models.Index(fields=['name'], name='customeraccount_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='shipment_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(django.db.models.functions.text.Upper('so_number'), name='shipment_so_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(django.db.models.functions.text.Upper('lc_number'), name='shipment_lc_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipmentfile',
+            index=models.Index(fields=['shipment', 'file_type'], name='shipmentfile_type_idx'),
+        ),
+    ]
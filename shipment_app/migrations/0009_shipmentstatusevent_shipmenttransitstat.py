@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipmentStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'Pending 🕒'), ('fly', 'Fly ✅'), ('arrived', 'Arrived 📦')], max_length=20)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending 🕒'), ('fly', 'Fly ✅'), ('arrived', 'Arrived 📦')], max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('time_in_previous', models.DurationField(blank=True, null=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='shipment_app.shipment')),
+            ],
+            options={
+                'verbose_name': 'Shipment Status Event',
+                'verbose_name_plural': 'Shipment Status Events',
+                'ordering': ['changed_at', 'id'],
+                'indexes': [models.Index(fields=['shipment', 'changed_at'], name='status_event_shipment_idx'), models.Index(fields=['from_status', 'to_status', 'changed_at'], name='status_event_leg_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShipmentTransitStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('week', 'By week'), ('creator', 'By creator')], max_length=10)),
+                ('leg', models.CharField(choices=[('pending_fly', 'Pending → Fly'), ('fly_arrived', 'Fly → Arrived')], max_length=20)),
+                ('week', models.DateField(blank=True, null=True)),
+                ('shipment_count', models.IntegerField(default=0)),
+                ('median_seconds', models.FloatField(default=0)),
+                ('p90_seconds', models.FloatField(default=0)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Shipment Transit Stat',
+                'verbose_name_plural': 'Shipment Transit Stats',
+                'ordering': ['scope', 'leg', '-week'],
+                'indexes': [models.Index(fields=['scope', 'leg', 'week'], name='transit_scope_leg_week_idx')],
+            },
+        ),
+    ]
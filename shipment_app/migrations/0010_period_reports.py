@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0009_shipmentstatusevent_shipmenttransitstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipmentPeriodReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Weekly'), ('month', 'Monthly')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending 🕒'), ('fly', 'Fly ✅'), ('arrived', 'Arrived 📦')], max_length=20)),
+                ('total_kg', models.FloatField(default=0)),
+                ('total_ctn', models.IntegerField(default=0)),
+                ('shipment_count', models.IntegerField(default=0)),
+                ('source_updated_at', models.DateTimeField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Shipment Period Report',
+                'verbose_name_plural': 'Shipment Period Reports',
+                'ordering': ['period', '-period_start'],
+            },
+        ),
+        migrations.AddField(
+            model_name='shipmentdailyrollup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='shipmentdailyrollup',
+            index=models.Index(fields=['updated_at'], name='rollup_updated_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='shipmentperiodreport',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='shipmentperiodreport',
+            index=models.Index(fields=['period', 'period_start'], name='report_period_start_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+# CustomerAccount.ACCESS_ID_SALT — মডেল বদলালেও মাইগ্রেশন একই থাকবে, তাই এখানে কপি করা
+ACCESS_ID_SALT = 'shipment_app.CustomerAccount.access_id'
+
+
+def hash_access_ids(apps, schema_editor):
+    CustomerAccount = apps.get_model('shipment_app', 'CustomerAccount')
+    accounts = list(CustomerAccount.objects.only('pk', 'access_id'))
+    for account in accounts:
+        account.access_id_hash = salted_hmac(ACCESS_ID_SALT, account.access_id.strip(), algorithm='sha256').hexdigest()
+    CustomerAccount.objects.bulk_update(accounts, ['access_id_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0010_period_reports'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customeraccount',
+            name='access_id_hash',
+            field=models.CharField(default='', editable=False, max_length=64, verbose_name='Secret Access ID (hash)'),
+            preserve_default=False,
+        ),
+        # প্লেইন টেক্সট আইডি হ্যাশ করে কলামটি মুছে ফেলা হয় — হ্যাশ থেকে আইডি ফেরানো যায় না, তাই irreversible
+        migrations.RunPython(hash_access_ids),
+        migrations.RemoveField(
+            model_name='customeraccount',
+            name='access_id',
+        ),
+        migrations.AlterField(
+            model_name='customeraccount',
+            name='access_id_hash',
+            field=models.CharField(editable=False, max_length=64, unique=True, verbose_name='Secret Access ID (hash)'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:50
+
+import shipment_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0011_customeraccount_access_id_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipmentfile',
+            name='original_file',
+            field=models.FileField(blank=True, db_index=True, storage=shipment_app.storage.get_document_storage, upload_to='originals/'),
+        ),
+        migrations.AddField(
+            model_name='shipmentfile',
+            name='original_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
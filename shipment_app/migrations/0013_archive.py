@@ -0,0 +1,110 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:56
+
+import django.db.models.deletion
+import django.db.models.functions.text
+import django.utils.timezone
+import shipment_app.models
+import shipment_app.storage
+from django.conf import settings
+from django.db import migrations, models
+
+ARCHIVE_SEARCH_TABLE = 'shipment_app_archivedshipment_search'
+
+
+def create_archive_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {ARCHIVE_SEARCH_TABLE} "
+        f"USING fts5(so_number, lc_number, status, tokenize='trigram')"
+    )
+
+
+def drop_archive_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {ARCHIVE_SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0012_shipmentfile_original'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedShipment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('so_number', models.CharField(max_length=100, verbose_name='S/O Number')),
+                ('lc_number', models.CharField(blank=True, max_length=100, null=True, verbose_name='LC Number')),
+                ('total_ctn', models.IntegerField(verbose_name='Total CTN')),
+                ('total_kg', models.FloatField(verbose_name='Total KG')),
+                ('status', models.CharField(choices=[('pending', 'Pending 🕒'), ('fly', 'Fly ✅'), ('arrived', 'Arrived 📦')], max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Shipment',
+                'verbose_name_plural': 'Archived Shipments',
+                'ordering': ['-created_at'],
+            },
+            bases=(shipment_app.models.ShipmentDocumentsMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='ArchivedShipmentFile',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('file_type', models.CharField(choices=[('receipt', 'Receipt Copy'), ('packing', 'Packing List'), ('awb', 'AWB Copy')], max_length=20)),
+                ('uploaded_file', models.FileField(db_index=True, storage=shipment_app.storage.get_document_storage, upload_to='shipment_files/')),
+                ('original_name', models.CharField(blank=True, max_length=255, verbose_name='Original File Name')),
+                ('original_file', models.FileField(blank=True, db_index=True, storage=shipment_app.storage.get_document_storage, upload_to='originals/')),
+                ('original_size', models.BigIntegerField(blank=True, null=True)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('page_count', models.IntegerField(blank=True, null=True)),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='shipment_app.archivedshipment')),
+            ],
+            options={
+                'verbose_name': 'Archived Shipment File',
+                'verbose_name_plural': 'Archived Shipment Files',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedStatusEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'Pending 🕒'), ('fly', 'Fly ✅'), ('arrived', 'Arrived 📦')], max_length=20)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending 🕒'), ('fly', 'Fly ✅'), ('arrived', 'Arrived 📦')], max_length=20)),
+                ('changed_at', models.DateTimeField()),
+                ('time_in_previous', models.DurationField(blank=True, null=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='shipment_app.archivedshipment')),
+            ],
+            options={
+                'verbose_name': 'Archived Status Event',
+                'verbose_name_plural': 'Archived Status Events',
+                'ordering': ['changed_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedshipment',
+            index=models.Index(fields=['created_at', 'id'], name='archived_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedshipment',
+            index=models.Index(django.db.models.functions.text.Upper('so_number'), name='archived_so_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedshipment',
+            index=models.Index(django.db.models.functions.text.Upper('lc_number'), name='archived_lc_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedstatusevent',
+            index=models.Index(fields=['from_status', 'to_status', 'changed_at'], name='archived_event_leg_idx'),
+        ),
+        migrations.RunPython(create_archive_search_index, drop_archive_search_index),
+    ]
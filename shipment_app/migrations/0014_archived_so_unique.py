@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0013_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedshipment',
+            name='so_number',
+            field=models.CharField(max_length=100, unique=True, verbose_name='S/O Number'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0014_archived_so_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='shipmentfile',
+            name='thumbnail',
+        ),
+    ]
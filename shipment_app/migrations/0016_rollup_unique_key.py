@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:15
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_rollups(apps, schema_editor):
+    """একই (day, status, created_by)-এর একাধিক রো (একসাথে প্রথম লেখার রেস থেকে) প্রথমটিতে যোগ করে বাকিগুলো মোছে।"""
+    ShipmentDailyRollup = apps.get_model('shipment_app', 'ShipmentDailyRollup')
+    duplicates = (
+        ShipmentDailyRollup.objects.order_by()
+        .values('day', 'status', 'created_by_id')
+        .annotate(rows=Count('id'), kg=Sum('total_kg'), ctn=Sum('total_ctn'), count=Sum('shipment_count'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        rows = ShipmentDailyRollup.objects.filter(
+            day=row['day'], status=row['status'], created_by_id=row['created_by_id'],
+        ).order_by('pk')
+        keep = rows.first()
+        rows.exclude(pk=keep.pk).delete()
+        rows.filter(pk=keep.pk).update(total_kg=row['kg'], total_ctn=row['ctn'], shipment_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment_app', '0015_remove_shipmentfile_thumbnail'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shipmentdailyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('created_by__isnull', False)), fields=('day', 'status', 'created_by'), name='rollup_day_status_creator_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='shipmentdailyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('created_by__isnull', True)), fields=('day', 'status'), name='rollup_day_status_no_creator_uniq'),
+        ),
+    ]
@@ -1,8 +1,17 @@
 # shipment_app/models.py
 
-from django.db import models
+import os
+
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
-from django.db.models import QuerySet
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Upper
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.functional import cached_property
+
+from .storage import get_document_storage
 
 # ১. কাস্টম ইউজার মডেল (Access Permission-এর জন্য)
 class CustomUser(AbstractUser):
@@ -16,8 +25,59 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
-# ২. শিপমেন্ট মডেল
-class Shipment(models.Model):
+# ২. শিপমেন্ট কুয়েরিসেট (ফাইল প্রিফেচ / ফাইল কাউন্ট) — Shipment ও ArchivedShipment দুটোতেই
+class ShipmentQuerySet(models.QuerySet):
+    @property
+    def file_model(self):
+        return self.model._meta.get_field('files').related_model
+
+    def with_files(self):
+        """সব ফাইল একটি কুয়েরিতে প্রিফেচ করে (receipt/packing/awb গ্রুপিং এর জন্য)।"""
+        return self.prefetch_related(
+            Prefetch('files', queryset=self.file_model.objects.order_by('file_type', 'id'))
+        )
+
+    def with_file_counts(self):
+        """প্রতিটি ফাইল টাইপের সংখ্যা receipt_count / packing_count / awb_count হিসেবে যোগ করে।"""
+        annotations = {}
+        for file_type, _ in ShipmentFile.FILE_TYPE_CHOICES:
+            counts = (
+                self.file_model.objects.filter(shipment=OuterRef('pk'), file_type=file_type)
+                .order_by().values('shipment').annotate(total=Count('pk')).values('total')
+            )
+            annotations[f'{file_type}_count'] = Coalesce(Subquery(counts), 0)
+        return self.annotate(**annotations)
+
+
+# ফাইলগুলো টাইপ অনুযায়ী (টেমপ্লেটের জন্য) — Shipment ও ArchivedShipment দুটোতেই
+class ShipmentDocumentsMixin:
+    # with_files() দিয়ে প্রিফেচ করা থাকলে কোনো কুয়েরি হয় না, না থাকলে একটি কুয়েরিতে সব ফাইল আসে
+    @cached_property
+    def files_by_type(self):
+        grouped = {file_type: [] for file_type, _ in ShipmentFile.FILE_TYPE_CHOICES}
+        for shipment_file in self.files.all():
+            grouped.setdefault(shipment_file.file_type, []).append(shipment_file)
+        return grouped
+
+    @property
+    def all_files(self) -> list:
+        return [f for files in self.files_by_type.values() for f in files]
+
+    @property
+    def receipt_files(self) -> list:
+        return self.files_by_type['receipt']
+
+    @property
+    def packing_files(self) -> list:
+        return self.files_by_type['packing']
+
+    @property
+    def awb_files(self) -> list:
+        return self.files_by_type['awb']
+
+
+# ৩. শিপমেন্ট মডেল
+class Shipment(ShipmentDocumentsMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending 🕒'),
         ('fly', 'Fly ✅'),
@@ -35,27 +95,38 @@ class Shipment(models.Model):
     # স্বয়ংক্রিয়ভাবে সেভ হবে
     created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True) 
     created_at = models.DateTimeField(auto_now_add=True)
+    # API-র ETag/Last-Modified এর জন্য; QuerySet.update() করলে নিজে সেট করতে হবে
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ShipmentQuerySet.as_manager()
+
+    is_archived = False
 
     def __str__(self):
         return self.so_number
     
     class Meta:
         ordering = ['-created_at'] # নতুনগুলো আগে দেখানোর জন্য
+        indexes = [
+            # কীসেট পেজিনেশন (created_at, id) এর জন্য
+            models.Index(fields=['created_at', 'id'], name='shipment_created_id_idx'),
+            # status:fly সার্চ / API ফিল্টার + নতুনগুলো আগে
+            models.Index(fields=['status', 'created_at', 'id'], name='shipment_status_created_idx'),
+            # so:/lc: ও ছোট টার্মের কেস-ইনসেনসিটিভ সার্চ (search.py দেখুন)
+            models.Index(Upper('so_number'), name='shipment_so_upper_idx'),
+            models.Index(Upper('lc_number'), name='shipment_lc_upper_idx'),
+        ]
 
-    # --- টেমপ্লেটে সহজে ব্যবহারের জন্য কাস্টম @property ---
-    @property
-    def receipt_files(self) -> QuerySet:
-        return self.files.filter(file_type='receipt')
+    # রোলআপ আপডেট (post_save/post_delete সিগন্যাল) যেন একই ট্রানজ্যাকশনে হয়
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-    @property
-    def packing_files(self) -> QuerySet:
-        return self.files.filter(file_type='packing')
-
-    @property
-    def awb_files(self) -> QuerySet:
-        return self.files.filter(file_type='awb')
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
-# ৩. শিপমেন্ট ফাইল মডেল
+# ৪. শিপমেন্ট ফাইল মডেল
 class ShipmentFile(models.Model):
     FILE_TYPE_CHOICES = [
         ('receipt', 'Receipt Copy'),
@@ -64,23 +135,321 @@ class ShipmentFile(models.Model):
     ]
     shipment = models.ForeignKey(Shipment, related_name='files', on_delete=models.CASCADE) 
     file_type = models.CharField(max_length=20, choices=FILE_TYPE_CHOICES)
-    uploaded_file = models.FileField(upload_to='shipment_files/') 
+    # একই ফাইল একবারই ডিস্কে থাকে (SHA-256 নামে), storage.py দেখুন
+    uploaded_file = models.FileField(upload_to='shipment_files/', storage=get_document_storage, db_index=True)
+    original_name = models.CharField(max_length=255, blank=True, verbose_name="Original File Name")
+    # আপলোডের সময় ছবি ছোট করে আবার এনকোড হলে (documents.normalize_upload): আসল সাইজ, আর
+    # UPLOAD_KEEP_ORIGINALS চালু থাকলে আসল ফাইলটিও
+    original_file = models.FileField(upload_to='originals/', storage=get_document_storage, blank=True, db_index=True)
+    original_size = models.BigIntegerField(null=True, blank=True)
+
+    # আপলোডের পরে ব্যাকগ্রাউন্ড জব (jobs.py) এগুলো পূরণ করে
+    sha256 = models.CharField(max_length=64, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    page_count = models.IntegerField(null=True, blank=True)
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def display_name(self):
+        return self.original_name or os.path.basename(self.uploaded_file.name)
 
     def __str__(self):
         return f"{self.shipment.so_number} - {self.get_file_type_display()}"
 
-# 🌟 ৪. কাস্টমার অ্যাকাউন্ট মডেল (নতুন ফিচার) 🌟
+    class Meta:
+        indexes = [
+            # টাইপ অনুযায়ী ফাইল গ্রুপিং / ফাইল কাউন্ট সাবকুয়েরি
+            models.Index(fields=['shipment', 'file_type'], name='shipmentfile_type_idx'),
+        ]
+
+# 🌟 ৫. কাস্টমার অ্যাকাউন্ট মডেল (নতুন ফিচার) 🌟
 class CustomerAccount(models.Model):
+    ACCESS_ID_SALT = 'shipment_app.CustomerAccount.access_id'
+
     name = models.CharField(max_length=200, verbose_name="Customer Name")
-    # কাস্টমারকে হিসাব দেখার জন্য এই সিক্রেট আইডি দিতে হবে
-    access_id = models.CharField(max_length=50, unique=True, verbose_name="Secret Access ID") 
+    # কাস্টমারকে হিসাব দেখার জন্য এই সিক্রেট আইডি দিতে হবে — আইডি নিজে নয়, SECRET_KEY দিয়ে HMAC-SHA256 রাখা হয়
+    access_id_hash = models.CharField(max_length=64, unique=True, editable=False, verbose_name="Secret Access ID (hash)")
     # গুগল স্প্রেডশীটের লিঙ্ক
     finance_sheet_url = models.URLField(max_length=500, verbose_name="Google Sheet URL")
-    
+
+    @classmethod
+    def hash_access_id(cls, raw_access_id, secret=None):
+        return salted_hmac(cls.ACCESS_ID_SALT, raw_access_id.strip(), secret=secret, algorithm='sha256').hexdigest()
+
+    def set_access_id(self, raw_access_id):
+        self.access_id_hash = self.hash_access_id(raw_access_id)
+
+    def check_access_id(self, raw_access_id):
+        """constant-time তুলনা; SECRET_KEY বদলালে SECRET_KEY_FALLBACKS দিয়ে বানানো হ্যাশও মেলে।"""
+        for secret in [settings.SECRET_KEY, *settings.SECRET_KEY_FALLBACKS]:
+            if constant_time_compare(self.hash_access_id(raw_access_id, secret), self.access_id_hash):
+                return True
+        return False
+
     def __str__(self):
         return self.name
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name'], name='customeraccount_name_idx'),
+        ]
         verbose_name = "Customer Account"
         verbose_name_plural = "Customer Accounts"
+
+# ৬. ড্যাশবোর্ডের জন্য দৈনিক রোলআপ (দিন + স্ট্যাটাস + ক্রিয়েটর অনুযায়ী)
+# Shipment সেভ/ডিলিট হলে signals.py থেকে একই ট্রানজ্যাকশনে আপডেট হয়
+class ShipmentDailyRollup(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    total_kg = models.FloatField(default=0)
+    total_ctn = models.IntegerField(default=0)
+    shipment_count = models.IntegerField(default=0)
+    # শেষ কবে বদলেছে — পিরিয়ড রিপোর্ট শুধু এর পরের পরিবর্তনগুলো আবার হিসাব করে (reports.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.day} / {self.status}: {self.total_kg} KG"
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = "Shipment Daily Rollup"
+        verbose_name_plural = "Shipment Daily Rollups"
+        indexes = [
+            models.Index(fields=['day', 'status'], name='rollup_day_status_idx'),
+            models.Index(fields=['updated_at'], name='rollup_updated_at_idx'),
+        ]
+        # প্রতি (day, status, created_by)-এ একটিই রো। NULL একে অন্যের থেকে আলাদা গণ্য হয়, তাই
+        # ক্রিয়েটর ছাড়া রো-গুলোর জন্য আলাদা partial constraint (SQLite NULLS NOT DISTINCT জানে না)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'created_by'], condition=models.Q(created_by__isnull=False),
+                name='rollup_day_status_creator_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'status'], condition=models.Q(created_by__isnull=True),
+                name='rollup_day_status_no_creator_uniq',
+            ),
+        ]
+
+
+# ৭. ব্যাকগ্রাউন্ড জব কিউ (ডাটাবেস-ভিত্তিক, `manage.py run_workers` চালায়)
+class BackgroundJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+            # শুধু queued জবের partial index — claim() কুয়েরি ছোট ইনডেক্স থেকেই পায়
+            models.Index(
+                fields=['run_after', 'id'], condition=models.Q(status='queued'), name='job_queued_idx',
+            ),
+        ]
+
+
+# ৮. স্ট্যাটাস পরিবর্তনের লগ (append-only) — স্ট্যাটাস বদলানোর একই ট্রানজ্যাকশনে লেখা হয় (history.py)
+class ShipmentStatusEvent(models.Model):
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='status_events')
+    # নতুন শিপমেন্টের প্রথম ইভেন্টে ফাঁকা
+    from_status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES, blank=True)
+    to_status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES)
+    changed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+    # from_status-এ শিপমেন্টটি কতক্ষণ ছিল (জানা না গেলে None) — ট্রানজিট অ্যানালিটিক্সের জন্য
+    time_in_previous = models.DurationField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.shipment_id}: {self.from_status or '—'} → {self.to_status}"
+
+    @property
+    def hours_in_previous(self):
+        return self.time_in_previous.total_seconds() / 3600 if self.time_in_previous else None
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Shipment status events are append-only.")
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        verbose_name = "Shipment Status Event"
+        verbose_name_plural = "Shipment Status Events"
+        indexes = [
+            models.Index(fields=['shipment', 'changed_at'], name='status_event_shipment_idx'),
+            # একটি লেগের (pending→fly ইত্যাদি) ইভেন্ট সময় অনুযায়ী
+            models.Index(fields=['from_status', 'to_status', 'changed_at'], name='status_event_leg_idx'),
+        ]
+
+
+# ৯. ট্রানজিট সময়ের প্রিকম্পিউটেড সারাংশ (`manage.py build_transit_stats` বা জব থেকে তৈরি)
+class ShipmentTransitStat(models.Model):
+    LEG_CHOICES = [
+        ('pending_fly', 'Pending → Fly'),
+        ('fly_arrived', 'Fly → Arrived'),
+    ]
+    SCOPE_CHOICES = [
+        ('week', 'By week'),        # week সেট, created_by None (সব ক্রিয়েটর)
+        ('creator', 'By creator'),  # week None (সব সময়), created_by অনুযায়ী
+    ]
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    leg = models.CharField(max_length=20, choices=LEG_CHOICES)
+    week = models.DateField(null=True, blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    shipment_count = models.IntegerField(default=0)
+    median_seconds = models.FloatField(default=0)
+    p90_seconds = models.FloatField(default=0)
+    # কোন ইভেন্ট পর্যন্ত হিসাব হয়েছে (ইনক্রিমেন্টাল বিল্ডের জন্য)
+    last_event_id = models.BigIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_scope_display()} {self.week or self.created_by_id} {self.leg}"
+
+    @property
+    def median_hours(self):
+        return self.median_seconds / 3600
+
+    @property
+    def p90_hours(self):
+        return self.p90_seconds / 3600
+
+    class Meta:
+        ordering = ['scope', 'leg', '-week']
+        verbose_name = "Shipment Transit Stat"
+        verbose_name_plural = "Shipment Transit Stats"
+        indexes = [
+            models.Index(fields=['scope', 'leg', 'week'], name='transit_scope_leg_week_idx'),
+        ]
+
+
+# ১০. সাপ্তাহিক/মাসিক রিপোর্ট (পিরিয়ড + স্ট্যাটাস + ক্রিয়েটর), দৈনিক রোলআপ থেকে `manage.py build_reports` তৈরি করে
+class ShipmentPeriodReport(models.Model):
+    PERIOD_CHOICES = [
+        ('week', 'Weekly'),
+        ('month', 'Monthly'),
+    ]
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    total_kg = models.FloatField(default=0)
+    total_ctn = models.IntegerField(default=0)
+    shipment_count = models.IntegerField(default=0)
+    # কোন রোলআপ পরিবর্তন (updated_at) পর্যন্ত হিসাব হয়েছে (ইনক্রিমেন্টাল বিল্ডের জন্য)
+    source_updated_at = models.DateTimeField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_period_display()} {self.period_start} / {self.status}: {self.total_kg} KG"
+
+    class Meta:
+        ordering = ['period', '-period_start']
+        verbose_name = "Shipment Period Report"
+        verbose_name_plural = "Shipment Period Reports"
+        indexes = [
+            models.Index(fields=['period', 'period_start'], name='report_period_start_idx'),
+        ]
+
+
+# ১১. আর্কাইভ (`manage.py archive_shipments`): পুরনো arrived শিপমেন্ট, তাদের ফাইল ও স্ট্যাটাস হিস্টোরি মূল
+# টেবিল থেকে এখানে সরানো হয়, যাতে ড্যাশবোর্ড/সার্চ/এক্সপোর্টের টেবিল ছোট থাকে। আসল id-ই রাখা হয়, তাই
+# পুরনো লিংক (/shipment/<id>/, /files/<id>/) আর্কাইভ থেকে খোলে। কেবল পড়ার জন্য — archive.py দেখুন।
+class ArchivedShipment(ShipmentDocumentsMixin, models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    # Shipment.so_number-এর মতোই ইউনিক; নতুন শিপমেন্ট/ইমপোর্ট আর্কাইভের S/O-ও যাচাই করে (forms.py, imports.py)
+    so_number = models.CharField(max_length=100, unique=True, verbose_name="S/O Number")
+    lc_number = models.CharField(max_length=100, blank=True, null=True, verbose_name="LC Number")
+    total_ctn = models.IntegerField(verbose_name="Total CTN")
+    total_kg = models.FloatField(verbose_name="Total KG")
+    status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES, verbose_name="Status")
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = ShipmentQuerySet.as_manager()
+
+    is_archived = True
+
+    def __str__(self):
+        return self.so_number
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Archived Shipment"
+        verbose_name_plural = "Archived Shipments"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='archived_created_id_idx'),
+            models.Index(Upper('so_number'), name='archived_so_upper_idx'),
+            models.Index(Upper('lc_number'), name='archived_lc_upper_idx'),
+        ]
+
+
+class ArchivedShipmentFile(models.Model):
+    # থাম্বনেইল/মাপ বাদ (প্রিভিউ ক্যাশ আবার বানাতে পারে); blob-এর নাম থাকে, তাই ফাইল ডিস্কে একই জায়গায় থাকে
+    id = models.BigIntegerField(primary_key=True)
+    shipment = models.ForeignKey(ArchivedShipment, related_name='files', on_delete=models.CASCADE)
+    file_type = models.CharField(max_length=20, choices=ShipmentFile.FILE_TYPE_CHOICES)
+    uploaded_file = models.FileField(upload_to='shipment_files/', storage=get_document_storage, db_index=True)
+    original_name = models.CharField(max_length=255, blank=True, verbose_name="Original File Name")
+    original_file = models.FileField(upload_to='originals/', storage=get_document_storage, blank=True, db_index=True)
+    original_size = models.BigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    page_count = models.IntegerField(null=True, blank=True)
+
+    display_name = ShipmentFile.display_name
+
+    def __str__(self):
+        return f"{self.shipment_id} - {self.get_file_type_display()} (archived)"
+
+    class Meta:
+        verbose_name = "Archived Shipment File"
+        verbose_name_plural = "Archived Shipment Files"
+
+
+class ArchivedStatusEvent(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    shipment = models.ForeignKey(ArchivedShipment, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES, blank=True)
+    to_status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES)
+    changed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    changed_at = models.DateTimeField()
+    time_in_previous = models.DurationField(null=True, blank=True)
+
+    hours_in_previous = ShipmentStatusEvent.hours_in_previous
+
+    def __str__(self):
+        return f"{self.shipment_id}: {self.from_status or '—'} → {self.to_status} (archived)"
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        verbose_name = "Archived Status Event"
+        verbose_name_plural = "Archived Status Events"
+        indexes = [
+            # ট্রানজিট অ্যানালিটিক্সের লেগ ইভেন্ট (history.build_transit_stats)
+            models.Index(fields=['from_status', 'to_status', 'changed_at'], name='archived_event_leg_idx'),
+        ]
@@ -0,0 +1,157 @@
+# shipment_app/previews.py
+
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from PIL import Image, UnidentifiedImageError
+
+from .documents import file_digest, inspect_pdf, is_pdf, pdf_placeholder, placeholder, render_thumbnail
+
+# সাইজ বাকেট — যেকোনো সাইজ নয়, যাতে ক্যাশ হিট বেশি হয়
+SIZE_BUCKETS = {
+    'sm': (160, 160),
+    'md': (320, 320),
+    'lg': (800, 800),
+}
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+CACHE_VERSION = 1
+
+
+def cache_dir():
+    return str(getattr(settings, 'PREVIEW_CACHE_DIR', os.path.join(settings.BASE_DIR, 'preview_cache')))
+
+
+def cache_budget():
+    return getattr(settings, 'PREVIEW_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+
+
+def preferred_format(request):
+    return 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+
+
+def content_digest(shipment_file):
+    """ব্যাকগ্রাউন্ড জব sha256 সেভ করে রাখলে সেটাই, না হলে ফাইল থেকে।"""
+    return shipment_file.sha256 or file_digest(shipment_file.uploaded_file)
+
+
+def preview_key(digest, bucket, fmt):
+    return f"{digest}-{bucket}-v{CACHE_VERSION}.{fmt}"
+
+
+def etag_for(key):
+    # key-তে কন্টেন্ট হ্যাশ + সাইজ + ফরম্যাট আছে, তাই এটি স্ট্রং ETag
+    return f'"{key}"'
+
+
+def render_preview(shipment_file, bucket, fmt):
+    size = SIZE_BUCKETS[bucket]
+    field_file = shipment_file.uploaded_file
+    if is_pdf(field_file.name):
+        # Pillow PDF রাস্টারাইজ করতে পারে না — পেজ সংখ্যা সহ প্লেসহোল্ডার
+        page_count = shipment_file.page_count or inspect_pdf(field_file)[0]
+        image = pdf_placeholder(page_count, size)
+    else:
+        try:
+            with field_file.open('rb') as fh, Image.open(fh) as original:
+                image = render_thumbnail(original, size)
+        except (UnidentifiedImageError, OSError):
+            ext = os.path.splitext(field_file.name)[1].lstrip('.').upper() or 'FILE'
+            image = placeholder(ext[:5], shipment_file.get_file_type_display(), size, color='#6c757d')
+
+    buffer = io.BytesIO()
+    pil_format = FORMATS[fmt][0]
+    if pil_format == 'WEBP':
+        image.save(buffer, format='WEBP', quality=75, method=4)
+    else:
+        image.convert('RGB').save(buffer, format='JPEG', quality=80, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.preview-', dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(data)
+    os.replace(tmp_path, path)
+
+
+# প্রতি প্রসেসে ক্যাশ ডিরেক্টরির আনুমানিক সাইজ: শেষ স্ক্যানের মোট + এরপর এই প্রসেসের লেখা বাইট।
+# প্রতি মিসে পুরো ডিরেক্টরি স্ক্যান না করে শুধু আনুমানিক সাইজ বাজেট ছাড়ালে evict চলে।
+_estimated_sizes = {}
+# evict বাজেটের এই অংশ পর্যন্ত নামিয়ে আনে, যাতে পরের স্ক্যান অনেক লেখার পরে হয়
+EVICT_TARGET = 0.9
+
+
+def evict(budget=None, target=None):
+    """
+    LRU: ক্যাশ বাজেটের বেশি হলে সবচেয়ে পুরনো ব্যবহৃত (mtime) ফাইল আগে মুছে target পর্যন্ত নামানো হয়
+    (target না দিলে বাজেট পর্যন্ত)। ক্যাশ হিটে mtime আপডেট করা হয় (atime অনেক ফাইলসিস্টেমে বন্ধ থাকে)।
+    """
+    budget = cache_budget() if budget is None else budget
+    target = budget if target is None else min(target, budget)
+    entries = []
+    total = 0
+    for directory, _, filenames in os.walk(cache_dir()):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    if total > budget:
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            removed += 1
+    _estimated_sizes[cache_dir()] = total
+    return removed
+
+
+def _record_write(size):
+    """নতুন লেখা প্রিভিউ গোনা হয়; আনুমানিক সাইজ বাজেট ছাড়ালে (বা প্রসেসের প্রথম লেখায়) তবেই স্ক্যান ও evict।"""
+    budget = cache_budget()
+    estimate = _estimated_sizes.get(cache_dir())
+    if estimate is None or estimate + size > budget:
+        evict(budget, target=int(budget * EVICT_TARGET))
+    else:
+        _estimated_sizes[cache_dir()] = estimate + size
+
+
+def open_preview(shipment_file, bucket, fmt):
+    """
+    রিটার্ন: (পড়ার জন্য খোলা ফাইল, ETag)। ক্যাশে থাকলে সেটি খোলা হয় — exists() আর open()-এর মাঝে অন্য
+    ওয়ার্কারের evict ফাইল মুছে ফেলতে পারত, তাই সরাসরি open করে না পেলে নতুন করে বানানো হয়। খোলা ফাইল
+    পরে মুছে গেলেও পড়া যায়; নতুন বানানো প্রিভিউ মেমরি থেকেই পাঠানো হয়।
+    """
+    key = preview_key(content_digest(shipment_file), bucket, fmt)
+    path = os.path.join(cache_dir(), key[:2], key)
+    try:
+        fh = open(path, 'rb')
+    except FileNotFoundError:
+        data = render_preview(shipment_file, bucket, fmt)
+        _write_atomic(path, data)
+        _record_write(len(data))
+        return io.BytesIO(data), etag_for(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return fh, etag_for(key)
+
+
+def preview_etag(shipment_file, bucket, fmt):
+    """ফাইল না খুলেই ETag (sha256 জানা থাকলে) — 304 রেসপন্সের জন্য।"""
+    return etag_for(preview_key(content_digest(shipment_file), bucket, fmt))
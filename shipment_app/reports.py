@@ -0,0 +1,159 @@
+# shipment_app/reports.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import CustomUser, Shipment, ShipmentDailyRollup, ShipmentPeriodReport
+
+PERIOD_TRUNC = {'week': TruncWeek, 'month': TruncMonth}
+# group_by -> ShipmentPeriodReport-এর ফিল্ড (total হলে সব একসাথে)
+GROUP_FIELDS = {'total': None, 'status': 'status', 'creator': 'created_by'}
+# watermark-এর আগে শুরু হয়ে পরে কমিট হওয়া ট্রানজ্যাকশনের পরিবর্তন যাতে বাদ না পড়ে, প্রতি বিল্ডে
+# এতটুকু আগে থেকে ধরা হয় — একই পিরিয়ড আবার হিসাব হলে ফল একই থাকে
+SAFETY_MARGIN = timedelta(minutes=10)
+CSV_HEADER = [
+    'Period Start', 'Period End', 'Group', 'Total KG', 'KG Change %', 'Total CTN', 'CTN Change %',
+    'Shipments', 'Shipments Change %',
+]
+
+
+def period_start(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_period_start(start, period):
+    if period == 'week':
+        return start + timedelta(days=7)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def previous_period_start(start, period):
+    if period == 'week':
+        return start - timedelta(days=7)
+    return (start - timedelta(days=1)).replace(day=1)
+
+
+# --- ১. দৈনিক রোলআপ থেকে রিপোর্ট টেবিল তৈরি ---
+def _rebuild_range(period, first, last, source_updated_at):
+    """first থেকে last (দুটিই পিরিয়ডের শুরু) পর্যন্ত সব পিরিয়ডের রো মুছে রোলআপ থেকে নতুন করে লেখে।"""
+    end = next_period_start(last, period)
+    rows = (
+        ShipmentDailyRollup.objects.filter(day__gte=first, day__lt=end)
+        .order_by().annotate(start=PERIOD_TRUNC[period]('day'))
+        .values('start', 'status', 'created_by_id')
+        .annotate(kg=Sum('total_kg'), ctn=Sum('total_ctn'), count=Sum('shipment_count'))
+    )
+    ShipmentPeriodReport.objects.filter(period=period, period_start__gte=first, period_start__lt=end).delete()
+    ShipmentPeriodReport.objects.bulk_create(
+        [
+            ShipmentPeriodReport(
+                period=period, period_start=row['start'], status=row['status'], created_by_id=row['created_by_id'],
+                total_kg=row['kg'], total_ctn=row['ctn'], shipment_count=row['count'],
+                source_updated_at=source_updated_at,
+            )
+            for row in rows if row['count']
+        ],
+        batch_size=500,
+    )
+
+
+def build_reports(full=False):
+    """
+    শেষ বিল্ডের পরে বদলানো রোলআপ (updated_at) যেসব সপ্তাহ ও মাস ছোঁয় শুধু সেগুলো আবার হিসাব করে;
+    full=True হলে সব মুছে নতুন করে। কাঁচা Shipment টেবিল পড়া হয় না। রিটার্ন: কতগুলো দিন বদলেছিল।
+    """
+    latest = ShipmentDailyRollup.objects.aggregate(m=Max('updated_at'))['m']
+    watermark = None if full else ShipmentPeriodReport.objects.aggregate(m=Max('source_updated_at'))['m']
+    changed = ShipmentDailyRollup.objects.order_by()
+    if watermark is not None:
+        changed = changed.filter(updated_at__gt=watermark - SAFETY_MARGIN)
+    days = set(changed.values_list('day', flat=True).distinct())
+
+    with transaction.atomic():
+        if full:
+            ShipmentPeriodReport.objects.all().delete()
+        if days:
+            for period in PERIOD_TRUNC:
+                starts = {period_start(day, period) for day in days}
+                _rebuild_range(period, min(starts), max(starts), latest)
+    return len(days)
+
+
+# --- ২. রিপোর্ট পেজ / CSV (শুধু ShipmentPeriodReport থেকে) ---
+def _change(current, previous):
+    if not previous:
+        return None
+    return 100 * (current - previous) / previous
+
+
+def _group_labels(group_by, keys):
+    if group_by == 'status':
+        labels = dict(Shipment.STATUS_CHOICES)
+        return {key: labels.get(key, key) for key in keys}
+    if group_by == 'creator':
+        usernames = dict(CustomUser.objects.filter(pk__in=[key for key in keys if key]).values_list('pk', 'username'))
+        return {key: usernames.get(key, 'Unknown') for key in keys}
+    return {None: 'All shipments'}
+
+
+def period_table(period='week', group_by='total', periods=12, today=None):
+    """
+    সর্বশেষ `periods`টি সপ্তাহ/মাসের (নতুনটি আগে) KG, CTN ও শিপমেন্ট সংখ্যা, group_by অনুযায়ী ভাগ করে,
+    প্রতিটির সাথে আগের পিরিয়ডের তুলনায় পরিবর্তন (%) — week-over-week / month-over-month।
+    """
+    starts = [period_start(today or timezone.localdate(), period)]
+    for _ in range(periods):
+        starts.append(previous_period_start(starts[-1], period))
+
+    group_field = GROUP_FIELDS[group_by]
+    fields = ['period_start'] + ([group_field] if group_field else [])
+    rows = (
+        ShipmentPeriodReport.objects.filter(period=period, period_start__gte=starts[-1])
+        .order_by().values(*fields)
+        .annotate(kg=Sum('total_kg'), ctn=Sum('total_ctn'), count=Sum('shipment_count'))
+    )
+    totals = {(row['period_start'], row[group_field] if group_field else None): row for row in rows}
+    keys = {key for _, key in totals}
+    labels = _group_labels(group_by, keys)
+    groups = sorted(keys, key=lambda key: labels[key]) if group_field else [None]
+
+    empty = {'kg': 0, 'ctn': 0, 'count': 0}
+    table = []
+    for start, previous_start in zip(starts, starts[1:]):
+        for key in groups:
+            current = totals.get((start, key), empty)
+            previous = totals.get((previous_start, key), empty)
+            table.append({
+                'period_start': start,
+                'period_end': next_period_start(start, period) - timedelta(days=1),
+                'group': labels[key],
+                'kg': current['kg'],
+                'ctn': current['ctn'],
+                'count': current['count'],
+                'kg_change': _change(current['kg'], previous['kg']),
+                'ctn_change': _change(current['ctn'], previous['ctn']),
+                'count_change': _change(current['count'], previous['count']),
+            })
+    return table
+
+
+def csv_rows(table):
+    def percent(value):
+        return '' if value is None else f"{value:.1f}"
+
+    for row in table:
+        yield (
+            row['period_start'].isoformat(), row['period_end'].isoformat(), row['group'],
+            f"{row['kg']:.2f}", percent(row['kg_change']), row['ctn'], percent(row['ctn_change']),
+            row['count'], percent(row['count_change']),
+        )
+
+
+def last_computed():
+    return ShipmentPeriodReport.objects.aggregate(latest=Max('computed_at'))['latest']
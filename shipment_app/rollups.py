@@ -0,0 +1,210 @@
+# shipment_app/rollups.py
+
+from collections import defaultdict
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedShipment, Shipment, ShipmentDailyRollup
+
+ROLLUP_FIELDS = ('created_at', 'status', 'created_by_id', 'total_kg', 'total_ctn')
+
+
+def _key(values):
+    return (timezone.localdate(values['created_at']), values['status'], values['created_by_id'])
+
+
+def _apply(key, kg, ctn, count):
+    """
+    কী-এর রো-তে ডেল্টা যোগ করে; রো না থাকলে তৈরি করে। দুই ট্রানজ্যাকশন একসাথে একই কী-এর প্রথম রো
+    বানাতে গেলে ইউনিক কনস্ট্রেইন্ট একটিকে আটকায়, সেটি তখন অন্যটির রো-তেই যোগ করে।
+    """
+    day, status, created_by_id = key
+    rows = ShipmentDailyRollup.objects.filter(day=day, status=status, created_by_id=created_by_id)
+    increment = {
+        'total_kg': F('total_kg') + kg,
+        'total_ctn': F('total_ctn') + ctn,
+        'shipment_count': F('shipment_count') + count,
+        'updated_at': timezone.now(),
+    }
+    if rows.update(**increment):
+        return
+    try:
+        with transaction.atomic():
+            ShipmentDailyRollup.objects.create(
+                day=day, status=status, created_by_id=created_by_id,
+                total_kg=kg, total_ctn=ctn, shipment_count=count,
+            )
+    except IntegrityError:
+        rows.update(**increment)
+
+
+def snapshot(shipment):
+    """সেভের আগে ডাটাবেসে থাকা মানগুলো (নতুন শিপমেন্ট হলে None)।"""
+    if shipment._state.adding or shipment.pk is None:
+        return None
+    return Shipment.objects.filter(pk=shipment.pk).values(*ROLLUP_FIELDS).first()
+
+
+def record_save(shipment, previous):
+    current = {name: getattr(shipment, name) for name in ROLLUP_FIELDS}
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous is not None:
+            _apply(_key(previous), -previous['total_kg'], -previous['total_ctn'], -1)
+        _apply(_key(current), current['total_kg'], current['total_ctn'], 1)
+
+
+def record_bulk(changes):
+    """
+    bulk_create/bulk_update/QuerySet.update সিগন্যাল পাঠায় না, তাই সেখান থেকে এটি ডাকা হয়।
+    changes: (previous values বা None, current values) জোড়ার তালিকা; একই কী-এর ডেল্টা
+    একসাথে যোগ করে প্রতি কী-তে একবারই লেখা হয়।
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for previous, current in changes:
+        if previous == current:
+            continue
+        if previous is not None:
+            delta = deltas[_key(previous)]
+            delta[0] -= previous['total_kg']
+            delta[1] -= previous['total_ctn']
+            delta[2] -= 1
+        delta = deltas[_key(current)]
+        delta[0] += current['total_kg']
+        delta[1] += current['total_ctn']
+        delta[2] += 1
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    # প্রতি কী-তে আলাদা SELECT না করে এক কুয়েরিতে সব দিনের রো; তারপর একটি prepared UPDATE
+    # executemany দিয়ে (bulk_update-এর বড় CASE WHEN SQLite-এ অনেক ধীর) আর নতুন কী bulk_create
+    with transaction.atomic():
+        rows = ShipmentDailyRollup.objects.filter(day__in={key[0] for key in deltas})
+        existing = {
+            (day, status, created_by_id): pk
+            for pk, day, status, created_by_id in rows.values_list('pk', 'day', 'status', 'created_by_id')
+        }
+        increments, to_create = [], []
+        # raw SQL-এ মান ব্যাকএন্ডের নিজস্ব ফরম্যাটে দিতে হয় (SQLite-এ naive UTC স্ট্রিং)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        for (day, status, created_by_id), (kg, ctn, count) in deltas.items():
+            pk = existing.get((day, status, created_by_id))
+            if pk is None:
+                to_create.append(ShipmentDailyRollup(
+                    day=day, status=status, created_by_id=created_by_id,
+                    total_kg=kg, total_ctn=ctn, shipment_count=count,
+                ))
+            else:
+                increments.append([kg, ctn, count, now, pk])
+        if increments:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"UPDATE {ShipmentDailyRollup._meta.db_table} SET total_kg = total_kg + %s, "
+                    f"total_ctn = total_ctn + %s, shipment_count = shipment_count + %s, updated_at = %s "
+                    f"WHERE id = %s",
+                    increments,
+                )
+        try:
+            with transaction.atomic():
+                ShipmentDailyRollup.objects.bulk_create(to_create, batch_size=500)
+        except IntegrityError:
+            # এর মধ্যে অন্য ট্রানজ্যাকশন কিছু কী-এর রো বানিয়েছে — সেগুলো একটা একটা করে
+            for row in to_create:
+                _apply((row.day, row.status, row.created_by_id), row.total_kg, row.total_ctn, row.shipment_count)
+
+
+def record_delete(shipment):
+    values = {name: getattr(shipment, name) for name in ROLLUP_FIELDS}
+    _apply(_key(values), -values['total_kg'], -values['total_ctn'], -1)
+
+
+def fold_creator(user_id):
+    """
+    ইউজার মোছার আগে তার রো-গুলো ক্রিয়েটরহীন (NULL) রো-তে যোগ করে মুছে ফেলে। নইলে SET_NULL সেগুলোকে
+    NULL করত, আর একই দিন/স্ট্যাটাসের NULL রো আগে থেকে থাকলে ইউনিক কনস্ট্রেইন্টে ইউজার মোছা আটকে যেত।
+    """
+    with transaction.atomic():
+        rows = ShipmentDailyRollup.objects.filter(created_by_id=user_id)
+        for day, status, kg, ctn, count in rows.values_list(
+            'day', 'status', 'total_kg', 'total_ctn', 'shipment_count',
+        ):
+            _apply((day, status, None), kg, ctn, count)
+        rows.delete()
+
+
+# --- রিপোর্টিং ---
+def totals(start_day, end_day=None, **filters):
+    """start_day থেকে end_day (inclusive) পর্যন্ত KG/CTN/সংখ্যা। filters: status, created_by ইত্যাদি।"""
+    rows = ShipmentDailyRollup.objects.filter(day__gte=start_day, **filters)
+    if end_day is not None:
+        rows = rows.filter(day__lte=end_day)
+    result = rows.aggregate(kg=Sum('total_kg'), ctn=Sum('total_ctn'), count=Sum('shipment_count'))
+    return {key: value or 0 for key, value in result.items()}
+
+
+# --- ব্যাকফিল / যাচাই ---
+def compute_from_shipments():
+    """
+    কাঁচা Shipment ও ArchivedShipment টেবিল থেকে রোলআপ হিসাব করে {(day, status, user_id): (kg, ctn, count)}।
+    আর্কাইভ করা শিপমেন্টও রোলআপে থাকে (archive.py সেগুলো সরানোর সময় রোলআপ বদলায় না)।
+    """
+    merged = defaultdict(lambda: [0, 0, 0])
+    for model in (Shipment, ArchivedShipment):
+        rows = (
+            model.objects.order_by()
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'status', 'created_by_id')
+            .annotate(kg=Sum('total_kg'), ctn=Sum('total_ctn'), count=Count('id'))
+        )
+        for row in rows:
+            totals_row = merged[(row['day'], row['status'], row['created_by_id'])]
+            totals_row[0] += row['kg'] or 0
+            totals_row[1] += row['ctn'] or 0
+            totals_row[2] += row['count']
+    return {key: tuple(value) for key, value in merged.items()}
+
+
+def stored_rollups():
+    merged = defaultdict(lambda: [0, 0, 0])
+    for row in ShipmentDailyRollup.objects.values_list(
+        'day', 'status', 'created_by_id', 'total_kg', 'total_ctn', 'shipment_count'
+    ):
+        totals_row = merged[row[:3]]
+        totals_row[0] += row[3]
+        totals_row[1] += row[4]
+        totals_row[2] += row[5]
+    return {key: tuple(value) for key, value in merged.items() if value[2]}
+
+
+def find_mismatches(tolerance=0.01):
+    expected = compute_from_shipments()
+    actual = stored_rollups()
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        exp = expected.get(key, (0, 0, 0))
+        act = actual.get(key, (0, 0, 0))
+        if abs(exp[0] - act[0]) > tolerance or exp[1:] != act[1:]:
+            mismatches.append((key, exp, act))
+    return mismatches
+
+
+def rebuild():
+    """সব রোলআপ মুছে কাঁচা ডেটা থেকে নতুন করে তৈরি করে।"""
+    expected = compute_from_shipments()
+    with transaction.atomic():
+        ShipmentDailyRollup.objects.all().delete()
+        ShipmentDailyRollup.objects.bulk_create(
+            [
+                ShipmentDailyRollup(
+                    day=day, status=status, created_by_id=created_by_id,
+                    total_kg=kg, total_ctn=ctn, shipment_count=count,
+                )
+                for (day, status, created_by_id), (kg, ctn, count) in expected.items()
+            ],
+            batch_size=1000,
+        )
+    return len(expected)
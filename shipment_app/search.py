@@ -0,0 +1,229 @@
+# shipment_app/search.py
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.db.models.lookups import Exact, GreaterThanOrEqual, LessThan
+from django.utils import timezone
+
+from .models import ArchivedShipment, Shipment
+
+# SQLite FTS5 ভার্চুয়াল টেবিল (trigram tokenizer => সাবস্ট্রিং সার্চ, icontains-এর মতো)
+SEARCH_TABLE = 'shipment_app_shipment_search'
+# আর্কাইভ করা শিপমেন্টের আলাদা ইনডেক্স (archive.py সরানোর সময় এখানে লেখে)
+ARCHIVE_SEARCH_TABLE = 'shipment_app_archivedshipment_search'
+SEARCH_TABLES = {Shipment: SEARCH_TABLE, ArchivedShipment: ARCHIVE_SEARCH_TABLE}
+
+# trigram ইনডেক্স ৩ অক্ষরের কম টার্ম খুঁজতে পারে না
+MIN_TERM_LENGTH = 3
+
+FIELD_PREFIXES = ('so', 'lc', 'status', 'kg', 'ctn', 'from', 'to', 'date')
+NUMERIC_RE = re.compile(r'^(>=|<=|>|<|=)?(\d+(?:\.\d+)?)$')
+NUMERIC_LOOKUPS = {'>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte', '=': 'exact', None: 'exact'}
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+# --- ১. ইনডেক্স রক্ষণাবেক্ষণ ---
+def create_index_table(cursor):
+    for table in SEARCH_TABLES.values():
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+            f"USING fts5(so_number, lc_number, status, tokenize='trigram')"
+        )
+
+
+def index_shipment(shipment):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [shipment.pk])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, so_number, lc_number, status) VALUES (%s, %s, %s, %s)",
+            [shipment.pk, shipment.so_number, shipment.lc_number or '', shipment.status],
+        )
+
+
+def index_shipments(shipments, table=SEARCH_TABLE):
+    """বাল্ক ইমপোর্ট/আপডেটের পরে অনেকগুলো শিপমেন্ট একসাথে ইনডেক্স করে।"""
+    if not is_enabled() or not shipments:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [[s.pk] for s in shipments])
+        cursor.executemany(
+            f"INSERT INTO {table} (rowid, so_number, lc_number, status) VALUES (%s, %s, %s, %s)",
+            [[s.pk, s.so_number, s.lc_number or '', s.status] for s in shipments],
+        )
+
+
+def remove_shipment(pk, table=SEARCH_TABLE):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+
+
+def remove_shipments(pks, table=SEARCH_TABLE):
+    if not is_enabled() or not pks:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [[pk] for pk in pks])
+
+
+def rebuild_index():
+    """পুরো ইনডেক্স (বর্তমান ও আর্কাইভ) নতুন করে তৈরি করে, মোট ইনডেক্সড রো সংখ্যা রিটার্ন করে।"""
+    if not is_enabled():
+        return 0
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        create_index_table(cursor)
+        for model, table in SEARCH_TABLES.items():
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, so_number, lc_number, status) "
+                f"SELECT id, so_number, COALESCE(lc_number, ''), status FROM {model._meta.db_table}"
+            )
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            total += cursor.fetchone()[0]
+    return total
+
+
+# --- ২. কুয়েরি পার্সিং ---
+@dataclass
+class ParsedQuery:
+    terms: list = field(default_factory=list)
+    filters: Q = field(default_factory=Q)
+    errors: list = field(default_factory=list)
+
+    @property
+    def is_empty(self):
+        return not self.terms and not self.filters
+
+
+def _prefix_q(field_name, prefix):
+    """
+    UPPER(field) রেঞ্জ কুয়েরি — istartswith (LIKE) ইনডেক্স ব্যবহার করতে পারে না,
+    কিন্তু UPPER(so_number) এক্সপ্রেশন ইনডেক্স রেঞ্জ স্ক্যান করতে পারে।
+    """
+    low = prefix.upper()
+    high = low[:-1] + chr(ord(low[-1]) + 1)
+    column = Upper(field_name)
+    return Q(GreaterThanOrEqual(column, low)) & Q(LessThan(column, high))
+
+
+def _iexact_q(field_name, value):
+    return Q(Exact(Upper(field_name), value.upper()))
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def day_start(day):
+    """লোকাল টাইমজোনে দিনের শুরু (aware datetime), রেঞ্জ ফিল্টারের জন্য।"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_query(query):
+    """
+    সার্চ বক্সের টেক্সটকে টার্ম ও টাইপড ফিল্টারে ভাগ করে। উদাহরণ:
+    `so:SO-12`, `lc:LC778`, `status:fly`, `kg:>500`, `ctn:<=10`,
+    `from:2025-10-01`, `to:2025-10-31`, `date:2025-10-01..2025-10-31`
+    """
+    parsed = ParsedQuery()
+    for token in query.split():
+        key, sep, value = token.partition(':')
+        key = key.lower()
+        if not sep or key not in FIELD_PREFIXES or not value:
+            parsed.terms.append(token)
+            continue
+
+        if key == 'so':
+            parsed.filters &= _prefix_q('so_number', value)
+        elif key == 'lc':
+            parsed.filters &= _iexact_q('lc_number', value)
+        elif key == 'status':
+            valid = dict(Shipment.STATUS_CHOICES)
+            if value.lower() in valid:
+                parsed.filters &= Q(status=value.lower())
+            else:
+                parsed.errors.append(f"Unknown status '{value}'.")
+        elif key in ('kg', 'ctn'):
+            match = NUMERIC_RE.match(value)
+            if not match:
+                parsed.errors.append(f"Invalid number in '{token}'.")
+                continue
+            op, number = match.groups()
+            field_name = 'total_kg' if key == 'kg' else 'total_ctn'
+            number = float(number) if key == 'kg' else int(float(number))
+            parsed.filters &= Q(**{f'{field_name}__{NUMERIC_LOOKUPS[op]}': number})
+        else:
+            if key == 'from':
+                start, end = value, ''
+            elif key == 'to':
+                start, end = '', value
+            else:
+                start, _, end = value.partition('..')
+                end = end or start
+            start_day = _parse_date(start) if start else None
+            end_day = _parse_date(end) if end else None
+            if (start and not start_day) or (end and not end_day):
+                parsed.errors.append(f"Invalid date in '{token}' (use YYYY-MM-DD).")
+                continue
+            # __date ট্রান্সফর্ম এড়িয়ে সরাসরি রেঞ্জ, যাতে ইনডেক্স কাজে লাগে
+            if start_day:
+                parsed.filters &= Q(created_at__gte=day_start(start_day))
+            if end_day:
+                parsed.filters &= Q(created_at__lt=day_start(end_day + timedelta(days=1)))
+    return parsed
+
+
+def _match_expression(terms):
+    # প্রতিটি টার্ম ডাবল-কোটেড ফ্রেজ, যাতে ইউজারের ইনপুট FTS সিনট্যাক্স হিসেবে না পড়ে
+    return ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+# --- ৩. সার্চ ---
+def search_shipments(query, queryset=None):
+    """
+    র‍্যাঙ্ক করা QuerySet রিটার্ন করে। ফ্রি-টেক্সট টার্ম থাকলে FTS ইনডেক্স থেকে
+    bm25 র‍্যাঙ্ক অনুযায়ী সাজানো হয়, না হলে নতুনগুলো আগে। ArchivedShipment-এর কুয়েরিসেট দিলে
+    আর্কাইভের ইনডেক্সে খোঁজা হয়।
+    """
+    parsed = query if isinstance(query, ParsedQuery) else parse_query(query)
+    if queryset is None:
+        queryset = Shipment.objects.all()
+    queryset = queryset.select_related('created_by').filter(parsed.filters)
+
+    long_terms = [t for t in parsed.terms if len(t) >= MIN_TERM_LENGTH]
+    short_terms = [t for t in parsed.terms if len(t) < MIN_TERM_LENGTH]
+
+    for term in short_terms:
+        queryset = queryset.filter(_prefix_q('so_number', term) | _iexact_q('lc_number', term))
+
+    if long_terms and is_enabled():
+        shipment_table = queryset.model._meta.db_table
+        table = SEARCH_TABLES[queryset.model]
+        queryset = queryset.extra(
+            select={'search_rank': f'{table}.rank'},
+            tables=[table],
+            where=[f'{table}.rowid = {shipment_table}.id', f'{table} MATCH %s'],
+            params=[_match_expression(long_terms)],
+        )
+        return queryset.order_by('search_rank', '-created_at')
+
+    for term in long_terms:
+        queryset = queryset.filter(
+            Q(so_number__icontains=term) | Q(lc_number__icontains=term) | Q(status__icontains=term)
+        )
+    return queryset.order_by('-created_at')
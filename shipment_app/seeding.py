@@ -0,0 +1,176 @@
+# shipment_app/seeding.py
+
+import io
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.test.utils import override_settings
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from . import caching, rollups, search
+from .models import CustomerAccount, CustomUser, Shipment, ShipmentFile
+from .storage import document_storage
+
+SEED_PREFIX = 'SEED'
+SEED_ACCOUNT_NAME = 'Seed Customer '
+SAMPLE_PDF = (
+    b"%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+    b"2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n"
+    b"3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >> endobj\n"
+    b"trailer << /Root 1 0 R >>\n%%EOF\n"
+)
+
+
+@contextmanager
+def manual_timestamps():
+    """bulk_create-এ নিজের দেওয়া created_at রাখার জন্য auto_now_add সাময়িক বন্ধ।"""
+    field = Shipment._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+@contextmanager
+def scratch_storage():
+    """
+    বেঞ্চমার্ক রোলব্যাক হওয়া ট্রানজ্যাকশনে চলে, কিন্তু ফাইল ও ক্যাশ ট্রানজ্যাকশনের বাইরে: ডকুমেন্ট blob আর
+    প্রিভিউ একটি টেম্প ডিরেক্টরিতে লেখা হয় (শেষে মুছে ফেলা হয়), ক্যাশ লোকাল মেমরিতে — নইলে রোলব্যাক হওয়া
+    শিপমেন্টের pk-তে রাখা ফ্র্যাগমেন্ট পরে একই pk পাওয়া আসল শিপমেন্টে দেখা যেত।
+    """
+    root = tempfile.mkdtemp(prefix='shipment-bench-')
+    try:
+        with override_settings(
+            MEDIA_ROOT=os.path.join(root, 'media'),
+            PREVIEW_CACHE_DIR=os.path.join(root, 'previews'),
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench'},
+                'ratelimit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-ratelimit'},
+            },
+        ):
+            yield root
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def sample_documents():
+    """কয়েকটি ছোট নমুনা ফাইল — content-addressed স্টোরেজে সব রো এগুলোই শেয়ার করে।"""
+    names = []
+    for color in ('#ffc107', '#0d6efd', '#198754'):
+        image = Image.new('RGB', (600, 800), 'white')
+        ImageDraw.Draw(image).rectangle([40, 40, 560, 200], fill=color)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=70)
+        names.append(document_storage.save('shipment_files/sample.jpg', ContentFile(buffer.getvalue())))
+    names.append(document_storage.save('shipment_files/sample.pdf', ContentFile(SAMPLE_PDF)))
+    return names
+
+
+def seed_users(count):
+    users = []
+    roles = ['admin', 'editor', 'editor', 'viewer']
+    # পাসওয়ার্ড হ্যাশিং ধীর, তাই একবার হ্যাশ করে সবাইকে দেওয়া হয়
+    password = make_password('seed-password')
+    for i in range(count):
+        user, created = CustomUser.objects.get_or_create(
+            username=f"{SEED_PREFIX.lower()}-user-{i}", defaults={'role': roles[i % len(roles)]},
+        )
+        if created:
+            user.password = password
+            user.save(update_fields=['password'])
+        users.append(user)
+    return users
+
+
+def seed_accounts(count):
+    """অ্যাক্সেস আইডি SEED-000000, SEED-000001, ... (হ্যাশ করে রাখা); আইডি আর পড়া যায় না বলে নাম দিয়ে চেনা হয়।"""
+    existing = set(CustomerAccount.objects.filter(name__startswith=SEED_ACCOUNT_NAME).values_list('name', flat=True))
+    CustomerAccount.objects.bulk_create([
+        CustomerAccount(
+            name=f"{SEED_ACCOUNT_NAME}{i:04d}",
+            access_id_hash=CustomerAccount.hash_access_id(f"{SEED_PREFIX}-{i:06d}"),
+            finance_sheet_url=f"https://docs.google.com/spreadsheets/d/seed{i:06d}",
+        )
+        for i in range(count) if f"{SEED_ACCOUNT_NAME}{i:04d}" not in existing
+    ])
+    caching.invalidate_accounts()  # bulk_create সিগন্যাল পাঠায় না
+
+
+def seed_shipments(count, users, days=365, files_per_shipment=3, batch_size=5000, rng=None, progress=None):
+    """
+    count টি শিপমেন্ট (গত `days` দিনে ছড়ানো) ও তাদের ফাইল bulk_create করে।
+    পুরনো শিপমেন্ট বেশি করে arrived, সাম্প্রতিকগুলো pending/fly — বাস্তবের মতো।
+    """
+    rng = rng or random.Random()
+    now = timezone.now()
+    start = Shipment.objects.filter(so_number__startswith=f"{SEED_PREFIX}-").count()
+    documents = sample_documents() if files_per_shipment else []
+    file_types = [key for key, _ in ShipmentFile.FILE_TYPE_CHOICES]
+
+    created = 0
+    with manual_timestamps():
+        while created < count:
+            size = min(batch_size, count - created)
+            batch = []
+            for i in range(start + created, start + created + size):
+                age = timedelta(seconds=rng.randint(0, days * 86400))
+                age_days = age.days
+                if age_days > 14:
+                    status = 'arrived' if rng.random() < 0.9 else 'fly'
+                elif age_days > 3:
+                    status = rng.choice(['fly', 'fly', 'arrived', 'pending'])
+                else:
+                    status = rng.choice(['pending', 'pending', 'fly'])
+                batch.append(Shipment(
+                    so_number=f"{SEED_PREFIX}-{i:08d}",
+                    lc_number=f"LC{rng.randint(10000000, 99999999)}" if rng.random() < 0.7 else None,
+                    total_ctn=rng.randint(1, 300),
+                    total_kg=round(rng.lognormvariate(5, 1), 2),
+                    status=status,
+                    created_by=rng.choice(users) if users else None,
+                    created_at=now - age,
+                ))
+            with transaction.atomic():
+                shipments = Shipment.objects.bulk_create(batch)
+                if documents:
+                    files = []
+                    for shipment in shipments:
+                        for n in range(rng.randint(0, files_per_shipment)):
+                            document = rng.choice(documents)
+                            # নামের এক্সটেনশন আসল ফাইলের মতো (নমুনা PDF-কে .jpg বলা হয় না)
+                            files.append(ShipmentFile(
+                                shipment=shipment,
+                                file_type=file_types[n % len(file_types)],
+                                uploaded_file=document,
+                                original_name=f"{shipment.so_number}-{file_types[n % len(file_types)]}"
+                                              f"{os.path.splitext(document)[1]}",
+                            ))
+                    ShipmentFile.objects.bulk_create(files)
+            created += size
+            if progress:
+                progress(created)
+
+    # bulk_create সিগন্যাল পাঠায় না — ডিনর্মালাইজড টেবিলগুলো একবারে আপডেট
+    Shipment.objects.filter(so_number__startswith=f"{SEED_PREFIX}-").update(updated_at=F('created_at'))
+    search.rebuild_index()
+    rollups.rebuild()
+    caching.invalidate_shipment()
+    return created
+
+
+def delete_seed_data():
+    Shipment.objects.filter(so_number__startswith=f"{SEED_PREFIX}-").delete()
+    CustomerAccount.objects.filter(name__startswith=SEED_ACCOUNT_NAME).delete()
+    CustomUser.objects.filter(username__startswith=f"{SEED_PREFIX.lower()}-user-").delete()
+    search.rebuild_index()
+    rollups.rebuild()
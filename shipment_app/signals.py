@@ -0,0 +1,103 @@
+# shipment_app/signals.py
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import receiver
+
+from .models import ArchivedShipment, ArchivedShipmentFile, CustomerAccount, CustomUser, Shipment, ShipmentFile
+from . import caching, history, rollups, search
+
+
+# --- সার্চ ইনডেক্স সিঙ্ক ---
+@receiver(post_save, sender=Shipment)
+def update_search_index(sender, instance, **kwargs):
+    search.index_shipment(instance)
+
+
+@receiver(post_delete, sender=Shipment)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_shipment(instance.pk)
+
+
+@receiver(post_delete, sender=ArchivedShipment)
+def remove_from_archive_search_index(sender, instance, **kwargs):
+    search.remove_shipment(instance.pk, table=search.ARCHIVE_SEARCH_TABLE)
+
+
+# --- ড্যাশবোর্ড রোলআপ সিঙ্ক ---
+@receiver(pre_save, sender=Shipment)
+def remember_rollup_values(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None if raw else rollups.snapshot(instance)
+
+
+@receiver(post_save, sender=Shipment)
+def update_rollups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.record_save(instance, getattr(instance, '_rollup_previous', None))
+
+
+@receiver(post_delete, sender=Shipment)
+@receiver(post_delete, sender=ArchivedShipment)
+def remove_from_rollups(sender, instance, **kwargs):
+    # আর্কাইভে সরানো (archive.py) সিগন্যাল পাঠায় না; আর্কাইভ থেকে মুছলে তবেই রোলআপ থেকে বাদ
+    rollups.record_delete(instance)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def fold_user_rollups(sender, instance, **kwargs):
+    rollups.fold_creator(instance.pk)
+
+
+# --- স্ট্যাটাস হিস্টোরি (Shipment.save()-এর একই ট্রানজ্যাকশনে) ---
+@receiver(post_save, sender=Shipment)
+def record_status_event(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    previous_status = None if created or previous is None else previous['status']
+    # ভিউ থেকে কে বদলাল তা instance._status_changed_by-তে দেওয়া হয়
+    history.record_changes([(instance, previous_status)], user=getattr(instance, '_status_changed_by', None))
+
+
+# --- ডকুমেন্ট blob রেফারেন্স কাউন্টিং (আর্কাইভ করা ফাইলও blob ব্যবহার করে) ---
+@receiver(post_delete, sender=ShipmentFile)
+@receiver(post_delete, sender=ArchivedShipmentFile)
+def release_document_blob(sender, instance, **kwargs):
+    storage = instance.uploaded_file.storage
+    names = {field.name for field in (instance.uploaded_file, instance.original_file) if field.name}
+    if not names or not hasattr(storage, 'release'):
+        return
+
+    def release():
+        for name in names:
+            references = sum(
+                model.objects.filter(Q(uploaded_file=name) | Q(original_file=name)).count()
+                for model in (ShipmentFile, ArchivedShipmentFile)
+            )
+            storage.release(name, references)
+
+    # ট্রানজ্যাকশন রোলব্যাক হলে ফাইল যেন না মোছে
+    transaction.on_commit(release)
+
+
+# --- ফ্র্যাগমেন্ট ক্যাশ ইনভ্যালিডেশন (কমিটের পরে, যাতে অন্য রিকোয়েস্ট পুরনো ডেটা নতুন ভার্সনে ক্যাশ না করে) ---
+@receiver(post_save, sender=Shipment)
+@receiver(post_delete, sender=Shipment)
+def invalidate_shipment_fragments(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: caching.invalidate_shipment(pk))
+
+
+@receiver(post_save, sender=ShipmentFile)
+@receiver(post_delete, sender=ShipmentFile)
+def invalidate_file_fragments(sender, instance, **kwargs):
+    shipment_id = instance.shipment_id
+    transaction.on_commit(lambda: caching.invalidate_shipment(shipment_id))
+
+
+@receiver(post_save, sender=CustomerAccount)
+@receiver(post_delete, sender=CustomerAccount)
+def invalidate_account_cache(sender, instance, **kwargs):
+    transaction.on_commit(caching.invalidate_accounts)
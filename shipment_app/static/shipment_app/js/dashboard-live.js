@@ -0,0 +1,99 @@
+/* shipment_app/static/shipment_app/js/dashboard-live.js
+ * ড্যাশবোর্ড লাইভ: /events/shipments/ (SSE) থেকে নতুন শিপমেন্ট ও স্ট্যাটাস বদল এনে টেবিল ও KG কার্ড
+ * জায়গায় বদলায় — পেজ রিলোড (আর তার সাথে সব অ্যাগ্রিগেট কুয়েরি) লাগে না।
+ */
+(function () {
+    'use strict';
+
+    var page = document.querySelector('[data-live-url]');
+    if (!page || !window.EventSource) {
+        return;
+    }
+    var tbody = document.getElementById('recent-shipments');
+    var badge = document.querySelector('.live-badge');
+    var MAX_ROWS = 10;
+    var PILLS = {
+        fly: ['pill-fly', 'Fly ✅'],
+        arrived: ['pill-arrived', 'Arrived 📦'],
+        pending: ['pill-pending', 'Pending 🕒']
+    };
+
+    function cell(text, className) {
+        var td = document.createElement('td');
+        td.textContent = text;
+        if (className) {
+            td.className = className;
+        }
+        return td;
+    }
+
+    function pill(status) {
+        var info = PILLS[status] || PILLS.pending;
+        var span = document.createElement('span');
+        span.className = 'status-pill ' + info[0];
+        span.textContent = info[1];
+        return span;
+    }
+
+    function setStatus(row, status) {
+        var td = row.querySelector('.status-cell');
+        td.replaceChildren(pill(status));
+        row.classList.remove('live-flash');
+        void row.offsetWidth;  // অ্যানিমেশন আবার চালানোর জন্য reflow
+        row.classList.add('live-flash');
+    }
+
+    function addRow(event) {
+        var row = document.createElement('tr');
+        row.dataset.shipmentId = event.shipment_id;
+        row.appendChild(cell(event.so_number));
+        row.appendChild(cell(event.lc_number || 'N/A'));
+        row.appendChild(cell(event.total_ctn + ' CTN / ' + event.total_kg.toFixed(2) + ' KG'));
+        row.appendChild(cell('', 'status-cell'));
+        row.appendChild(cell(event.created_by || 'Admin'));
+        row.appendChild(cell('—', 'text-muted'));
+        var link = document.createElement('a');
+        link.className = 'view-link';
+        link.href = tbody.dataset.detailUrl.replace(/0\/$/, event.shipment_id + '/');
+        link.textContent = 'View';
+        var linkCell = cell('');
+        linkCell.appendChild(link);
+        row.appendChild(linkCell);
+
+        var empty = tbody.querySelector('.empty-row');
+        if (empty) {
+            empty.parentNode.remove();
+        }
+        tbody.prepend(row);
+        setStatus(row, event.status);
+        while (tbody.rows.length > MAX_ROWS) {
+            tbody.deleteRow(-1);
+        }
+        document.querySelectorAll('[data-live-kg]').forEach(function (el) {
+            var total = parseFloat(el.dataset.liveKg) + event.total_kg;
+            el.dataset.liveKg = total.toFixed(2);
+            el.textContent = el.dataset.liveKg + ' KG';
+        });
+    }
+
+    var source = new EventSource(page.dataset.liveUrl);
+    source.addEventListener('open', function () {
+        badge.hidden = false;
+    });
+    source.addEventListener('error', function () {
+        badge.hidden = true;  // ব্রাউজার নিজেই Last-Event-ID দিয়ে আবার যুক্ত হবে
+    });
+    source.addEventListener('reload', function () {
+        source.close();
+        window.location.reload();
+    });
+    source.addEventListener('shipment', function (message) {
+        var event = JSON.parse(message.data);
+        var row = tbody.querySelector('tr[data-shipment-id="' + event.shipment_id + '"]');
+        if (event.kind === 'created' && !row) {
+            addRow(event);
+        } else if (row) {
+            setStatus(row, event.status);
+        }
+    });
+})();
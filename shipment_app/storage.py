@@ -0,0 +1,94 @@
+# shipment_app/storage.py
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = 'blobs'
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(digest, original_name=''):
+    """blobs/ab/<sha256>.ext — এক্সটেনশন রাখা হয় যাতে ব্রাউজার সঠিক MIME টাইপ পায়।"""
+    ext = os.path.splitext(original_name)[1].lower()[:10]
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}{ext}"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    আপলোড করা ফাইল SHA-256 হ্যাশ অনুযায়ী একবারই সেভ হয়। একই বাইটের ফাইল আবার
+    আপলোড হলে নতুন কপি লেখা হয় না, আগের blob-এর নামই রিটার্ন হয়।
+    কোনো ShipmentFile আর ব্যবহার না করলে release() ফাইলটি মুছে দেয় (signals.py দেখুন)।
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # নাম পরে হ্যাশ থেকে ঠিক হবে, তাই র‍্যান্ডম সাফিক্সের দরকার নেই
+        return name
+
+    def _save(self, name, content):
+        os.makedirs(self.location, exist_ok=True)
+        digest = hashlib.sha256()
+        # হ্যাশ করার সময়ই একটি টেম্প ফাইলে লেখা হয় (একবার পড়েই কাজ শেষ)
+        fd, tmp_path = tempfile.mkstemp(prefix='.upload-', dir=self.location)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            final_name = blob_name(digest.hexdigest(), name)
+            final_path = self.path(final_name)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                # mkstemp 0600 পারমিশনে ফাইল বানায়
+                os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return final_name
+
+    def adopt(self, path):
+        """
+        MEDIA_ROOT-এর ভেতরের একটি বিদ্যমান ফাইলকে blob-এ সরায় (dedup_media কমান্ডের জন্য)।
+        রিটার্ন: (blob নাম, মুছে ফেলা ডুপ্লিকেট বাইট)।
+        """
+        final_name = blob_name(hash_file(path), path)
+        final_path = self.path(final_name)
+        if os.path.abspath(path) == os.path.abspath(final_path):
+            return final_name, 0
+        if os.path.exists(final_path):
+            size = os.path.getsize(path)
+            os.remove(path)
+            return final_name, size
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(path, final_path)
+        return final_name, 0
+
+    def release(self, name, reference_count):
+        """reference_count শূন্য হলে blob মুছে ফেলে।"""
+        if reference_count == 0 and name.startswith(f"{BLOB_DIR}/") and self.exists(name):
+            self.delete(name)
+            return True
+        return False
+
+
+document_storage = ContentAddressedStorage()
+
+
+def get_document_storage():
+    return document_storage
@@ -0,0 +1,41 @@
+# shipment_app/templatetags/fragment_cache.py
+
+from django import template
+
+from shipment_app import caching
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        value = caching.get_fragment(self.fragment_name, vary_on)
+        if value is None:
+            value = self.nodelist.render(context)
+            caching.set_fragment(self.fragment_name, vary_on, value)
+        return value
+
+
+@register.tag('fragment_cache')
+def do_fragment_cache(parser, token):
+    """
+    {% fragment_cache "name" version other_key ... %} ... {% endfragment_cache %}
+
+    Django-র {% cache %}-এর মতো, তবে টাইমআউট সেটিংস থেকে নেয় আর হিট/মিস গোনে।
+    vary_on-এ caching.data_version()/shipment_version() দিলে সিগন্যালেই বাতিল হয়।
+    """
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    name = bits[1]
+    if name[0] == name[-1] and name[0] in ('"', "'"):
+        name = name[1:-1]
+    return FragmentCacheNode(nodelist, name, [parser.compile_filter(bit) for bit in bits[2:]])
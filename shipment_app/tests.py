@@ -1,3 +1,1511 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import logging
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+import unittest
+from xml.etree import ElementTree
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import ExifTags, Image
+
+from . import (
+    caching, documents, exports, finance, history, imports, jobs, live, media, previews, reports, rollups, search,
+    seeding,
+)
+from . import middleware as request_metrics
+from .models import (
+    ArchivedShipment, BackgroundJob, CustomerAccount, CustomUser, Shipment, ShipmentDailyRollup, ShipmentFile,
+    ShipmentStatusEvent, ShipmentTransitStat,
+)
+
+FULL_SCAN_RE = re.compile(r'^SCAN (shipment_app_\w+)$')
+
+
+def full_scans(sql):
+    """EXPLAIN QUERY PLAN-এ কোনো অ্যাপ টেবিলের ইনডেক্স ছাড়া পুরো স্ক্যান থাকলে সেগুলো রিটার্ন করে।"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[-1] for row in cursor.fetchall()]
+    return [detail for detail in details if FULL_SCAN_RE.match(detail.strip())]
+
+
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'ratelimit': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+LOCMEM_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+    'ratelimit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-ratelimit'},
+}
+# টেস্টে collectstatic চালানো থাকে না, তাই manifest (হ্যাশ করা নাম) ছাড়া সাধারণ স্ট্যাটিক স্টোরেজ
+PLAIN_STATIC = override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+def setUpModule():
+    PLAIN_STATIC.enable()
+
+
+def tearDownModule():
+    PLAIN_STATIC.disable()
+
+
+@unittest.skipUnless(search.is_enabled(), "FTS5 index is SQLite-only")
+class SearchTests(TestCase):
+    """FTS ইনডেক্সের ফলাফল icontains ফলব্যাকের সাথে হুবহু মেলে; সেভ/ডিলিটে ইনডেক্স সাথে সাথে বদলায়।"""
+
+    QUERIES = [
+        'SO-SRCH', 'srch-1', 'LC7788', 'c778', 'arriv', 'status:fly srch', 'SO-SRCH-1 LC', 'AB',
+        'nothing-here', '"quoted"', 'kg:>5 srch',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        for i, (lc, status) in enumerate([('LC77881', 'pending'), (None, 'fly'), ('lc77882', 'arrived'), ('AB12', 'fly')]):
+            Shipment.objects.create(so_number=f'SO-SRCH-{i}', lc_number=lc, total_ctn=1, total_kg=i * 5, status=status)
+        Shipment.objects.create(so_number='AB-"QUOTED"', total_ctn=1, total_kg=1)
+
+    def ids(self, query):
+        return sorted(search.search_shipments(query).values_list('so_number', flat=True))
+
+    def test_fts_matches_icontains_fallback(self):
+        for query in self.QUERIES:
+            with self.subTest(query=query):
+                fts = self.ids(query)
+                with mock.patch.object(search, 'is_enabled', return_value=False):
+                    self.assertEqual(fts, self.ids(query))
+        self.assertEqual(self.ids('c778'), ['SO-SRCH-0', 'SO-SRCH-2'])
+
+    def test_index_follows_save_and_delete(self):
+        shipment = Shipment.objects.get(so_number='SO-SRCH-1')
+        shipment.lc_number = 'LC99000'
+        shipment.save()
+        self.assertEqual(self.ids('c990'), ['SO-SRCH-1'])
+        shipment.delete()
+        self.assertEqual(self.ids('c990'), [])
+        self.assertNotIn('SO-SRCH-1', self.ids('SO-SRCH'))
+
+
+class RollupTests(TestCase):
+    """save/delete/bulk সবক্ষেত্রে দৈনিক রোলআপ কাঁচা টেবিলের সাথে মেলে; প্রতি কী-তে একটিই রো।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.editor = CustomUser.objects.create_user('rollup-editor', password='pw', role='editor')
+
+    def test_save_and_delete_keep_rollups_in_step(self):
+        first = Shipment.objects.create(so_number='SO-ROLL-1', total_ctn=2, total_kg=10.5, created_by=self.editor)
+        second = Shipment.objects.create(so_number='SO-ROLL-2', total_ctn=3, total_kg=4)
+        today = timezone.localdate()
+        self.assertEqual(rollups.totals(today), {'kg': 14.5, 'ctn': 5, 'count': 2})
+
+        first.status, first.total_kg = 'fly', 20
+        first.save()
+        second.delete()
+        self.assertEqual(rollups.totals(today, status='fly'), {'kg': 20, 'ctn': 2, 'count': 1})
+        self.assertEqual(rollups.totals(today, status='pending')['count'], 0)
+        self.assertEqual(rollups.find_mismatches(), [])
+
+        rollups.record_bulk([(None, rollups.snapshot(first))])
+        self.assertEqual(len(rollups.find_mismatches()), 1)
+        rollups.rebuild()
+        self.assertEqual(rollups.find_mismatches(), [])
+
+    def test_one_row_per_key(self):
+        Shipment.objects.create(so_number='SO-ROLL-3', total_ctn=1, total_kg=1)
+        row = ShipmentDailyRollup.objects.get()
+        # ক্রিয়েটর ছাড়া (NULL) রো-ও দ্বিতীয়বার তৈরি হয় না
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ShipmentDailyRollup.objects.create(day=row.day, status=row.status, created_by=None)
+
+        # অন্য ট্রানজ্যাকশন রো বানিয়ে ফেলেছে কিন্তু আমাদের UPDATE তা দেখেনি — create ব্যর্থ হয়ে সেই রো-তেই যোগ
+        update = QuerySet.update
+        missed = []
+
+        def update_missing_first_time(queryset, **kwargs):
+            if not missed:
+                missed.append(True)
+                return 0
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update_missing_first_time):
+            rollups._apply((row.day, row.status, None), 5, 2, 1)
+        row = ShipmentDailyRollup.objects.get()
+        self.assertEqual((row.total_kg, row.total_ctn, row.shipment_count), (6, 3, 2))
+
+    def test_deleting_user_folds_rows_into_no_creator_row(self):
+        Shipment.objects.create(so_number='SO-ROLL-4', total_ctn=1, total_kg=2)
+        Shipment.objects.create(so_number='SO-ROLL-5', total_ctn=3, total_kg=4, created_by=self.editor)
+        self.editor.delete()
+        row = ShipmentDailyRollup.objects.get()
+        self.assertEqual((row.created_by_id, row.total_kg, row.total_ctn, row.shipment_count), (None, 6, 4, 2))
+        self.assertEqual(rollups.find_mismatches(), [])
+
+
+class ReportExportTests(TestCase):
+    """স্ট্রিমিং রিপোর্ট: CSV, gzip আর XLSX তিনটিই একই রো দেয়, XLSX আসল ZIP/XML হিসেবে খোলে।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('report-admin', password='pw', role='admin')
+        for i in range(5):
+            Shipment.objects.create(
+                so_number=f'SO-REP-{i}', lc_number='LC<&>"1"' if i == 0 else None, total_ctn=i + 1,
+                total_kg=i * 1.5, status='fly', created_by=cls.admin,
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def download(self, **params):
+        response = self.client.get(reverse('download_report_csv'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_and_gzip_match_rows(self):
+        _, body = self.download()
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], exports.REPORT_HEADER)
+        self.assertEqual([row[0] for row in rows[1:]], [f'SO-REP-{i}' for i in reversed(range(5))])
+        self.assertEqual(rows[-1][1], 'LC<&>"1"')
+
+        response, compressed = self.download(gzip='on')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('shipment_report.csv.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(compressed), body)
+
+    def test_xlsx_unzips_and_parses(self):
+        _, body = self.download(format='xlsx')
+        with zipfile.ZipFile(io.BytesIO(body)) as workbook:
+            self.assertIsNone(workbook.testzip())
+            self.assertIn('[Content_Types].xml', workbook.namelist())
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        ns = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = [
+            [cell.findtext('x:v', namespaces=ns) or cell.findtext('x:is/x:t', namespaces=ns)
+             for cell in row.findall('x:c', ns)]
+            for row in sheet.iterfind('x:sheetData/x:row', ns)
+        ]
+        expected = [list(exports.REPORT_HEADER)] + [[str(v) for v in row] for row in exports.report_rows()]
+        self.assertEqual(rows, expected)
+
+    def test_xlsx_streams_in_batches(self):
+        chunks = list(exports.stream_xlsx(exports.report_rows(), batch_rows=2))
+        self.assertGreater(len([chunk for chunk in chunks if chunk]), 3)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as workbook:
+            self.assertIn(b'SO-REP-0', workbook.read('xl/worksheets/sheet1.xml'))
+
+
+class ShipmentFileQueryTests(TestCase):
+    """with_file_counts() টাইপভিত্তিক সংখ্যা দেয়, with_files() সব শিপমেন্টের ফাইল একটি কুয়েরিতে আনে।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        first = Shipment.objects.create(so_number='SO-FILES-1', total_ctn=1, total_kg=1)
+        Shipment.objects.create(so_number='SO-FILES-2', total_ctn=1, total_kg=1)
+        third = Shipment.objects.create(so_number='SO-FILES-3', total_ctn=1, total_kg=1)
+        for shipment, file_type, name in [
+            (first, 'receipt', 'r1.pdf'), (first, 'receipt', 'r2.pdf'), (first, 'awb', 'a1.pdf'),
+            (third, 'packing', 'p1.pdf'),
+        ]:
+            ShipmentFile.objects.create(
+                shipment=shipment, file_type=file_type, uploaded_file=f'blobs/00/{name}', original_name=name,
+            )
+
+    def test_file_counts_per_type(self):
+        counts = {
+            s.so_number: (s.receipt_count, s.packing_count, s.awb_count)
+            for s in Shipment.objects.with_file_counts()
+        }
+        self.assertEqual(counts, {'SO-FILES-1': (2, 0, 1), 'SO-FILES-2': (0, 0, 0), 'SO-FILES-3': (0, 1, 0)})
+
+    def test_with_files_prefetches_in_one_query(self):
+        with self.assertNumQueries(2):
+            grouped = {
+                s.so_number: [f.original_name for f in s.receipt_files + s.packing_files + s.awb_files]
+                for s in Shipment.objects.with_files().order_by('so_number')
+            }
+        self.assertEqual(grouped, {'SO-FILES-1': ['r1.pdf', 'r2.pdf', 'a1.pdf'], 'SO-FILES-2': [], 'SO-FILES-3': ['p1.pdf']})
+
+
+class DedupMediaTests(TestCase):
+    """
+    dedup_media পুরনো ফাইল blob-এ সরায়; শুধু ডকুমেন্ট ডিরেক্টরির পুরনো, রেফারেন্সহীন ফাইল মোছে।
+    শেয়ার করা blob শেষ রেফারেন্স মুছে কমিট হলে তবেই মোছে।
+    """
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.shipment = Shipment.objects.create(so_number='SO-DEDUP', total_ctn=1, total_kg=1)
+
+    def write(self, name, content, age=0):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(content)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_adopts_duplicates_and_deletes_only_old_orphans(self):
+        day = 24 * 60 * 60
+        for name in ('a.pdf', 'b.pdf'):
+            self.write(f'shipment_files/{name}', b'%PDF same bytes', age=day)
+            ShipmentFile.objects.create(shipment=self.shipment, file_type='awb', uploaded_file=f'shipment_files/{name}')
+        old_orphan = self.write('blobs/00/old-orphan.pdf', b'old', age=day)
+        # সদ্য সেভ হওয়া blob — আপলোডের রো হয়তো এখনো লেখা হয়নি
+        fresh_blob = self.write('blobs/11/in-flight.pdf', b'fresh')
+        # ডকুমেন্ট স্টোরেজের বাইরের ডিরেক্টরি
+        other = self.write('thumbnails/other.jpg', b'not ours', age=day)
+
+        out = io.StringIO()
+        call_command('dedup_media', '--delete-orphans', stdout=out)
+
+        names = set(ShipmentFile.objects.values_list('uploaded_file', flat=True))
+        self.assertEqual(len(names), 1)
+        blob = names.pop()
+        self.assertTrue(blob.startswith('blobs/'))
+        self.assertTrue(os.path.exists(os.path.join(self.media, blob)))
+        self.assertFalse(os.path.exists(os.path.join(self.media, 'shipment_files/a.pdf')))
+        self.assertFalse(os.path.exists(old_orphan))
+        self.assertTrue(os.path.exists(fresh_blob))
+        self.assertTrue(os.path.exists(other))
+        self.assertIn('2 files moved to blob storage, 15 duplicate bytes freed', out.getvalue())
+        self.assertIn('1 unreferenced files (3 bytes) deleted', out.getvalue())
+
+    def test_dry_run_reports_without_deleting(self):
+        orphan = self.write('originals/forgotten.jpg', b'orphan', age=2 * 60 * 60)
+        out = io.StringIO()
+        call_command('dedup_media', '--delete-orphans', '--dry-run', '--grace-minutes', '30', stdout=out)
+        self.assertIn('Unreferenced: originals/forgotten.jpg', out.getvalue())
+        self.assertTrue(os.path.exists(orphan))
+
+    def test_blob_released_only_at_zero_references(self):
+        storage = ShipmentFile._meta.get_field('uploaded_file').storage
+        name = storage.save('shipment_files/a.pdf', ContentFile(b'%PDF shared'))
+        self.assertEqual(storage.save('shipment_files/b.pdf', ContentFile(b'%PDF shared')), name)
+        first, second = [
+            ShipmentFile.objects.create(shipment=self.shipment, file_type='awb', uploaded_file=name)
+            for _ in range(2)
+        ]
+        path = os.path.join(self.media, name)
+
+        # রোলব্যাক হওয়া ডিলিট ফাইল মোছে না
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                ShipmentFile.objects.filter(shipment=self.shipment).delete()
+                raise IntegrityError
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+
+
+class JobQueueTests(TestCase):
+    """claim() ঠিক যে জবটি লক করেছে সেটাই ফেরত দেয়; ব্যর্থ জব পিছিয়ে আবার চলে, শেষে failed।"""
+
+    def setUp(self):
+        self.calls = []
+
+        def flaky(fail=False, tag=''):
+            self.calls.append(tag)
+            if fail:
+                raise RuntimeError('boom')
+
+        jobs.HANDLERS['test_flaky'] = flaky
+        self.addCleanup(jobs.HANDLERS.pop, 'test_flaky')
+
+    def test_same_worker_id_claims_distinct_jobs(self):
+        first = jobs.enqueue('test_flaky', tag='first')
+        second = jobs.enqueue('test_flaky', tag='second')
+        # inline মোডের মতো একই worker_id থেকে পরপর দুটি claim, কোনোটি শেষ হওয়ার আগে
+        claimed = [jobs.claim('inline'), jobs.claim('inline')]
+        self.assertEqual([job.pk for job in claimed], [first.pk, second.pk])
+        self.assertIsNone(jobs.claim('inline'))
+        self.assertIsNone(jobs.claim('inline', job_id=first.pk))
+
+        for job in reversed(claimed):
+            jobs.run_claimed(job)
+        self.assertEqual(self.calls, ['second', 'first'])
+        self.assertEqual(set(BackgroundJob.objects.values_list('status', flat=True)), {'done'})
+
+    def test_failed_job_retries_then_fails(self):
+        job = jobs.enqueue('test_flaky', fail=True)
+        with self.assertLogs('shipment_app.jobs', 'ERROR'):
+            job = jobs.run_claimed(jobs.claim('w1'))
+        self.assertEqual((job.status, job.attempts, job.locked_by), ('queued', 1, ''))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+        # পিছিয়ে দেওয়া জব সময় না হলে নেওয়া হয় না
+        self.assertIsNone(jobs.claim('w1'))
+
+        for _ in range(job.max_attempts - 1):
+            BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            with self.assertLogs('shipment_app.jobs', 'ERROR'):
+                job = jobs.run_claimed(jobs.claim('w1'))
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(SHIPMENT_JOBS_INLINE=True)
+    def test_inline_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = jobs.enqueue('test_flaky', tag='inline')
+            self.assertEqual(self.calls, [])
+        self.assertEqual(self.calls, ['inline'])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('done', ''))
+
+
+    def test_process_shipment_files_records_metadata(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        shipment = Shipment.objects.create(so_number='SO-JOB-1', total_ctn=1, total_kg=1)
+        pdf = b'%PDF-1.4 /Type /Pages /Count 2 /Type /Page /MediaBox [0 0 595 842] /Type /Page'
+        document = ShipmentFile.objects.create(
+            shipment=shipment, file_type='awb', uploaded_file=ContentFile(pdf, name='awb.pdf'),
+        )
+        jobs.run_claimed(jobs.claim('w1', job_id=jobs.enqueue('process_shipment_files', file_ids=[document.pk]).pk))
+
+        document.refresh_from_db()
+        self.assertEqual(document.sha256, os.path.splitext(os.path.basename(document.uploaded_file.name))[0])
+        self.assertEqual((document.size, document.page_count, document.width, document.height), (len(pdf), 2, 595, 842))
+        self.assertIsNotNone(document.processed_at)
+
+    def test_failed_report_build_keeps_next_run(self):
+        job = jobs.enqueue('build_reports', every_minutes=5)
+        with mock.patch.object(reports, 'build_reports', side_effect=RuntimeError('boom')), \
+                self.assertLogs('shipment_app.jobs', 'ERROR'):
+            jobs.run_claimed(jobs.claim('reports-test', job_id=job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        # পরের নির্ধারিত রান রোলব্যাকে হারায় না
+        successor = BackgroundJob.objects.exclude(pk=job.pk).get(name='build_reports')
+        self.assertEqual((successor.status, successor.payload), ('queued', {'every_minutes': 5}))
+
+
+class PreviewCacheTests(TestCase):
+    """প্রিভিউ একবার বানিয়ে ডিস্ক ক্যাশ থেকে দেওয়া হয়; আনুমানিক সাইজ বাজেট ছাড়ালে তবেই LRU evict।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = CustomUser.objects.create_user('preview-viewer', password='pw', role='viewer')
+
+    def setUp(self):
+        media_root, self.cache = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.addCleanup(shutil.rmtree, self.cache, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, PREVIEW_CACHE_DIR=self.cache))
+        shipment = Shipment.objects.create(so_number='SO-PREVIEW', total_ctn=1, total_kg=1)
+        self.files = []
+        for i in range(3):
+            buffer = io.BytesIO()
+            Image.effect_noise((400, 400), 80).convert('RGB').save(buffer, format='PNG')
+            self.files.append(ShipmentFile.objects.create(
+                shipment=shipment, file_type='receipt', uploaded_file=ContentFile(buffer.getvalue(), name=f'{i}.png'),
+            ))
+        self.client.force_login(self.viewer)
+
+    def test_miss_hit_and_regenerate_after_eviction(self):
+        url = reverse('file_preview', args=[self.files[0].pk, 'sm'])
+        with mock.patch.object(previews, 'render_preview', wraps=previews.render_preview) as render:
+            first = self.client.get(url, HTTP_ACCEPT='image/webp')
+            second = self.client.get(url, HTTP_ACCEPT='image/webp')
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual((first['Content-Type'], first['ETag']), ('image/webp', second['ETag']))
+            self.assertEqual(b''.join(first.streaming_content), b''.join(second.streaming_content))
+            response = self.client.get(url, HTTP_ACCEPT='image/webp', HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+            # অন্য ওয়ার্কার ফাইলটি মুছে দিলে 500 নয়, আবার বানানো হয়
+            shutil.rmtree(self.cache)
+            response = self.client.get(url, HTTP_ACCEPT='image/webp')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content)[:4], b'RIFF')
+            self.assertEqual(render.call_count, 2)
+
+    def test_evicts_oldest_only_when_estimate_exceeds_budget(self):
+        preview, _ = previews.open_preview(self.files[0], 'md', 'jpeg')
+        size = len(preview.read())
+        first_path = os.path.join(self.cache, os.listdir(self.cache)[0])
+        first_path = os.path.join(first_path, os.listdir(first_path)[0])
+        os.utime(first_path, (time.time() - 60, time.time() - 60))
+
+        with override_settings(PREVIEW_CACHE_MAX_BYTES=int(size * 2.5)), \
+                mock.patch.object(previews, 'evict', wraps=previews.evict) as evict:
+            previews.open_preview(self.files[1], 'md', 'jpeg')[0].close()
+            self.assertEqual(evict.call_count, 0)
+            previews.open_preview(self.files[2], 'md', 'jpeg')[0].close()
+            self.assertEqual(evict.call_count, 1)
+            # হিট নতুন কিছু লেখে না, তাই স্ক্যানও হয় না
+            previews.open_preview(self.files[2], 'md', 'jpeg')[0].close()
+            self.assertEqual(evict.call_count, 1)
+        self.assertFalse(os.path.exists(first_path))
+        cached = [name for _, _, names in os.walk(self.cache) for name in names]
+        self.assertEqual(len(cached), 2)
+
+
+class ShipmentListApiTests(TestCase):
+    """কীসেট পেজিনেশন, fields= বাছাই, ভুল প্যারামিটারে 400, আর ETag দিয়ে 304।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('api-admin', password='pw', role='admin')
+        start = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            shipment = Shipment.objects.create(so_number=f'SO-API-{i}', total_ctn=i + 1, total_kg=1, created_by=cls.admin)
+            # দুটি রো একই created_at-এ, যাতে id দিয়ে টাই ভাঙা যাচাই হয়
+            Shipment.objects.filter(pk=shipment.pk).update(created_at=start + timedelta(minutes=min(i, 3)))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse('shipment_list_api')
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(self.url, params).json()
+            seen += [row['so_number'] for row in data['results']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, ['SO-API-4', 'SO-API-3', 'SO-API-2', 'SO-API-1', 'SO-API-0'])
+
+    def test_fields_and_bad_parameters(self):
+        data = self.client.get(self.url, {'fields': 'so_number,created_by', 'limit': 1}).json()
+        self.assertEqual(data['results'], [{'so_number': 'SO-API-4', 'created_by': 'api-admin'}])
+        self.assertEqual(self.client.get(self.url, {'fields': 'so_number,secret'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': 'ten'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+
+    def test_etag_revalidation(self):
+        params = {'limit': 2}
+        response = self.client.get(self.url, params)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # পেজের একটি রো মুছলে পরের পেজের পুরনো রো ঢোকে — updated_at না বাড়লেও পেজ বদলেছে
+        Shipment.objects.get(so_number='SO-API-4').delete()
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['so_number'] for row in response.json()['results']], ['SO-API-3', 'SO-API-2'])
+
+
+class SeedingTests(TestCase):
+    """বেঞ্চমার্কের seed ডেটা: রোলআপ ও নাম ঠিক থাকে, আর ফাইল/ক্যাশ টেম্প জায়গায় থেকে শেষে মুছে যায়।"""
+
+    def test_seed_shipments_in_scratch_storage(self):
+        with seeding.scratch_storage() as root:
+            users = seeding.seed_users(2)
+            self.assertEqual(seeding.seed_shipments(40, users, files_per_shipment=3, rng=random.Random(3)), 40)
+            self.assertTrue(settings.MEDIA_ROOT.startswith(root))
+            files = list(ShipmentFile.objects.all())
+            self.assertTrue(files)
+            for shipment_file in files:
+                self.assertTrue(os.path.exists(os.path.join(root, 'media', shipment_file.uploaded_file.name)))
+                # নামের এক্সটেনশন blob-এর সাথে মেলে (PDF নমুনা .pdf)
+                self.assertEqual(os.path.splitext(shipment_file.original_name)[1],
+                                 os.path.splitext(shipment_file.uploaded_file.name)[1])
+            self.assertIn('.pdf', {os.path.splitext(f.original_name)[1] for f in files})
+            self.assertEqual(rollups.find_mismatches(), [])
+            self.assertEqual(rollups.totals(timezone.localdate() - timedelta(days=366))['count'], 40)
+
+        self.assertFalse(os.path.exists(root))
+        self.assertFalse(settings.MEDIA_ROOT.startswith(root))
+        seeding.delete_seed_data()
+        self.assertFalse(Shipment.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite-specific")
+@override_settings(CACHES=NO_CACHE)  # ফ্র্যাগমেন্ট ক্যাশ কুয়েরিগুলো লুকিয়ে না ফেলে
+class QueryPlanTests(TestCase):
+    """প্রতিটি ভিউয়ের কুয়েরি ইনডেক্স ব্যবহার করছে কিনা (ফুল টেবিল স্ক্যান হলে টেস্ট ফেল)।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('plan-admin', password='pw', role='admin')
+        editor = CustomUser.objects.create_user('plan-editor', password='pw', role='editor')
+        statuses = [key for key, _ in Shipment.STATUS_CHOICES]
+        Shipment.objects.bulk_create([
+            Shipment(
+                so_number=f"SO-{i:05d}",
+                lc_number=f"LC{i % 97:04d}" if i % 3 else None,
+                total_ctn=i % 50 + 1,
+                total_kg=(i % 400) * 2.5,
+                status=statuses[i % 3],
+                created_by=cls.admin if i % 2 else editor,
+            )
+            for i in range(600)
+        ])
+        cls.shipment = Shipment.objects.order_by('id').first()
+        ShipmentFile.objects.bulk_create([
+            ShipmentFile(shipment_id=pk, file_type=file_type, uploaded_file=f"blobs/00/{pk}-{file_type}.pdf")
+            for pk in Shipment.objects.values_list('pk', flat=True)[:200]
+            for file_type in ('receipt', 'packing', 'awb')
+        ])
+        CustomerAccount.objects.bulk_create([
+            CustomerAccount(
+                name=f"Customer {i}", access_id_hash=CustomerAccount.hash_access_id(f"ACCESS-{i}"),
+                finance_sheet_url="https://example.com",
+            )
+            for i in range(20)
+        ])
+        search.rebuild_index()
+        rollups.rebuild()
+        reports.build_reports(full=True)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertNoFullScans(self, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertIn(response.status_code, (200, 304))
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            scans = full_scans(sql)
+            self.assertFalse(scans, f"{url} {data or ''}: full scan {scans} in\n{sql}")
+
+    def test_dashboard(self):
+        self.assertNoFullScans(reverse('dashboard'))
+
+    def test_search(self):
+        today = timezone.localdate()
+        for query in ['SO-0004', 'LC0012', 'lc:lc0012', 'status:fly', 'so:so-001', 'status:pending kg:>100',
+                      f'from:{today - timedelta(days=7)} to:{today}', 'SO']:
+            with self.subTest(query=query):
+                self.assertNoFullScans(reverse('search_shipment'), {'q': query})
+
+    def test_shipment_detail(self):
+        self.assertNoFullScans(reverse('shipment_detail', args=[self.shipment.pk]))
+
+    def test_shipment_list_api(self):
+        url = reverse('shipment_list_api')
+        self.assertNoFullScans(url)
+        self.assertNoFullScans(url, {'status': 'fly', 'limit': 20})
+        cursor = self.client.get(url, {'limit': 100}).json()['next_cursor']
+        self.assertNoFullScans(url, {'cursor': cursor})
+
+    def test_filtered_report(self):
+        today = timezone.localdate()
+        self.assertNoFullScans(reverse('download_report_csv'), {
+            'start_date': today - timedelta(days=30), 'end_date': today, 'status': 'fly',
+        })
+
+    def test_account_list(self):
+        self.assertNoFullScans(reverse('account_list'))
+
+    def test_transit_analytics(self):
+        self.assertNoFullScans(reverse('transit_analytics'))
+
+    def test_period_reports(self):
+        self.assertNoFullScans(reverse('period_reports'), {'period': 'month', 'group_by': 'creator'})
+
+    def test_job_claim(self):
+        BackgroundJob.objects.bulk_create([BackgroundJob(name='process_shipment_files') for _ in range(50)])
+        with CaptureQueriesContext(connection) as ctx:
+            jobs.claim('plan-test')
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if sql.lstrip().upper().startswith(('SELECT', 'UPDATE')):
+                self.assertFalse(full_scans(sql), sql)
+
+
+@override_settings(CACHES=NO_CACHE, SLOW_REQUEST_MS=0)
+class RequestMetricsTests(TestCase):
+    """মিডলওয়্যার Server-Timing দেয়, ধীর রিকোয়েস্ট লগ করে ও ভিউ অনুযায়ী স্ট্যাটস জমায়।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('metrics-admin', password='pw', role='admin')
+
+    def setUp(self):
+        request_metrics.reset()
+        self.addCleanup(request_metrics.reset)
+        self.client.force_login(self.admin)
+
+    def test_server_timing_slow_log_and_stats(self):
+        with self.assertLogs('shipment_app.slow_requests', 'WARNING') as logs:
+            response = self.client.get(reverse('dashboard'))
+        match = re.fullmatch(
+            r'db;dur=([\d.]+);desc="(\d+) queries", tpl;dur=([\d.]+), total;dur=([\d.]+)', response['Server-Timing'],
+        )
+        self.assertIsNotNone(match, response['Server-Timing'])
+        self.assertGreater(int(match.group(2)), 0)
+        self.assertGreater(float(match.group(3)), 0)
+        self.assertIn('view=dashboard', logs.output[0])
+
+        row = next(row for row in request_metrics.snapshot() if row['view'] == 'dashboard')
+        self.assertEqual((row['count'], row['slow']), (1, 1))
+
+    def test_template_time_counted_only_inside_a_request(self):
+        template = engines['django'].from_string('{{ value }}')
+        self.assertIsInstance(template, request_metrics.TimedTemplate)
+        self.assertEqual(template.render({'value': 'outside'}), 'outside')
+
+        metrics = request_metrics.RequestMetrics()
+        token = request_metrics._current.set(metrics)
+        try:
+            template.render({'value': 'inside'})
+        finally:
+            request_metrics._current.reset(token)
+        self.assertGreater(metrics.template_time, 0)
+
+    def test_slow_log_directory_created_on_first_write(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, 'logs', 'slow_requests.log')
+        handler = request_metrics.LazyRotatingFileHandler(path, delay=True)
+        self.addCleanup(handler.close)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+        handler.emit(logging.makeLogRecord({'msg': 'slow'}))
+        with open(path) as fh:
+            self.assertEqual(fh.read(), 'slow\n')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FragmentCacheTests(TestCase):
+    """ড্যাশবোর্ড/ডিটেইল ফ্র্যাগমেন্ট দ্বিতীয়বার ক্যাশ থেকে আসে এবং ডেটা বদলালে বাতিল হয়।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('cache-admin', password='pw', role='admin')
+        cls.shipment = Shipment.objects.create(
+            so_number='SO-CACHE-1', total_ctn=3, total_kg=12.5, status='pending', created_by=cls.admin,
+        )
+
+    def setUp(self):
+        caching.reset()
+        self.client.force_login(self.admin)
+
+    def query_count(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_dashboard_served_from_cache_and_invalidated_on_save(self):
+        url = reverse('dashboard')
+        _, cold = self.query_count(url)
+        response, warm = self.query_count(url)
+        self.assertLess(warm, cold)
+        self.assertContains(response, 'SO-CACHE-1')
+        self.assertEqual({row['fragment']: row['hits'] for row in caching.counters()},
+                         {'dashboard_summary': 1, 'dashboard_recent': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Shipment.objects.create(so_number='SO-CACHE-2', total_ctn=1, total_kg=1, created_by=self.admin)
+        response, _ = self.query_count(url)
+        self.assertContains(response, 'SO-CACHE-2')
+
+    def test_detail_invalidated_when_file_added(self):
+        url = reverse('shipment_detail', args=[self.shipment.pk])
+        self.query_count(url)
+        response, _ = self.query_count(url)
+        self.assertNotContains(response, 'invoice.pdf')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ShipmentFile.objects.create(
+                shipment=self.shipment, file_type='receipt',
+                uploaded_file='blobs/00/invoice.pdf', original_name='invoice.pdf',
+            )
+        response, _ = self.query_count(url)
+        self.assertContains(response, 'invoice.pdf')
+
+    def test_upload_invalidates_only_after_commit(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        pdf = SimpleUploadedFile('awb.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        with mock.patch.object(caching, 'invalidate_shipment') as invalidate:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.client.post(reverse('add_shipment'), {
+                    'so_number': 'SO-CACHE-3', 'total_ctn': 1, 'total_kg': 1, 'awb_files': [pdf],
+                })
+            # রিকোয়েস্টের ট্রানজ্যাকশনের ভেতরে ক্যাশ বাতিল হয় না
+            invalidate.assert_not_called()
+            for callback in callbacks:
+                callback()
+        invalidate.assert_called_with(Shipment.objects.get(so_number='SO-CACHE-3').pk)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ShipmentImportTests(TestCase):
+    """CSV আপলোড so_number দিয়ে upsert করে, ভুল রো রিপোর্ট করে এবং রোলআপ ঠিক রাখে।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.editor = CustomUser.objects.create_user('import-editor', password='pw', role='editor')
+        Shipment.objects.create(so_number='SO-IMP-1', total_ctn=1, total_kg=1, created_by=cls.editor)
+
+    def test_upload_upserts_and_reports_errors(self):
+        self.client.force_login(self.editor)
+        upload = SimpleUploadedFile('shipments.csv', (
+            "S/O Number,LC Number,Total CTN,Total KG,Status\n"
+            "SO-IMP-1,LC-1,5,50.5,Fly\n"
+            "SO-IMP-2,,3,20,\n"
+            "SO-IMP-3,,many,20,pending\n"
+        ).encode())
+        response = self.client.post(reverse('import_shipments'), {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertEqual((result.created, result.updated, result.error_count), (1, 1, 1))
+        self.assertEqual(result.errors[0].line, 4)
+        updated = Shipment.objects.get(so_number='SO-IMP-1')
+        self.assertEqual((updated.lc_number, updated.total_ctn, updated.status), ('LC-1', 5, 'fly'))
+        self.assertEqual(Shipment.objects.get(so_number='SO-IMP-2').created_by, self.editor)
+        self.assertEqual(rollups.find_mismatches(), [])
+
+    def test_partial_columns_keep_other_fields(self):
+        shipment = Shipment.objects.get(so_number='SO-IMP-1')
+        shipment.status, shipment.lc_number = 'arrived', 'LC-KEEP'
+        shipment.save()
+        events = ShipmentStatusEvent.objects.count()
+
+        # স্ট্যাটাস/LC কলাম নেই: পুরনো শিপমেন্টের সেগুলো থাকে, নতুনটি pending
+        result = imports.import_shipments(io.BytesIO(
+            b"S/O Number,Total CTN,Total KG\nSO-IMP-1,7,70\nSO-IMP-4,2,20\n"
+        ), 'partial.csv', user=self.editor)
+        self.assertEqual((result.created, result.updated, result.error_count), (1, 1, 0))
+        shipment.refresh_from_db()
+        self.assertEqual((shipment.status, shipment.lc_number, shipment.total_ctn), ('arrived', 'LC-KEEP', 7))
+        self.assertEqual(Shipment.objects.get(so_number='SO-IMP-4').status, 'pending')
+        # শুধু নতুন শিপমেন্টের ইভেন্ট; পুরনোটির স্ট্যাটাস বদলায়নি
+        self.assertEqual(ShipmentStatusEvent.objects.count(), events + 1)
+        self.assertEqual(rollups.find_mismatches(), [])
+
+        # CTN/KG কলাম ছাড়া নতুন শিপমেন্ট তৈরি হয় না, পুরনোটির স্ট্যাটাস বদলানো যায়
+        result = imports.import_shipments(io.BytesIO(
+            b"S/O Number,Status\nSO-IMP-1,Fly\nSO-IMP-5,Fly\n"
+        ), 'status.csv', user=self.editor)
+        self.assertEqual((result.created, result.updated, result.error_count), (0, 1, 1))
+        self.assertIn('Total CTN', result.errors[0].message)
+        shipment.refresh_from_db()
+        self.assertEqual((shipment.status, shipment.total_ctn), ('fly', 7))
+        self.assertEqual(rollups.find_mismatches(), [])
+
+
+class BenchDbWritesTests(TestCase):
+    """বেঞ্চমার্ক শুধু স্ক্র্যাচ ডাটাবেসে লেখে; PostgreSQL কেবল --pg-url দিলে।"""
+
+    def test_sqlite_modes_run_on_scratch_copies(self):
+        Shipment.objects.create(so_number='SO-BENCH-KEEP', total_ctn=1, total_kg=1)
+        out = io.StringIO()
+        call_command('bench_db_writes', '--processes', '2', '--duration', '0.2', '--rows', '3', stdout=out)
+
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual([row[0] for row in rows], ['sqlite-default', 'sqlite-tuned'])
+        self.assertTrue(all(int(row[2]) > 0 for row in rows))
+        # টেস্টের নিজের কানেকশন ও ট্রানজ্যাকশন অক্ষত, আসল ডাটাবেসে কোনো বেঞ্চ রো নেই
+        self.assertEqual(list(Shipment.objects.values_list('so_number', flat=True)), ['SO-BENCH-KEEP'])
+        self.assertFalse(ShipmentStatusEvent.objects.exclude(shipment__so_number='SO-BENCH-KEEP').exists())
+
+    def test_postgres_needs_a_scratch_url(self):
+        with self.assertRaisesMessage(CommandError, '--pg-url'):
+            call_command('bench_db_writes', '--modes', 'postgres', stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, '--pg-url'):
+            call_command('bench_db_writes', '--pg-url', 'sqlite:///tmp/x', stdout=io.StringIO())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class StatusHistoryTests(TestCase):
+    """স্ট্যাটাস বদলালে ইভেন্ট লেখা হয় এবং ট্রানজিট সারাংশ ইনক্রিমেন্টালি তৈরি হয়।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.editor = CustomUser.objects.create_user('history-editor', password='pw', role='editor')
+
+    def create_shipment(self, so_number):
+        return Shipment.objects.create(so_number=so_number, total_ctn=1, total_kg=1, created_by=self.editor)
+
+    def test_status_update_writes_event(self):
+        shipment = self.create_shipment('SO-HIST-1')
+        self.client.force_login(self.editor)
+        self.client.post(reverse('shipment_detail', args=[shipment.pk]), {'status': 'fly'})
+
+        events = list(shipment.status_events.values_list('from_status', 'to_status', 'changed_by'))
+        self.assertEqual(events, [('', 'pending', self.editor.pk), ('pending', 'fly', self.editor.pk)])
+        self.assertIsNotNone(shipment.status_events.last().time_in_previous)
+
+    def test_transit_stats_median_and_p90(self):
+        # গত সপ্তাহের বুধবার, যাতে সব ইভেন্ট একই সপ্তাহে পড়ে
+        today = timezone.localdate()
+        start = search.day_start(today - timedelta(days=today.weekday() + 5))
+        for hours in (1, 2, 3, 4, 10):
+            shipment = self.create_shipment(f'SO-HIST-{hours}')
+            shipment.status = 'fly'
+            history.record_changes([(shipment, 'pending')], changed_at=start + timedelta(hours=hours))
+            ShipmentStatusEvent.objects.filter(shipment=shipment, from_status='pending').update(
+                time_in_previous=timedelta(hours=hours),
+            )
+        history.build_transit_stats()
+
+        weekly = ShipmentTransitStat.objects.get(scope='week', leg='pending_fly')
+        self.assertEqual((weekly.shipment_count, weekly.median_hours, weekly.p90_hours), (5, 3, 10))
+        creator = ShipmentTransitStat.objects.get(scope='creator', leg='pending_fly')
+        self.assertEqual(creator.created_by, self.editor)
+
+        self.assertEqual(history.build_transit_stats(), 0)
+
+
+class BulkStatusTests(TestCase):
+    """বাল্ক স্ট্যাটাস আপডেট: প্রতি S/O-র ফলাফল, হিস্টোরি ইভেন্ট এবং রোলআপ মিলে থাকে।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.editor = CustomUser.objects.create_user('bulk-editor', password='pw', role='editor')
+        for i, status in enumerate(['pending', 'pending', 'fly']):
+            Shipment.objects.create(
+                so_number=f'SO-BULK-{i}', total_ctn=i + 1, total_kg=10 * (i + 1), status=status,
+                created_by=cls.editor,
+            )
+
+    def test_paste_updates_and_reports_each_so_number(self):
+        self.client.force_login(self.editor)
+        response = self.client.post(reverse('bulk_status_update'), {
+            'so_numbers': 'SO-BULK-0, SO-BULK-1\nSO-BULK-2;SO-MISSING\nSO-BULK-0',
+            'status': 'fly',
+        })
+
+        result = response.context['result']
+        self.assertEqual((result.updated, result.unchanged, result.not_found), (2, 1, 1))
+        self.assertEqual([row[:2] for row in result.rows], [
+            ('SO-BULK-0', 'updated'), ('SO-BULK-1', 'updated'), ('SO-BULK-2', 'unchanged'), ('SO-MISSING', 'not_found'),
+        ])
+        self.assertEqual(Shipment.objects.filter(status='fly').count(), 3)
+        self.assertEqual(
+            ShipmentStatusEvent.objects.filter(from_status='pending', to_status='fly', changed_by=self.editor).count(), 2,
+        )
+        self.assertEqual(rollups.find_mismatches(), [])
+
+
+class StaticAssetTests(TestCase):
+    """পেজের স্টাইল/হোভার স্ট্যাটিক বান্ডলে; HTML-এ inline <style> বা on*= হ্যান্ডলার থাকে না।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('static-admin', password='pw', role='admin')
+        shipment = Shipment.objects.create(so_number='SO-STATIC-1', total_ctn=1, total_kg=1, created_by=cls.admin)
+        account = CustomerAccount.objects.create(
+            name='Static Customer', access_id_hash=CustomerAccount.hash_access_id('STATIC'),
+            finance_sheet_url='https://example.com',
+        )
+        cls.urls = [
+            reverse('dashboard'), reverse('add_shipment'), reverse('account_list'),
+            reverse('account_detail', args=[account.pk]), reverse('shipment_detail', args=[shipment.pk]),
+        ]
+
+    def test_pages_use_bundle_without_inline_styles_or_handlers(self):
+        self.client.force_login(self.admin)
+        for url in self.urls:
+            with self.subTest(url=url):
+                html = self.client.get(url).content.decode()
+                self.assertIn('/static/shipment_app/css/app.css', html)
+                self.assertNotIn('<style', html)
+                self.assertIsNone(re.search(r'\son[a-z]+="', html))
+
+    def test_page_weight_benchmark_requires_output(self):
+        # ডিফল্ট ফাইল নেই — CWD-তে কিছু লেখা হয় না
+        with self.assertRaisesMessage(CommandError, '--output'):
+            call_command('bench_page_weight')
+
+
+class PeriodReportTests(TestCase):
+    """রিপোর্ট টেবিল দৈনিক রোলআপ থেকে তৈরি হয়, পরের বিল্ডে শুধু বদলানো পিরিয়ড আপডেট হয়।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('report-admin', password='pw', role='admin')
+
+    def create_shipment(self, so_number, kg, days_ago=0):
+        shipment = Shipment.objects.create(so_number=so_number, total_ctn=2, total_kg=kg, created_by=self.admin)
+        if days_ago:
+            # created_at auto_now_add, তাই পুরনো তারিখ update দিয়ে বসিয়ে রোলআপ আবার তৈরি করা হয়
+            Shipment.objects.filter(pk=shipment.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+            rollups.rebuild()
+        return shipment
+
+    def test_week_over_week_and_incremental_refresh(self):
+        self.create_shipment('SO-REPORT-1', 100, days_ago=7)
+        shipment = self.create_shipment('SO-REPORT-2', 150)
+        reports.build_reports()
+
+        this_week, last_week = reports.period_table('week', periods=2)
+        self.assertEqual((this_week['kg'], this_week['count'], last_week['kg']), (150, 1, 100))
+        self.assertEqual(this_week['kg_change'], 50)
+
+        shipment.total_kg = 50
+        shipment.save()
+        reports.build_reports()
+        this_week = reports.period_table('week', periods=1)[0]
+        self.assertEqual((this_week['kg'], this_week['kg_change']), (50, -50))
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('period_reports'), {'period': 'week', 'group_by': 'status', 'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['Period Start', 'Period End', 'Group'])
+        self.assertIn('50.00,-50.0', lines[1])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ACCESS_ID_RATE_LIMITS={'ip': (3, 900), 'account': (5, 900)})
+class AccountAccessTests(TestCase):
+    """অ্যাক্সেস আইডি হ্যাশে থাকে, ভুল চেষ্টার সীমা পেরোলে 429, সফল হলে কুকিতে পরের বার যাচাই লাগে না।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = CustomerAccount(name='Access Customer', finance_sheet_url='https://example.com/sheet')
+        cls.account.set_access_id('SECRET-1')
+        cls.account.save()
+        cls.url = reverse('account_detail', args=[cls.account.pk])
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+        caching.invalidate_accounts()
+
+    def test_id_stored_hashed_and_token_skips_verification(self):
+        self.assertNotIn('SECRET-1', self.account.access_id_hash)
+        response = self.client.post(self.url, {'access_id': ' SECRET-1 '})
+        self.assertContains(response, 'https://example.com/sheet')
+        self.assertIn(f'account_access_{self.account.pk}', response.cookies)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'https://example.com/sheet')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_wrong_ids_are_rate_limited(self):
+        for _ in range(3):
+            response = self.client.post(self.url, {'access_id': 'WRONG'})
+            self.assertContains(response, 'Invalid Access ID')
+        response = self.client.post(self.url, {'access_id': 'SECRET-1'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertNotContains(response, 'https://example.com/sheet', status_code=429)
+
+        # অন্য IP থেকেও একই অ্যাকাউন্টে অনুমান আটকায় (account-এর সীমা ৫)
+        for ip in ('10.0.0.2', '10.0.0.3'):
+            self.client.post(self.url, {'access_id': 'WRONG'}, REMOTE_ADDR=ip)
+        response = self.client.post(self.url, {'access_id': 'SECRET-1'}, REMOTE_ADDR='10.0.0.4')
+        self.assertEqual(response.status_code, 429)
+
+    def test_account_list_cached_and_invalidated_on_save(self):
+        url = reverse('account_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, 'Access Customer')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.name = 'Renamed Customer'
+            self.account.save()
+        self.assertContains(self.client.get(url), 'Renamed Customer')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, FINANCE_SHEET_SOURCE='shipment_app.finance.LocalFileSheetSource')
+class FinanceStatementTests(TestCase):
+    """শিট ব্যাকগ্রাউন্ডে CSV হিসেবে এনে ক্যাশে রাখা হয়; না বদলালে আবার পার্স হয় না, পেজ কখনো শিট আনে না।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = CustomerAccount(
+            name='Finance Customer', finance_sheet_url='https://docs.google.com/spreadsheets/d/FIN-TEST/edit#gid=0',
+        )
+        cls.account.set_access_id('FIN-1')
+        cls.account.save()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.enterContext(override_settings(FINANCE_SHEET_DIR=self.directory))
+        with open(os.path.join(self.directory, 'FIN-TEST.csv'), 'w') as fh:
+            fh.write("Date,Description,Amount,,\n2025-01-05,Opening balance,1000,,\n,,,,\n2025-01-09,Payment,-250,,\n")
+
+    def test_csv_export_url(self):
+        self.assertEqual(
+            finance.csv_export_url(self.account.finance_sheet_url),
+            'https://docs.google.com/spreadsheets/d/FIN-TEST/export?format=csv&gid=0',
+        )
+
+    def test_refresh_is_conditional_and_page_reads_cache(self):
+        self.assertEqual(finance.refresh(self.account), 'updated')
+        entry = finance.cached_statement(self.account)
+        self.assertEqual(entry['header'], ['Date', 'Description', 'Amount'])
+        self.assertEqual(entry['rows'], [['2025-01-05', 'Opening balance', '1000'], ['2025-01-09', 'Payment', '-250']])
+        self.assertEqual(finance.refresh(self.account), 'not_modified')
+
+        self.client.post(reverse('account_detail', args=[self.account.pk]), {'access_id': 'FIN-1'})
+        response = self.client.get(reverse('account_detail', args=[self.account.pk]))
+        self.assertContains(response, '<td>Opening balance</td>', html=True)
+        self.assertFalse(BackgroundJob.objects.filter(name='refresh_finance_sheets').exists())
+
+    def test_missing_statement_queues_refresh_job(self):
+        self.client.post(reverse('account_detail', args=[self.account.pk]), {'access_id': 'FIN-1'})
+        self.client.get(reverse('account_detail', args=[self.account.pk]))
+        job = BackgroundJob.objects.get(name='refresh_finance_sheets')
+        self.assertEqual(job.payload, {'account_ids': [self.account.pk]})
+        jobs.run_claimed(jobs.claim('finance-test', job_id=job.pk))
+        self.assertContains(self.client.get(reverse('account_detail', args=[self.account.pk])), 'Payment')
+
+    def test_sheets_fetched_outside_job_transaction(self):
+        # জবের পুরো সময় write lock ধরা থাকে না: শিট আনার সময় কোনো বাড়তি ট্রানজ্যাকশন খোলা নেই
+        depth = len(connection.atomic_blocks)
+        source = finance.LocalFileSheetSource()
+        fetch, depths = source.fetch, []
+
+        def tracking_fetch(*args):
+            depths.append(len(connection.atomic_blocks))
+            return fetch(*args)
+
+        with mock.patch.object(finance, 'get_source', return_value=source), \
+                mock.patch.object(source, 'fetch', tracking_fetch):
+            job = jobs.schedule('refresh_finance_sheets', timedelta(0), account_ids=[self.account.pk])
+            self.assertEqual(jobs.run_claimed(jobs.claim('finance-test', job_id=job.pk)).status, 'done')
+        self.assertEqual(depths, [depth])
+        self.assertEqual(finance.cached_statement(self.account)['rows'][1][1], 'Payment')
+
+    @override_settings(SHIPMENT_JOBS_INLINE=True)
+    def test_inline_mode_runs_refresh_after_commit(self):
+        # ওয়ার্কার ছাড়া (inline) রিফ্রেশ জব কিউতে পড়ে থাকে না — রিকোয়েস্ট কমিট হলেই চলে
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('account_detail', args=[self.account.pk]), {'access_id': 'FIN-1'})
+        self.assertEqual(BackgroundJob.objects.get(name='refresh_finance_sheets').status, 'done')
+        self.assertContains(self.client.get(reverse('account_detail', args=[self.account.pk])), 'Payment')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LiveFeedTests(TestCase):
+    """ড্যাশবোর্ড লাইভ ফিড: স্ট্যাটাস-ইভেন্ট লগই কার্সর, এক টিকে এক কুয়েরিতে সব সাবস্ক্রাইবার ইভেন্ট পায়।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('live-admin', password='pw', role='admin')
+
+    def test_feed_poll_fans_out_with_one_query(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        feed = live.ChangeFeed()
+        subscriptions = [live.Subscription(loop) for _ in range(50)]
+        for subscription in subscriptions:
+            subscription.since = live.latest_event_id()
+        feed._subscribers.update(subscriptions)
+
+        shipment = Shipment.objects.create(so_number='SO-LIVE-1', total_ctn=1, total_kg=4, created_by=self.admin)
+        shipment.status = 'fly'
+        shipment.save()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(feed.poll(), 2)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        loop.run_until_complete(asyncio.sleep(0))
+        for subscription in subscriptions:
+            events = subscription.queue.get_nowait()
+            self.assertEqual([(e['kind'], e['status'], e['so_number']) for e in events],
+                             [('created', 'pending', 'SO-LIVE-1'), ('status', 'fly', 'SO-LIVE-1')])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(feed.poll(), 0)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_event_stream_resumes_from_last_event_id(self):
+        self.client.force_login(self.admin)
+        dashboard = self.client.get(reverse('dashboard'))
+        url = reverse('shipment_events')
+        self.assertContains(dashboard, f'{url}?after=')
+
+        cursor = live.latest_event_id()
+        Shipment.objects.create(so_number='SO-LIVE-2', total_ctn=1, total_kg=4, created_by=self.admin)
+        response = self.client.get(url, {'after': cursor})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertIn('event: shipment', body)
+        self.assertIn('"so_number":"SO-LIVE-2"', body)
+
+        last_id = re.findall(r'^id: (\d+)$', body, re.M)[-1]
+        body = self.client.get(url, HTTP_LAST_EVENT_ID=last_id).content.decode()
+        self.assertNotIn('event: shipment', body)
+        self.assertIn(f'id: {last_id}', body)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DocumentBundleTests(TestCase):
+    """ডকুমেন্ট ZIP: S/O ও টাইপ অনুযায়ী ফোল্ডার, একই নামের ফাইলে আলাদা নাম, হারানো ফাইল manifest-এ।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('zip-admin', password='pw', role='admin')
+        cls.shipment = Shipment.objects.create(so_number='SO/ZIP 1', total_ctn=1, total_kg=1, created_by=cls.admin)
+        cls.other = Shipment.objects.create(so_number='SO-ZIP-2', total_ctn=1, total_kg=1, status='fly', created_by=cls.admin)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        storage = ShipmentFile._meta.get_field('uploaded_file').storage
+        for shipment, file_type, name, content in [
+            (self.shipment, 'receipt', 'invoice.pdf', b'%PDF receipt one'),
+            (self.shipment, 'receipt', 'invoice.pdf', b'%PDF receipt two'),
+            (self.shipment, 'awb', 'awb.txt', b'air waybill ' * 100),
+            (self.other, 'packing', 'list.pdf', b'%PDF packing'),
+        ]:
+            ShipmentFile.objects.create(
+                shipment=shipment, file_type=file_type, original_name=name,
+                uploaded_file=storage.save(name, ContentFile(content)),
+            )
+        ShipmentFile.objects.create(shipment=self.shipment, file_type='awb', uploaded_file='blobs/00/gone.pdf')
+        self.client.force_login(self.admin)
+
+    def read_zip(self, response):
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertTrue(response.streaming)
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_single_shipment_bundle(self):
+        archive = self.read_zip(self.client.get(reverse('shipment_documents_zip', args=[self.shipment.pk])))
+        self.assertEqual(archive.namelist(), [
+            'SO_ZIP 1/awb/awb.txt', 'SO_ZIP 1/receipt/invoice.pdf', 'SO_ZIP 1/receipt/invoice (2).pdf', 'manifest.csv',
+        ])
+        self.assertEqual(archive.read('SO_ZIP 1/receipt/invoice (2).pdf'), b'%PDF receipt two')
+        self.assertEqual(archive.getinfo('SO_ZIP 1/awb/awb.txt').compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.getinfo('SO_ZIP 1/receipt/invoice.pdf').compress_type, zipfile.ZIP_STORED)
+        manifest = archive.read('manifest.csv').decode()
+        self.assertIn('SO/ZIP 1,awb,SO_ZIP 1/awb/gone.pdf,,missing', manifest)
+        self.assertIsNone(archive.testzip())
+
+    def test_filtered_bundle(self):
+        url = reverse('document_bundle')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        today = timezone.localdate().isoformat()
+        archive = self.read_zip(self.client.get(url, {'start_date': today, 'status': 'fly'}))
+        self.assertEqual(archive.namelist(), ['SO-ZIP-2/packing/list.pdf', 'manifest.csv'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, UPLOAD_IMAGE_MAX_EDGE=800)
+class UploadNormalizationTests(TestCase):
+    """আপলোডের সময় ছবি ঘোরানো, মেটাডেটা বাদ, ছোট করা ও JPEG-এ এনকোড হয়; PDF যেমন আছে তেমন থাকে।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.editor = CustomUser.objects.create_user('upload-editor', password='pw', role='editor')
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.client.force_login(self.editor)
+
+    def phone_photo(self):
+        # ল্যান্ডস্কেপ পিক্সেল, EXIF Orientation=6 (৯০° ঘোরানো), সাথে ক্যামেরা মডেল — নয়েজ থাকায় বড় ফাইল
+        image = Image.effect_noise((1600, 1200), 60).convert('RGB')
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x0110] = 'Test Phone'
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', exif=exif.tobytes())
+        return SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+
+    def test_photo_normalized_and_pdf_kept(self):
+        photo = self.phone_photo()
+        pdf = SimpleUploadedFile('awb.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        response = self.client.post(reverse('add_shipment'), {
+            'so_number': 'SO-UPLOAD-1', 'total_ctn': 1, 'total_kg': 1,
+            'receipt_files': [photo], 'awb_files': [pdf],
+        })
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+        receipt = ShipmentFile.objects.get(shipment__so_number='SO-UPLOAD-1', file_type='receipt')
+        self.assertEqual(receipt.original_name, 'photo.jpg')
+        self.assertEqual(receipt.original_size, photo.size)
+        self.assertLess(receipt.size * 3, receipt.original_size)
+        self.assertFalse(receipt.original_file)
+        with receipt.uploaded_file.open('rb') as fh, Image.open(fh) as stored:
+            self.assertEqual((stored.format, stored.size), ('JPEG', (600, 800)))
+            self.assertFalse(stored.getexif())
+
+        awb = ShipmentFile.objects.get(shipment__so_number='SO-UPLOAD-1', file_type='awb')
+        self.assertEqual((awb.original_name, awb.original_size), ('awb.pdf', None))
+        self.assertEqual(documents.normalization_stats()['files'], 1)
+
+    @override_settings(UPLOAD_KEEP_ORIGINALS=True, UPLOAD_IMAGE_FORMAT='WEBP')
+    def test_keep_original_and_webp(self):
+        photo = self.phone_photo()
+        result = documents.normalize_upload(photo)
+        self.assertEqual(result.name, 'photo.webp')
+        self.assertIs(result.original, photo)
+        self.assertLess(result.file.size, photo.size)
+
+
+    def test_metadata_stripped_even_when_reencode_is_larger(self):
+        # কম কোয়ালিটির ছোট JPEG, GPS সহ — quality 80-এ নতুন এনকোড আসলের চেয়ে বড়
+        exif = Image.Exif()
+        exif[0x010F] = 'Test Phone'
+        gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+        gps[1], gps[2] = 'N', (23.0, 45.0, 0.0)
+        buffer = io.BytesIO()
+        Image.effect_noise((200, 150), 60).convert('RGB').save(buffer, format='JPEG', quality=30, exif=exif.tobytes())
+        upload = SimpleUploadedFile('whatsapp.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+        result = documents.normalize_upload(upload)
+        self.assertIsNot(result.file, upload)
+        self.assertGreater(result.file.size, upload.size)
+        with Image.open(result.file) as stored:
+            self.assertFalse(stored.getexif())
+            self.assertNotIn('exif', stored.info)
+
+    def test_multi_page_scan_keeps_pages_without_metadata(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Office Scanner'
+        pages = [Image.new('L', (120, 160), shade) for shade in (0, 128, 255)]
+        buffer = io.BytesIO()
+        pages[0].save(buffer, format='TIFF', save_all=True, append_images=pages[1:], exif=exif.tobytes())
+        upload = SimpleUploadedFile('scan.tiff', buffer.getvalue(), content_type='image/tiff')
+
+        result = documents.normalize_upload(upload)
+        self.assertEqual(result.name, 'scan.tiff')
+        with Image.open(result.file) as stored:
+            self.assertEqual(stored.n_frames, 3)
+            self.assertNotIn(0x010F, stored.getexif())
+
+    def test_unreadable_image_rejected_and_other_files_kept(self):
+        truncated = self.phone_photo().read()[:2000]
+        with self.assertRaises(ValidationError):
+            documents.normalize_upload(SimpleUploadedFile('photo.png', truncated, content_type='image/png'))
+        sheet = SimpleUploadedFile('list.xlsx', b'PK\x03\x04 not an image')
+        self.assertIs(documents.normalize_upload(sheet).file, sheet)
+
+
+class MediaServingTests(TestCase):
+    """ডকুমেন্ট ভিউ: রোল যাচাই, Range (206/416), ETag/If-Range, আর প্রক্সি অফলোড হেডার।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = CustomUser.objects.create_user('media-viewer', password='pw', role='viewer')
+        cls.outsider = CustomUser.objects.create_user('media-outsider', password='pw', role='')
+        cls.shipment = Shipment.objects.create(so_number='SO-MEDIA', total_ctn=1, total_kg=1, created_by=cls.viewer)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE=''))
+        storage = ShipmentFile._meta.get_field('uploaded_file').storage
+        self.content = bytes(range(256)) * 40
+        self.document = ShipmentFile.objects.create(
+            shipment=self.shipment, file_type='awb', original_name='AWB 7.pdf',
+            uploaded_file=storage.save('awb.pdf', ContentFile(self.content)),
+        )
+        self.url = reverse('shipment_file', args=[self.document.pk])
+        self.client.force_login(self.viewer)
+
+    def test_full_file_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('inline', response['Content-Disposition'])
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{os.path.basename(self.document.uploaded_file.name)[:-4]}"')
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304,
+        )
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        # ফাইল বদলে গেলে (If-Range মেলে না) বাকি অংশ নয়, পুরো ফাইল
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_ranged_file_keeps_fileno_for_sendfile(self):
+        with open(self.document.uploaded_file.path, 'rb') as fh:
+            part = media.RangedFile(fh, 1000, 24)
+            self.assertEqual(os.lseek(part.fileno(), 0, os.SEEK_CUR), 1000)
+            self.assertEqual(part.read(16) + part.read(), self.content[1000:1024])
+            self.assertEqual(part.read(), b'')
+
+    def test_proxy_offload(self):
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.client.get(self.url, {'download': 1})
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.document.uploaded_file.name}')
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.document.uploaded_file.path)
+
+    def test_requires_viewer_role(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.client.force_login(self.viewer)
+        self.assertEqual(self.client.get(self.url, {'original': 1}).status_code, 404)
+
+
+class ArchiveTests(TestCase):
+    """পুরনো arrived শিপমেন্ট আর্কাইভে যায়; রোলআপ, blob ও ট্রানজিট সারাংশ একই থাকে, পেজগুলো আর্কাইভ থেকে পড়ে।"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('archive-admin', password='pw', role='admin')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE=''))
+        self.storage = ShipmentFile._meta.get_field('uploaded_file').storage
+
+        old, fly, recent = (
+            Shipment.objects.create(so_number=so_number, total_ctn=2, total_kg=10, created_by=self.admin)
+            for so_number in ('SO-ARCH-OLD', 'SO-ARCH-FLY', 'SO-ARCH-NEW')
+        )
+        for shipment, statuses in ((old, ('fly', 'arrived')), (fly, ('fly',)), (recent, ('fly', 'arrived'))):
+            for status in statuses:
+                shipment.status = status
+                shipment.save()
+        self.document = ShipmentFile.objects.create(
+            shipment=old, file_type='awb', original_name='awb.pdf',
+            uploaded_file=self.storage.save('awb.pdf', ContentFile(b'%PDF archived awb')),
+        )
+        # পুরনো বানাতে সরাসরি update (সিগন্যাল ছাড়া), তারপর রোলআপ নতুন তারিখে
+        long_ago = timezone.now() - timedelta(days=400)
+        Shipment.objects.filter(pk__in=[old.pk, fly.pk]).update(created_at=long_ago, updated_at=long_ago)
+        rollups.rebuild()
+        search.rebuild_index()
+        self.old, self.fly, self.recent = old, fly, recent
+        self.client.force_login(self.admin)
+
+    def archive(self):
+        out = io.StringIO()
+        call_command('archive_shipments', '--older-than', '30', '--batch-size', '1', stdout=out)
+        return out.getvalue()
+
+    def test_archive_moves_rows_and_keeps_aggregates(self):
+        history.build_transit_stats(full=True)
+        before = {(stat.scope, stat.leg): stat.shipment_count for stat in ShipmentTransitStat.objects.all()}
+
+        self.assertIn('Archived 1 shipments (1 files, 3 status events) in 1 batches', self.archive())
+
+        self.assertEqual(set(Shipment.objects.values_list('so_number', flat=True)), {'SO-ARCH-FLY', 'SO-ARCH-NEW'})
+        archived = ArchivedShipment.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.status_events.count(), 3)
+        self.assertEqual([f.pk for f in archived.all_files], [self.document.pk])
+        self.assertFalse(ShipmentStatusEvent.objects.filter(shipment_id=self.old.pk).exists())
+        self.assertEqual(rollups.find_mismatches(), [])
+        self.assertTrue(self.storage.exists(self.document.uploaded_file.name))
+
+        history.build_transit_stats(full=True)
+        after = {(stat.scope, stat.leg): stat.shipment_count for stat in ShipmentTransitStat.objects.all()}
+        self.assertEqual(after, before)
+
+        # আর্কাইভ থেকে মুছলে তবেই রোলআপ কমে আর blob মোছে
+        with self.captureOnCommitCallbacks(execute=True):
+            archived.delete()
+        self.assertEqual(rollups.find_mismatches(), [])
+        self.assertFalse(self.storage.exists(self.document.uploaded_file.name))
+
+    def test_pages_fall_back_to_archive(self):
+        self.archive()
+        response = self.client.get(reverse('search_shipment'), {'q': 'ARCH-OLD'})
+        self.assertTrue(response.context['archived'])
+        self.assertEqual([s.pk for s in response.context['shipments']], [self.old.pk])
+        response = self.client.get(reverse('search_shipment'), {'q': 'ARCH'})
+        self.assertFalse(response.context['archived'])
+        self.assertEqual(len(response.context['shipments']), 2)
+
+        detail = reverse('shipment_detail', args=[self.old.pk])
+        response = self.client.get(detail)
+        self.assertContains(response, 'Archived on')
+        self.assertFalse(response.context['can_edit'])
+        self.client.post(detail, {'status': 'pending'})
+        self.assertEqual(ArchivedShipment.objects.get(pk=self.old.pk).status, 'arrived')
+
+        response = self.client.get(reverse('shipment_file', args=[self.document.pk]))
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF archived awb')
+        response = self.client.get(reverse('shipment_documents_zip', args=[self.old.pk]))
+        archive_zip = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('SO-ARCH-OLD/awb/awb.pdf', archive_zip.namelist())
+
+    def test_reports_include_archived_on_request(self):
+        self.archive()
+        url = reverse('download_report_csv')
+        start = timezone.localdate() - timedelta(days=500)
+        report = b''.join(self.client.get(url, {'start_date': start}).streaming_content).decode()
+        self.assertNotIn('SO-ARCH-OLD', report)
+        report = b''.join(
+            self.client.get(url, {'start_date': start, 'include_archived': 'on'}).streaming_content
+        ).decode()
+        self.assertIn('SO-ARCH-OLD', report)
+        self.assertIn('SO-ARCH-NEW', report)
+
+    def test_archived_so_number_cannot_be_reused(self):
+        self.archive()
+        response = self.client.post(reverse('add_shipment'), {'so_number': 'SO-ARCH-OLD', 'total_ctn': 1, 'total_kg': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('archived', response.context['form'].errors['so_number'][0])
+
+        upload = SimpleUploadedFile('shipments.csv', (
+            "S/O Number,Total CTN,Total KG,Status\n"
+            "SO-ARCH-OLD,9,90,Fly\n"
+            "SO-ARCH-NEW,4,40,Arrived\n"
+        ).encode())
+        result = self.client.post(reverse('import_shipments'), {'file': upload}).context['result']
+        self.assertEqual((result.updated, result.error_count), (1, 1))
+        self.assertEqual((result.errors[0].line, result.errors[0].so_number), (2, 'SO-ARCH-OLD'))
+        self.assertFalse(Shipment.objects.filter(so_number='SO-ARCH-OLD').exists())
+        self.assertEqual(ArchivedShipment.objects.get(pk=self.old.pk).total_ctn, 2)
@@ -11,10 +11,21 @@ urlpatterns = [
     
     # মূল ফাংশনালিটি (পূর্বের মতো)
     path('', views.dashboard, name='dashboard'), 
+    path('events/shipments/', views.shipment_events, name='shipment_events'),
     path('add/', views.add_shipment, name='add_shipment'), 
+    path('import/', views.import_shipments, name='import_shipments'),
+    path('bulk-status/', views.bulk_status_update, name='bulk_status_update'),
     path('search/', views.search_shipment, name='search_shipment'), 
     path('shipment/<int:pk>/', views.shipment_detail, name='shipment_detail'), 
     path('report/csv/', views.download_report_csv, name='download_report_csv'), 
+    path('shipment/<int:pk>/documents.zip', views.shipment_documents_zip, name='shipment_documents_zip'),
+    path('documents/bundle/', views.document_bundle, name='document_bundle'),
+    path('files/<int:pk>/', views.shipment_file, name='shipment_file'),
+    path('files/<int:pk>/preview/<str:size>/', views.file_preview, name='file_preview'),
+    path('api/shipments/', views.shipment_list_api, name='shipment_list_api'),
+    path('stats/', views.request_stats, name='request_stats'),
+    path('analytics/transit/', views.transit_analytics, name='transit_analytics'),
+    path('reports/', views.period_reports, name='period_reports'),
 
     # ⬅️ নতুন কাস্টমার অ্যাকাউন্ট URL 
     path('accounts/', views.account_list, name='account_list'), # কাস্টমারের তালিকা
@@ -1,16 +1,51 @@
 # shipment_app/views.py
 
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Sum, Q
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Max, Q
 from django.utils import timezone
-from datetime import timedelta
-from .models import Shipment, CustomUser, ShipmentFile, CustomerAccount # CustomerAccount ইমপোর্ট করা হলো
-from .forms import ShipmentForm, StatusUpdateForm
+from datetime import datetime, timedelta
+from itertools import chain
+import base64
+import os
+import re
+import hashlib
+from .models import (
+    Shipment, CustomUser, ShipmentFile, CustomerAccount, ShipmentTransitStat, ArchivedShipment,
+) # CustomerAccount ইমপোর্ট করা হলো
+from .forms import (
+    ShipmentForm, StatusUpdateForm, ReportFilterForm, ShipmentImportForm, BulkStatusUpdateForm, PeriodReportForm,
+    DocumentBundleForm,
+)
+from .search import parse_query, search_shipments, day_start
+from .exports import report_rows, stream_csv, stream_xlsx, gzip_stream, bundle_files, stream_zip_bundle
+from .rollups import totals as rollup_totals
+from .documents import normalization_stats
+from .jobs import enqueue
+from . import access
+from . import archive
+from . import bulk_status
+from . import caching
+from . import finance
+from . import imports
+from . import live
+from . import media
+from . import previews
+from . import reports
+from . import middleware as request_metrics
+from django.conf import settings
 from django.contrib import messages
 from django.urls import reverse
-from django.http import HttpResponse
-import csv
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
 
 # --- পারমিশন চেকার ফাংশন (পূর্বের মতো) ---
 def is_admin(user):
@@ -26,28 +61,47 @@ def is_viewer_or_higher(user):
 @login_required
 @user_passes_test(is_viewer_or_higher, login_url='/login/')
 def dashboard(request):
-    today = timezone.now().date()
+    today = timezone.localdate()
     
     start_week = today - timedelta(days=today.weekday())
     start_month = today.replace(day=1)
 
-    weekly_total = Shipment.objects.filter(
-        created_at__date__gte=start_week
-    ).aggregate(total_weight=Sum('total_kg'))['total_weight'] or 0
-
-    monthly_total = Shipment.objects.filter(
-        created_at__date__gte=start_month
-    ).aggregate(total_weight=Sum('total_kg'))['total_weight'] or 0
+    # দৈনিক রোলআপ টেবিল থেকে (সর্বোচ্চ ~৩১ দিনের রো যোগ করা হয়)। টোটাল ও কুয়েরিসেট দুটোই lazy —
+    # টেমপ্লেটের ফ্র্যাগমেন্ট ক্যাশে পাওয়া গেলে ডেটাবেসে যাওয়াই হয় না
+    weekly_total = lambda: rollup_totals(start_week)['kg']
+    monthly_total = lambda: rollup_totals(start_month)['kg']
     
-    shipments = Shipment.objects.all().order_by('-created_at')[:10]
+    shipments = Shipment.objects.select_related('created_by').with_file_counts().order_by('-created_at')[:10]
 
     context = {
         'weekly_total': weekly_total,
         'monthly_total': monthly_total,
         'shipments': shipments,
+        'data_version': caching.data_version(),
+        'today': today,
+        # লাইভ ফিড এই ইভেন্টের পর থেকে শুরু করে, তাই রেন্ডার আর কানেক্টের মাঝের পরিবর্তনও আসে
+        'last_event_id': live.latest_event_id(),
     }
     return render(request, 'shipment_app/dashboard.html', context)
 
+# --- ১.১ লাইভ স্ট্যাটাস ফিড (Server-Sent Events) ---
+@login_required
+@user_passes_test(is_viewer_or_higher, login_url='/login/')
+async def shipment_events(request):
+    """
+    ড্যাশবোর্ডে নতুন শিপমেন্ট ও স্ট্যাটাস বদল পুশ করে। ASGI-তে কানেকশন খোলা থাকে আর প্রসেসের একটি
+    চেঞ্জ ফিড থেকে ইভেন্ট আসে; WSGI-তে শুধু জমে থাকা ইভেন্ট পাঠিয়ে শেষ (ব্রাউজার retry পরে আবার আসে)।
+    """
+    cursor = live.parse_cursor(request)
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(live.stream(cursor), content_type='text/event-stream')
+    else:
+        body = await sync_to_async(live.backlog_response_body)(cursor)
+        response = HttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx যেন বাফার না করে
+    return response
+
 # --- ২. শিপমেন্ট আপলোড / Create Page (পূর্বের মতো) ---
 @login_required
 @user_passes_test(is_admin_or_editor, login_url='/login/')
@@ -65,15 +119,29 @@ def add_shipment(request):
                 'awb_files': 'awb',
             }
 
+            # ফাইল ডিস্কে লেখা হয় (storage হ্যাশ করে), রো একসাথে bulk_create,
+            # আর মেটাডেটার কাজ ব্যাকগ্রাউন্ড ওয়ার্কারে।
+            # ছবিগুলো ফর্ম ক্লিনের সময়েই নরমালাইজ হয়ে আসে (documents.normalize_upload)
+            storage = ShipmentFile._meta.get_field('uploaded_file').storage
+            new_files = []
             for field_name, file_type in file_fields.items():
-                files = request.FILES.getlist(field_name) 
-                for f in files:
-                    if f:
-                        ShipmentFile.objects.create(
-                            shipment=shipment,
-                            file_type=file_type,
-                            uploaded_file=f 
-                        )
+                for upload in form.cleaned_data[field_name]:
+                    original = upload.original
+                    new_files.append(ShipmentFile(
+                        shipment=shipment,
+                        file_type=file_type,
+                        uploaded_file=storage.save(f"shipment_files/{upload.name}", upload.file),
+                        original_name=upload.name[:255],
+                        original_file=storage.save(f"originals/{original.name}", original) if original else '',
+                        original_size=upload.original_size,
+                        size=upload.file.size,
+                    ))
+            if new_files:
+                new_files = ShipmentFile.objects.bulk_create(new_files)
+                # bulk_create সিগন্যাল পাঠায় না; সিগন্যালের মতোই কমিটের পর, যাতে রোলব্যাক হলে ক্যাশ বৃথা না যায়
+                # আর কমিটের আগে অন্য রিকোয়েস্ট পুরনো ডেটা নতুন ভার্সনে ক্যাশ করে না ফেলে
+                transaction.on_commit(lambda: caching.invalidate_shipment(shipment.pk))
+                enqueue('process_shipment_files', file_ids=[f.pk for f in new_files])
             messages.success(request, f'Shipment S/O No. {shipment.so_number} successfully added and files uploaded.')
             return redirect('dashboard')
         else:
@@ -83,37 +151,124 @@ def add_shipment(request):
         
     return render(request, 'shipment_app/add_shipment.html', {'form': form})
 
-# --- ৩. শিপমেন্ট সার্চ (পূর্বের মতো) ---
+# --- বাল্ক ইমপোর্ট (CSV / XLSX) ---
+@login_required
+@user_passes_test(is_admin_or_editor, login_url='/login/')
+def import_shipments(request):
+    result = None
+    if request.method == 'POST':
+        form = ShipmentImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = imports.import_shipments(
+                    upload, upload.name, user=request.user, dry_run=form.cleaned_data['dry_run'],
+                )
+            except imports.ImportFileError as exc:
+                form.add_error('file', str(exc))
+            else:
+                verb = 'would be' if form.cleaned_data['dry_run'] else 'were'
+                messages.success(
+                    request,
+                    f'{result.created} shipments {verb} added, {result.updated} updated, '
+                    f'{result.unchanged} unchanged, {result.error_count} rows with errors.',
+                )
+    else:
+        form = ShipmentImportForm()
+
+    context = {
+        'form': form,
+        'result': result,
+        'max_errors': imports.MAX_REPORTED_ERRORS,
+    }
+    return render(request, 'shipment_app/import_shipments.html', context)
+
+# --- একসাথে অনেক শিপমেন্টের স্ট্যাটাস আপডেট ---
+BULK_STATUS_MAX = 10000
+
+@login_required
+@user_passes_test(is_admin_or_editor, login_url='/login/')
+def bulk_status_update(request):
+    result = None
+    if request.method == 'POST':
+        form = BulkStatusUpdateForm(request.POST, request.FILES)
+        if form.is_valid():
+            so_numbers = bulk_status.parse_so_numbers(form.cleaned_data['so_numbers'])
+            try:
+                if form.cleaned_data['file']:
+                    so_numbers += bulk_status.so_numbers_from_file(form.cleaned_data['file'])
+            except imports.ImportFileError as exc:
+                form.add_error('file', str(exc))
+            else:
+                if len(so_numbers) > BULK_STATUS_MAX:
+                    form.add_error(None, f"At most {BULK_STATUS_MAX} S/O numbers can be updated at once.")
+                else:
+                    result = bulk_status.update_status(so_numbers, form.cleaned_data['status'], user=request.user)
+                    messages.success(
+                        request,
+                        f'{result.updated} shipments updated, {result.unchanged} already had that status, '
+                        f'{result.not_found} S/O numbers not found.',
+                    )
+    else:
+        form = BulkStatusUpdateForm()
+
+    context = {
+        'form': form,
+        'result': result,
+    }
+    return render(request, 'shipment_app/bulk_status_update.html', context)
+
+# --- ৩. শিপমেন্ট সার্চ (FTS ইনডেক্স + টাইপড কুয়েরি) ---
+SEARCH_PAGE_SIZE = 25
+
 @login_required
 @user_passes_test(is_viewer_or_higher, login_url='/login/')
 def search_shipment(request):
-    query = request.GET.get('q', '')
-    shipments = []
-    if query:
-        shipments = Shipment.objects.filter(
-            Q(so_number__icontains=query) |
-            Q(lc_number__icontains=query) |
-            Q(status__icontains=query) |
-            Q(total_ctn__icontains=query) | 
-            Q(total_kg__icontains=query)
-        ).distinct().order_by('-created_at')
-        
-    return render(request, 'shipment_app/search_results.html', {'shipments': shipments, 'query': query})
+    query = request.GET.get('q', '').strip()
+    archived = request.GET.get('archived') == '1'
+    page_obj = None
+    parsed = parse_query(query)
+    if query and not parsed.is_empty:
+        results = None if archived else search_shipments(parsed, Shipment.objects.with_file_counts())
+        # বর্তমান শিপমেন্টে কিছু না মিললে (বা ?archived=1 হলে) আর্কাইভে খোঁজা হয়
+        if results is None or not results.exists():
+            results = search_shipments(parsed, ArchivedShipment.objects.with_file_counts())
+            archived = True
+        paginator = Paginator(results, SEARCH_PAGE_SIZE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+
+    context = {
+        'shipments': page_obj.object_list if page_obj else [],
+        'page_obj': page_obj,
+        'query': query,
+        'archived': archived,
+        'search_errors': parsed.errors,
+    }
+    return render(request, 'shipment_app/search_results.html', context)
 
 
 # --- ৪. শিপমেন্ট ডিটেইলস পেজ (পূর্বের মতো) ---
 @login_required
 @user_passes_test(is_viewer_or_higher, login_url='/login/')
 def shipment_detail(request, pk):
-    shipment = get_object_or_404(Shipment, pk=pk)
+    # ফাইলগুলো prefetch করা হয় না: ডকুমেন্ট/প্রিভিউ ফ্র্যাগমেন্ট ক্যাশ মিস হলেই কেবল লোড হয়
+    # মূল টেবিলে না থাকলে আর্কাইভ থেকে (কেবল দেখা যায়, বদলানো যায় না)
+    shipment = archive.find_shipment(pk)
+    if shipment is None:
+        raise Http404("No Shipment matches the given query.")
     
     if request.method == 'POST':
+        if shipment.is_archived:
+            messages.error(request, "Archived shipments cannot be changed.")
+            return redirect('shipment_detail', pk=pk)
         if not is_admin_or_editor(request.user):
             messages.error(request, "You do not have permission to change the status.")
             return redirect('shipment_detail', pk=pk)
 
         status_form = StatusUpdateForm(request.POST, instance=shipment)
         if status_form.is_valid():
+            # স্ট্যাটাস হিস্টোরিতে কে বদলাল (signals.record_status_event)
+            shipment._status_changed_by = request.user
             status_form.save()
             messages.success(request, f'Status of S/O {shipment.so_number} updated to {shipment.get_status_display()}.')
             return redirect('shipment_detail', pk=pk)
@@ -123,59 +278,379 @@ def shipment_detail(request, pk):
     context = {
         'shipment': shipment,
         'status_form': status_form,
-        'can_edit': is_admin_or_editor(request.user),
+        'can_edit': is_admin_or_editor(request.user) and not shipment.is_archived,
+        'shipment_version': caching.shipment_version(shipment.pk),
+        # lazy — হিস্টোরি ফ্র্যাগমেন্ট ক্যাশে না থাকলেই কেবল কুয়েরি হয়
+        'status_events': shipment.status_events.select_related('changed_by'),
     }
     return render(request, 'shipment_app/shipment_detail.html', context)
 
+# --- শিপমেন্ট লিস্ট JSON API (কীসেট পেজিনেশন + কন্ডিশনাল GET) ---
+API_FIELDS = {
+    'id': 'id',
+    'so_number': 'so_number',
+    'lc_number': 'lc_number',
+    'total_ctn': 'total_ctn',
+    'total_kg': 'total_kg',
+    'status': 'status',
+    'created_by': 'created_by__username',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 200
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+@login_required
+@user_passes_test(is_viewer_or_higher, login_url='/login/')
+def shipment_list_api(request):
+    """
+    GET /api/shipments/?limit=50&cursor=...&fields=so_number,status&status=fly
+    (created_at, id) অনুযায়ী কীসেট পেজিনেশন, তাই গভীর পেজও প্রথম পেজের মতোই দ্রুত।
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', API_DEFAULT_LIMIT)), 1), API_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+
+    requested = [f for f in request.GET.get('fields', '').split(',') if f]
+    unknown = [f for f in requested if f not in API_FIELDS]
+    if unknown:
+        return JsonResponse({'error': f"Unknown fields: {', '.join(unknown)}"}, status=400)
+    fields = requested or list(API_FIELDS)
+
+    shipments = Shipment.objects.order_by('-created_at', '-id')
+    status = request.GET.get('status')
+    if status:
+        shipments = shipments.filter(status=status)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            cursor_created_at, cursor_pk = decode_cursor(cursor)
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        shipments = shipments.filter(
+            Q(created_at__lt=cursor_created_at) | Q(created_at=cursor_created_at, id__lt=cursor_pk)
+        )
+
+    # ETag পেজের (id, updated_at) থেকে, তাই কিছু না বদলালে সিরিয়ালাইজ না করেই 304
+    lookups = {API_FIELDS[f] for f in fields} | {'id', 'created_at', 'updated_at'}
+    rows = list(shipments.values(*lookups)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    fingerprint = hashlib.sha256(
+        f"{','.join(fields)}|{limit}|{has_more}|".encode()
+        + ';'.join(f"{r['id']}:{r['updated_at'].isoformat()}" for r in rows).encode()
+    ).hexdigest()[:32]
+    etag = f'"{fingerprint}"'
+    # Last-Modified দেওয়া হয় না: পেজের কোনো রো মুছে/আর্কাইভ হলে পরের পেজের পুরনো রো ঢুকে আসে,
+    # max(updated_at) বাড়ে না — If-Modified-Since তখন ভুল 304 দিত। ETag-এ রো-র id থাকায় সেটা ধরা পড়ে।
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id']) if has_more else None
+        response = JsonResponse({
+            'results': [{f: row[API_FIELDS[f]] for f in fields} for row in rows],
+            'next_cursor': next_cursor,
+        })
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+# --- আপলোড করা ডকুমেন্ট (লগইন ও রোল যাচাই করে; Range/ETag, বা প্রক্সিতে X-Accel-Redirect/X-Sendfile) ---
+@login_required
+@user_passes_test(is_viewer_or_higher, login_url='/login/')
+def shipment_file(request, pk):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    document = archive.find_file(pk, fields=('pk', 'uploaded_file', 'original_file', 'original_name'))
+    if document is None:
+        raise Http404("No such file.")
+    # ?original=1: নরমালাইজ করার আগের আসল ফাইল (UPLOAD_KEEP_ORIGINALS চালু থাকলে)
+    field = document.original_file if request.GET.get('original') else document.uploaded_file
+    if not field:
+        raise Http404("No such file.")
+    return media.serve(
+        request, field.storage, field.name,
+        filename=document.display_name, as_attachment=bool(request.GET.get('download')),
+    )
+
+# --- ডকুমেন্ট প্রিভিউ (সাইজ-বাকেট থাম্বনেইল, ডিস্ক ক্যাশ) ---
+PREVIEW_MAX_AGE = 60 * 60 * 24 * 365
+
+@login_required
+@user_passes_test(is_viewer_or_higher, login_url='/login/')
+def file_preview(request, pk, size):
+    if size not in previews.SIZE_BUCKETS:
+        raise Http404("Unknown preview size.")
+    shipment_file = archive.find_file(pk)
+    if shipment_file is None:
+        raise Http404("No such file.")
+    fmt = previews.preferred_format(request)
+
+    etag = previews.preview_etag(shipment_file, size, fmt)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        preview, etag = previews.open_preview(shipment_file, size, fmt)
+        response = FileResponse(preview, content_type=previews.FORMATS[fmt][1])
+
+    # কন্টেন্ট হ্যাশ-ভিত্তিক, তাই বদলায় না; লগইন লাগে বলে private
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=PREVIEW_MAX_AGE, immutable=True)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+# --- ট্রানজিট অ্যানালিটিক্স (প্রিকম্পিউটেড সারাংশ টেবিল থেকে, ইভেন্ট লগ স্ক্যান হয় না) ---
+TRANSIT_WEEKS = 26
+
+@login_required
+@user_passes_test(is_viewer_or_higher, login_url='/login/')
+def transit_analytics(request):
+    if request.method == 'POST':
+        if not is_admin(request.user):
+            messages.error(request, "Only admins can refresh transit statistics.")
+        else:
+            enqueue('build_transit_stats')
+            messages.success(request, 'Transit statistics refresh was queued.')
+        return redirect('transit_analytics')
+
+    legs = [key for key, _ in ShipmentTransitStat.LEG_CHOICES]
+    since = timezone.localdate() - timedelta(weeks=TRANSIT_WEEKS)
+    weekly, by_creator = {}, {}
+    for stat in ShipmentTransitStat.objects.filter(scope='week', week__gte=since):
+        weekly.setdefault(stat.week, {})[stat.leg] = stat
+    for stat in ShipmentTransitStat.objects.filter(scope='creator').select_related('created_by'):
+        by_creator.setdefault(stat.created_by, {})[stat.leg] = stat
+
+    context = {
+        'leg_choices': ShipmentTransitStat.LEG_CHOICES,
+        'weekly_rows': [
+            {'week': week, 'stats': [weekly[week].get(leg) for leg in legs]}
+            for week in sorted(weekly, reverse=True)
+        ],
+        'creator_rows': [
+            {'creator': creator, 'stats': [stats.get(leg) for leg in legs]}
+            for creator, stats in sorted(by_creator.items(), key=lambda item: item[0].username if item[0] else '')
+        ],
+        'computed_at': ShipmentTransitStat.objects.aggregate(latest=Max('computed_at'))['latest'],
+        'weeks': TRANSIT_WEEKS,
+    }
+    return render(request, 'shipment_app/transit_analytics.html', context)
+
+# --- সাপ্তাহিক/মাসিক রিপোর্ট (প্রিকম্পিউটেড টেবিল থেকে; কাঁচা শিপমেন্ট স্ক্যান হয় না) ---
+@login_required
+@user_passes_test(is_viewer_or_higher, login_url='/login/')
+def period_reports(request):
+    if request.method == 'POST':
+        if not is_admin(request.user):
+            messages.error(request, "Only admins can refresh reports.")
+        else:
+            enqueue('build_reports')
+            messages.success(request, 'Report refresh was queued.')
+        return redirect('period_reports')
+
+    form = PeriodReportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest('; '.join(
+            f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()
+        ))
+    options = form.cleaned_data
+    table = reports.period_table(options['period'], options['group_by'], options['periods'])
+
+    if options['format'] == 'csv':
+        response = StreamingHttpResponse(
+            stream_csv(reports.csv_rows(table), header=reports.CSV_HEADER), content_type='text/csv',
+        )
+        filename = f"shipment_{options['period']}ly_{options['group_by']}.csv"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    csv_query = request.GET.copy()
+    csv_query['format'] = 'csv'
+    context = {
+        'form': form,
+        'options': options,
+        'table': table,
+        'computed_at': reports.last_computed(),
+        'csv_query': csv_query.urlencode(),
+        'bundle_status_choices': DocumentBundleForm.base_fields['status'].choices,
+    }
+    return render(request, 'shipment_app/period_reports.html', context)
+
+# --- রিকোয়েস্ট পারফরম্যান্স স্ট্যাটস (শুধু অ্যাডমিন) ---
+STATS_BUCKET_LABELS = [f"≤{b}ms" for b in request_metrics.HISTOGRAM_BUCKETS] + [
+    f">{request_metrics.HISTOGRAM_BUCKETS[-1]}ms"
+]
+
+@login_required
+@user_passes_test(is_admin, login_url='/login/')
+def request_stats(request):
+    if request.method == 'POST':
+        request_metrics.reset()
+        caching.reset()
+        messages.success(request, 'Request statistics were reset.')
+        return redirect('request_stats')
+
+    rows = request_metrics.snapshot()
+    for row in rows:
+        peak = max(row['histogram']) or 1
+        row['buckets'] = [
+            {'label': label, 'count': count, 'width': round(100 * count / peak)}
+            for label, count in zip(STATS_BUCKET_LABELS, row['histogram'])
+        ]
+    context = {
+        'rows': rows,
+        'cache_rows': caching.counters(),
+        'upload_stats': normalization_stats(),
+        'slow_ms': settings.SLOW_REQUEST_MS,
+        'pid': os.getpid(),
+    }
+    return render(request, 'shipment_app/request_stats.html', context)
+
 # --- ৫. কাস্টমার অ্যাকাউন্ট ফিচার (নতুন) ---
 def account_list(request):
-    """সব কাস্টমারের নাম দেখাবে। লগইন আবশ্যক নয়।"""
-    accounts = CustomerAccount.objects.all()
-    return render(request, 'shipment_app/account_list.html', {'accounts': accounts})
+    """সব কাস্টমারের নাম দেখাবে। লগইন আবশ্যক নয়। তালিকাটি ফ্র্যাগমেন্ট ক্যাশে, অ্যাকাউন্ট বদলালেই নতুন ভার্সন।"""
+    accounts = CustomerAccount.objects.order_by('name').only('pk', 'name')  # ক্যাশ মিস হলেই কুয়েরি চলে
+    return render(request, 'shipment_app/account_list.html', {
+        'accounts': accounts,
+        'accounts_version': caching.accounts_version(),
+    })
 
 def account_detail(request, pk):
-    """আইডি যাচাই করে Google Sheet দেখাবে।"""
-    account = get_object_or_404(CustomerAccount, pk=pk)
+    """আইডি (হ্যাশ) যাচাই করে Google Sheet দেখাবে; সফল হলে সাইন করা কুকি, তাই পরের বার আর যাচাই লাগে না।"""
+    account = access.get_account(pk)
     sheet_url = None
     error_message = None
+    status = 200
+    verified = False
 
-    if request.method == 'POST':
+    if access.has_valid_token(request, account):
+        sheet_url = account.finance_sheet_url
+    elif request.method == 'POST':
         # এখানে POST থেকে সিক্রেট আইডি নেওয়া হচ্ছে
-        access_id_input = request.POST.get('access_id', '').strip()
-        
-        if access_id_input == account.access_id:
+        result = access.verify(request, account, request.POST.get('access_id', ''))
+        if result.ok:
             # আইডি ম্যাচ করলে URL দেখানো হবে
             sheet_url = account.finance_sheet_url
+            verified = True
+        elif result.retry_after:
+            status = 429
+            error_message = f"Too many attempts. Please try again in {max(1, result.retry_after // 60)} minute(s)."
         else:
             error_message = "Invalid Access ID. Please try again."
 
     context = {
         'account': account,
         'sheet_url': sheet_url,
+        # শিট পেজে যায় না; ব্যাকগ্রাউন্ডে আনা CSV-র ক্যাশ করা সারিগুলো হালকা টেবিলে দেখানো হয়
+        'statement': finance.statement(account) if sheet_url else None,
         'error_message': error_message,
     }
-    return render(request, 'shipment_app/account_detail.html', context)
+    response = render(request, 'shipment_app/account_detail.html', context, status=status)
+    if verified:
+        access.issue_token(response, request, account)
+    elif status == 429:
+        response['Retry-After'] = str(result.retry_after)
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+# --- CSV / XLSX Report ডাউনলোড (স্ট্রিমিং, ফিল্টার সহ) ---
+def filtered_shipments(filters, model=Shipment):
+    """ReportFilterForm-এর cleaned_data অনুযায়ী শিপমেন্ট (রিপোর্ট ও ডকুমেন্ট বান্ডল দুটোতেই)।"""
+    shipments = model.objects.all()
+    if filters['start_date']:
+        shipments = shipments.filter(created_at__gte=day_start(filters['start_date']))
+    if filters['end_date']:
+        shipments = shipments.filter(created_at__lt=day_start(filters['end_date'] + timedelta(days=1)))
+    if filters['status']:
+        shipments = shipments.filter(status=filters['status'])
+    if filters['created_by']:
+        shipments = shipments.filter(created_by=filters['created_by'])
+    return shipments
+
 
-# --- CSV Report ডাউনলোড (পূর্বের মতো) ---
 @login_required
 @user_passes_test(is_admin, login_url='/login/')
 def download_report_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="shipment_report.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['S/O Number', 'LC Number', 'Total CTN', 'Total KG', 'Status', 'Created By', 'Created At'])
-
-    shipments = Shipment.objects.all().order_by('-created_at')
-    for shipment in shipments:
-        writer.writerow([
-            shipment.so_number,
-            shipment.lc_number or '',
-            shipment.total_ctn,
-            shipment.total_kg,
-            shipment.get_status_display(),
-            shipment.created_by.username,
-            shipment.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        ])
+    form = ReportFilterForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest('; '.join(
+            f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()
+        ))
+    filters = form.cleaned_data
+
+    rows = report_rows(filtered_shipments(filters))
+    if filters['include_archived']:
+        # আগে বর্তমান শিপমেন্ট, তারপর আর্কাইভ (আর্কাইভের সবই পুরনো, তাই ক্রম প্রায় একই থাকে)
+        rows = chain(rows, report_rows(filtered_shipments(filters, ArchivedShipment)))
+    if filters['format'] == 'xlsx':
+        chunks = stream_xlsx(rows)
+        content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        filename = 'shipment_report.xlsx'
+    else:
+        chunks = stream_csv(rows)
+        content_type = 'text/csv'
+        filename = 'shipment_report.csv'
+
+    if filters['gzip']:
+        chunks = gzip_stream(chunks)
+        content_type = 'application/gzip'
+        filename += '.gz'
 
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
+
+
+# --- ডকুমেন্ট ZIP বান্ডল (স্ট্রিমিং, টেম্প ফাইল ছাড়া) ---
+def _zip_response(shipments, filename, archived=None):
+    storage = ShipmentFile._meta.get_field('uploaded_file').storage
+    files = bundle_files(shipments)
+    if archived is not None:
+        files = chain(files, bundle_files(archived))
+    response = StreamingHttpResponse(stream_zip_bundle(files, storage), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# --- একটি শিপমেন্টের সব ডকুমেন্ট ZIP (আর্কাইভ করা শিপমেন্টেরও) ---
+@login_required
+@user_passes_test(is_viewer_or_higher, login_url='/login/')
+def shipment_documents_zip(request, pk):
+    shipment = archive.find_shipment(pk)
+    if shipment is None:
+        raise Http404("No Shipment matches the given query.")
+    filename = re.sub(r'[^\w.-]+', '_', shipment.so_number) or str(shipment.pk)
+    return _zip_response(type(shipment).objects.filter(pk=shipment.pk), f"{filename}_documents.zip")
+
+
+# --- তারিখ/স্ট্যাটাস ফিল্টারের সব শিপমেন্টের ডকুমেন্ট একটি ZIP-এ (শুধু অ্যাডমিন) ---
+@login_required
+@user_passes_test(is_admin, login_url='/login/')
+def document_bundle(request):
+    form = DocumentBundleForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest('; '.join(
+            f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()
+        ))
+    filters = form.cleaned_data
+    label = '_'.join(str(value) for value in (filters['start_date'], filters['end_date'], filters['status']) if value)
+    archived = filtered_shipments(filters, ArchivedShipment) if filters['include_archived'] else None
+    return _zip_response(filtered_shipments(filters), f"shipment_documents_{label}.zip", archived)